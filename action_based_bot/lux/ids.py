@@ -0,0 +1,46 @@
+from typing import Dict, List
+
+import numpy as np
+
+
+class IdInterner:
+    """
+    maps the engine's id strings ("u_12", "c_3") to dense integers 0, 1, 2, ...
+    in order of first appearance. Indices never change during a match, so they
+    can index preallocated per-unit or per-city arrays; name() gives back the
+    string for commands.
+    """
+    def __init__(self):
+        self._indices: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def clone(self) -> 'IdInterner':
+        clone = IdInterner()
+        clone._indices = self._indices.copy()
+        clone.names = self.names.copy()
+        return clone
+
+    def __contains__(self, name):
+        return name in self._indices
+
+    def intern(self, name: str) -> int:
+        index = self._indices.get(name)
+        if index is None:
+            index = self._indices[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def intern_all(self, names) -> np.ndarray:
+        return np.array([self.intern(name) for name in names], dtype=np.int32)
+
+    def index(self, name: str) -> int:
+        """
+        the index of an id already seen, -1 if it has not been
+        """
+        return self._indices.get(name, -1)
+
+    def name(self, index: int) -> str:
+        return self.names[index]
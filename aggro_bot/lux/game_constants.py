@@ -1,6 +1,234 @@
-import json
-from os import path
-dir_path = path.dirname(__file__)
-constants_path = path.abspath(path.join(dir_path, "game_constants.json"))
-with open(constants_path) as f:
-    GAME_CONSTANTS = json.load(f)
\ No newline at end of file
+"""
+The rules' constants.
+
+DEFAULT_PARAMETERS holds the rules as a frozen GameParameters with flat
+attributes and a few derived values precomputed, which is what the lux classes
+read on their hot paths. GAME_CONSTANTS is built from it in the nested-dict
+layout of game_constants.json, which ships alongside for tools that read the
+file; tests/test_game_constants.py checks the two agree. Nothing is read from
+disk at import. Read it as game_constants.PARAMETERS rather than importing the name, so
+a profile switch is seen.
+
+A profile is a named set of overrides, so a simulator or tuning run can play a
+rule variant without editing the JSON:
+
+    register_profile("long_nights", night_length=15)
+    use_profile("long_nights")
+    ...
+    use_profile("default")
+"""
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Tuple
+
+# resource types in the order of the lux RESOURCE_TYPES names
+_RESOURCES = ("wood", "coal", "uranium")
+
+
+@dataclass(frozen=True)
+class GameParameters:
+    """
+    the PARAMETERS section of game_constants.json, flattened. Fields not set
+    on construction are derived from the others.
+    """
+    day_length: int
+    night_length: int
+    max_days: int
+    city_light_upkeep: int
+    worker_light_upkeep: int
+    cart_light_upkeep: int
+    wood_growth_rate: float
+    max_wood_amount: int
+    city_build_cost: int
+    city_adjacency_bonus: int
+    worker_capacity: int
+    cart_capacity: int
+    wood_collection_rate: int
+    coal_collection_rate: int
+    uranium_collection_rate: int
+    wood_fuel_rate: int
+    coal_fuel_rate: int
+    uranium_fuel_rate: int
+    coal_research: int
+    uranium_research: int
+    city_action_cooldown: int
+    worker_action_cooldown: int
+    cart_action_cooldown: int
+    max_road: int
+    min_road: int
+    cart_road_development_rate: float
+    pillage_rate: float
+
+    # turns in one day and night
+    cycle_length: int = field(init=False)
+    # by unit type (Constants.UNIT_TYPES), so WORKER is 0 and CART is 1
+    resource_capacity: Tuple[int, int] = field(init=False)
+    unit_action_cooldown: Tuple[int, int] = field(init=False)
+    unit_light_upkeep: Tuple[int, int] = field(init=False)
+    # by resource type name (Constants.RESOURCE_TYPES)
+    collection_rate: Mapping[str, int] = field(init=False)
+    fuel_rate: Mapping[str, int] = field(init=False)
+    research_requirement: Mapping[str, int] = field(init=False)
+    # fuel a worker collects in a turn from a cell of each resource type
+    fuel_per_turn: Mapping[str, int] = field(init=False)
+
+    def __post_init__(self):
+        derived = {
+            "cycle_length": self.day_length + self.night_length,
+            "resource_capacity": (self.worker_capacity, self.cart_capacity),
+            "unit_action_cooldown": (self.worker_action_cooldown, self.cart_action_cooldown),
+            "unit_light_upkeep": (self.worker_light_upkeep, self.cart_light_upkeep),
+            "collection_rate": _by_resource(self, "collection_rate"),
+            "fuel_rate": _by_resource(self, "fuel_rate"),
+            "research_requirement": MappingProxyType(
+                {"wood": 0, "coal": self.coal_research, "uranium": self.uranium_research}
+            ),
+        }
+        derived["fuel_per_turn"] = MappingProxyType(
+            {name: derived["collection_rate"][name] * derived["fuel_rate"][name] for name in _RESOURCES}
+        )
+        for name, value in derived.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_json(cls, parameters) -> 'GameParameters':
+        """
+        from the PARAMETERS section of game_constants.json
+        """
+        return cls(
+            day_length=parameters["DAY_LENGTH"],
+            night_length=parameters["NIGHT_LENGTH"],
+            max_days=parameters["MAX_DAYS"],
+            city_light_upkeep=parameters["LIGHT_UPKEEP"]["CITY"],
+            worker_light_upkeep=parameters["LIGHT_UPKEEP"]["WORKER"],
+            cart_light_upkeep=parameters["LIGHT_UPKEEP"]["CART"],
+            wood_growth_rate=parameters["WOOD_GROWTH_RATE"],
+            max_wood_amount=parameters["MAX_WOOD_AMOUNT"],
+            city_build_cost=parameters["CITY_BUILD_COST"],
+            city_adjacency_bonus=parameters["CITY_ADJACENCY_BONUS"],
+            worker_capacity=parameters["RESOURCE_CAPACITY"]["WORKER"],
+            cart_capacity=parameters["RESOURCE_CAPACITY"]["CART"],
+            wood_collection_rate=parameters["WORKER_COLLECTION_RATE"]["WOOD"],
+            coal_collection_rate=parameters["WORKER_COLLECTION_RATE"]["COAL"],
+            uranium_collection_rate=parameters["WORKER_COLLECTION_RATE"]["URANIUM"],
+            wood_fuel_rate=parameters["RESOURCE_TO_FUEL_RATE"]["WOOD"],
+            coal_fuel_rate=parameters["RESOURCE_TO_FUEL_RATE"]["COAL"],
+            uranium_fuel_rate=parameters["RESOURCE_TO_FUEL_RATE"]["URANIUM"],
+            coal_research=parameters["RESEARCH_REQUIREMENTS"]["COAL"],
+            uranium_research=parameters["RESEARCH_REQUIREMENTS"]["URANIUM"],
+            city_action_cooldown=parameters["CITY_ACTION_COOLDOWN"],
+            worker_action_cooldown=parameters["UNIT_ACTION_COOLDOWN"]["WORKER"],
+            cart_action_cooldown=parameters["UNIT_ACTION_COOLDOWN"]["CART"],
+            max_road=parameters["MAX_ROAD"],
+            min_road=parameters["MIN_ROAD"],
+            cart_road_development_rate=parameters["CART_ROAD_DEVELOPMENT_RATE"],
+            pillage_rate=parameters["PILLAGE_RATE"],
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        """
+        back into the layout of the PARAMETERS section of game_constants.json
+        """
+        return {
+            "DAY_LENGTH": self.day_length,
+            "NIGHT_LENGTH": self.night_length,
+            "MAX_DAYS": self.max_days,
+            "LIGHT_UPKEEP": {
+                "CITY": self.city_light_upkeep, "WORKER": self.worker_light_upkeep, "CART": self.cart_light_upkeep,
+            },
+            "WOOD_GROWTH_RATE": self.wood_growth_rate,
+            "MAX_WOOD_AMOUNT": self.max_wood_amount,
+            "CITY_BUILD_COST": self.city_build_cost,
+            "CITY_ADJACENCY_BONUS": self.city_adjacency_bonus,
+            "RESOURCE_CAPACITY": {"WORKER": self.worker_capacity, "CART": self.cart_capacity},
+            "WORKER_COLLECTION_RATE": {name.upper(): rate for name, rate in self.collection_rate.items()},
+            "RESOURCE_TO_FUEL_RATE": {name.upper(): rate for name, rate in self.fuel_rate.items()},
+            "RESEARCH_REQUIREMENTS": {"COAL": self.coal_research, "URANIUM": self.uranium_research},
+            "CITY_ACTION_COOLDOWN": self.city_action_cooldown,
+            "UNIT_ACTION_COOLDOWN": {"CART": self.cart_action_cooldown, "WORKER": self.worker_action_cooldown},
+            "MAX_ROAD": self.max_road,
+            "MIN_ROAD": self.min_road,
+            "CART_ROAD_DEVELOPMENT_RATE": self.cart_road_development_rate,
+            "PILLAGE_RATE": self.pillage_rate,
+        }
+
+
+def _by_resource(parameters, suffix) -> Mapping[str, int]:
+    return MappingProxyType({name: getattr(parameters, f"{name}_{suffix}") for name in _RESOURCES})
+
+
+# the rules as shipped in game_constants.json
+DEFAULT_PARAMETERS = GameParameters(
+    day_length=30,
+    night_length=10,
+    max_days=360,
+    city_light_upkeep=23,
+    worker_light_upkeep=4,
+    cart_light_upkeep=10,
+    wood_growth_rate=1.025,
+    max_wood_amount=500,
+    city_build_cost=100,
+    city_adjacency_bonus=5,
+    worker_capacity=100,
+    cart_capacity=2000,
+    wood_collection_rate=20,
+    coal_collection_rate=5,
+    uranium_collection_rate=2,
+    wood_fuel_rate=1,
+    coal_fuel_rate=10,
+    uranium_fuel_rate=40,
+    coal_research=50,
+    uranium_research=200,
+    city_action_cooldown=10,
+    worker_action_cooldown=2,
+    cart_action_cooldown=3,
+    max_road=6,
+    min_road=0,
+    cart_road_development_rate=0.75,
+    pillage_rate=0.5,
+)
+
+GAME_CONSTANTS: Dict[str, Any] = {
+    "UNIT_TYPES": {"WORKER": 0, "CART": 1},
+    "RESOURCE_TYPES": {"WOOD": "wood", "COAL": "coal", "URANIUM": "uranium"},
+    "DIRECTIONS": {"NORTH": "n", "WEST": "w", "EAST": "e", "SOUTH": "s", "CENTER": "c"},
+    "PARAMETERS": DEFAULT_PARAMETERS.to_json(),
+}
+
+# profile name -> the GameParameters fields it overrides
+PROFILES: Dict[str, Dict[str, Any]] = {"default": {}}
+
+# the parameters of the profile in use
+PARAMETERS = DEFAULT_PARAMETERS
+
+
+def register_profile(name, **overrides) -> GameParameters:
+    """
+    add or replace the profile name, overriding the given GameParameters
+    fields of the defaults; raises TypeError or ValueError for a field that
+    does not exist or is derived
+    """
+    parameters = replace(DEFAULT_PARAMETERS, **overrides)
+    PROFILES[name] = dict(overrides)
+    return parameters
+
+
+def profile(name) -> GameParameters:
+    """
+    the parameters of a registered profile
+    """
+    return replace(DEFAULT_PARAMETERS, **PROFILES[name])
+
+
+def use_profile(name) -> GameParameters:
+    """
+    play by the profile name from now on: PARAMETERS becomes its parameters and
+    GAME_CONSTANTS["PARAMETERS"] is rewritten in place to match
+    """
+    global PARAMETERS
+    PARAMETERS = profile(name)
+    parameters = GAME_CONSTANTS["PARAMETERS"]
+    parameters.clear()
+    parameters.update(PARAMETERS.to_json())
+    return PARAMETERS
+
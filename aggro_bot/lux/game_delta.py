@@ -0,0 +1,113 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .constants import Constants
+from .game_map import RESOURCE_TYPE_NAMES
+from . import game_constants
+
+RESOURCE_TYPES = Constants.RESOURCE_TYPES
+
+
+class TurnDelta:
+    """
+    what changed between the previous update and the current one
+    """
+    def __init__(self):
+        # unit id -> team
+        self.units_spawned: Dict[str, int] = {}
+        self.units_died: Dict[str, int] = {}
+        # unit id -> ((x, y) last turn, (x, y) this turn)
+        self.units_moved: Dict[str, Tuple[Tuple[int, int], Tuple[int, int]]] = {}
+        # (x, y) -> team
+        self.citytiles_built: Dict[Tuple[int, int], int] = {}
+        self.citytiles_lost: Dict[Tuple[int, int], int] = {}
+        # (x, y) -> resource type the cell held
+        self.resources_depleted: Dict[Tuple[int, int], str] = {}
+        # (x, y) -> resource type of a cell that had no resource last turn
+        self.resources_added: Dict[Tuple[int, int], str] = {}
+        self.roads_changed: List[Tuple[int, int]] = []
+        # (team, resource type) for every research threshold crossed
+        self.research_unlocked: List[Tuple[int, str]] = []
+
+    def changed_cells(self) -> set:
+        """
+        cells whose citytile, resource or road changed this turn
+        """
+        cells = set(self.citytiles_built)
+        cells.update(self.citytiles_lost)
+        cells.update(self.resources_depleted)
+        cells.update(self.resources_added)
+        cells.update(self.roads_changed)
+        return cells
+
+
+class DeltaTracker:
+    """
+    remembers the state of the previous update so the next one can be diffed
+    against it
+    """
+    def __init__(self, width, height):
+        self.units: Dict[str, Tuple[int, int, int]] = {}
+        self.research_points = [0, 0]
+        self.citytile_team = np.full((height, width), -1, dtype=np.int8)
+        self.resource_type = np.full((height, width), -1, dtype=np.int8)
+        self.road = np.zeros((height, width), dtype=np.float64)
+
+    def clone(self) -> 'DeltaTracker':
+        clone = DeltaTracker.__new__(DeltaTracker)
+        clone.units = self.units.copy()
+        clone.research_points = self.research_points.copy()
+        clone.citytile_team = self.citytile_team.copy()
+        clone.resource_type = self.resource_type.copy()
+        clone.road = self.road.copy()
+        return clone
+
+    def update(self, game) -> TurnDelta:
+        delta = TurnDelta()
+        game_map = game.map
+
+        units = {}
+        for player in game.players:
+            table = player.unit_table
+            for unitid, x, y in zip(table.ids, table.x.tolist(), table.y.tolist()):
+                units[unitid] = (player.team, x, y)
+        for unitid, (team, x, y) in units.items():
+            previous = self.units.get(unitid)
+            if previous is None:
+                delta.units_spawned[unitid] = team
+            elif previous[1] != x or previous[2] != y:
+                delta.units_moved[unitid] = ((previous[1], previous[2]), (x, y))
+        for unitid, (team, _, _) in self.units.items():
+            if unitid not in units:
+                delta.units_died[unitid] = team
+        self.units = units
+
+        changed = game_map.citytile_team != self.citytile_team
+        for y, x in zip(*np.nonzero(changed & (self.citytile_team >= 0))):
+            delta.citytiles_lost[(int(x), int(y))] = int(self.citytile_team[y, x])
+        for y, x in zip(*np.nonzero(changed & (game_map.citytile_team >= 0))):
+            delta.citytiles_built[(int(x), int(y))] = int(game_map.citytile_team[y, x])
+
+        depleted = (self.resource_type >= 0) & (game_map.resource_type < 0)
+        for y, x in zip(*np.nonzero(depleted)):
+            delta.resources_depleted[(int(x), int(y))] = RESOURCE_TYPE_NAMES[self.resource_type[y, x]]
+        added = (self.resource_type < 0) & (game_map.resource_type >= 0)
+        for y, x in zip(*np.nonzero(added)):
+            delta.resources_added[(int(x), int(y))] = RESOURCE_TYPE_NAMES[game_map.resource_type[y, x]]
+
+        for y, x in zip(*np.nonzero(game_map.road != self.road)):
+            delta.roads_changed.append((int(x), int(y)))
+
+        requirements = game_constants.PARAMETERS.research_requirement
+        for player in game.players:
+            before = self.research_points[player.team]
+            for r_type in (RESOURCE_TYPES.COAL, RESOURCE_TYPES.URANIUM):
+                if before < requirements[r_type] <= player.research_points:
+                    delta.research_unlocked.append((player.team, r_type))
+            self.research_points[player.team] = player.research_points
+
+        np.copyto(self.citytile_team, game_map.citytile_team)
+        np.copyto(self.resource_type, game_map.resource_type)
+        np.copyto(self.road, game_map.road)
+        return delta
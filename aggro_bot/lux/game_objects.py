@@ -1,32 +1,113 @@
-from typing import Dict
+from typing import Dict, List, Tuple
+
+import numpy as np
 
 from .constants import Constants
-from .game_map import Position
-from .game_constants import GAME_CONSTANTS
+from .game_map import position
+from . import game_constants
 
 UNIT_TYPES = Constants.UNIT_TYPES
 
 
 class Player:
+    __slots__ = (
+        "team", "research_points", "unit_table", "cities", "city_tile_count", "citytiles_by_pos", "cities_by_pos",
+        "_units", "_units_by_id", "_units_by_pos",
+    )
+
     def __init__(self, team):
         self.team = team
         self.research_points = 0
-        self.units: list[Unit] = []
+        # this turn's units as columns, filled by Game._update; the Unit objects
+        # in units are built from it the first time they are asked for
+        self.unit_table = UnitTable(team)
         self.cities: Dict[str, City] = {}
         self.city_tile_count = 0
+        # lookups kept up to date by Game._update, positions are (x, y) tuples
+        self.citytiles_by_pos: Dict[Tuple[int, int], CityTile] = {}
+        self.cities_by_pos: Dict[Tuple[int, int], City] = {}
+        self._units: List[Unit] = None
+        self._units_by_id: Dict[str, Unit] = None
+        self._units_by_pos: Dict[Tuple[int, int], List[Unit]] = None
+    @property
+    def units(self) -> List['Unit']:
+        if self._units is None:
+            self._units = self.unit_table.units()
+        return self._units
+    @units.setter
+    def units(self, units):
+        self._units = units
+        self._units_by_id = None
+        self._units_by_pos = None
+    @property
+    def units_by_id(self) -> Dict[str, 'Unit']:
+        if self._units_by_id is None:
+            self._units_by_id = {unit.id: unit for unit in self.units}
+        return self._units_by_id
+    @property
+    def units_by_pos(self) -> Dict[Tuple[int, int], List['Unit']]:
+        if self._units_by_pos is None:
+            self._units_by_pos = {}
+            for unit in self.units:
+                pos = (unit.pos.x, unit.pos.y)
+                if pos in self._units_by_pos:
+                    self._units_by_pos[pos].append(unit)
+                else:
+                    self._units_by_pos[pos] = [unit]
+        return self._units_by_pos
+    def clone(self) -> 'Player':
+        """
+        a copy with its own units list, cities dict and lookups; the Unit and
+        City objects in them are shared with this player
+        """
+        clone = Player(self.team)
+        clone.research_points = self.research_points
+        clone.unit_table = self.unit_table
+        clone.cities = self.cities.copy()
+        clone.city_tile_count = self.city_tile_count
+        clone.citytiles_by_pos = self.citytiles_by_pos.copy()
+        clone.cities_by_pos = self.cities_by_pos.copy()
+        if self._units is not None:
+            clone._units = self._units.copy()
+        if self._units_by_id is not None:
+            clone._units_by_id = self._units_by_id.copy()
+        if self._units_by_pos is not None:
+            clone._units_by_pos = {pos: units.copy() for pos, units in self._units_by_pos.items()}
+        return clone
+    def _reset(self):
+        self.unit_table = UnitTable(self.team)
+        self.units = None
+        self.cities = {}
+        self.city_tile_count = 0
+        self.citytiles_by_pos = {}
+        self.cities_by_pos = {}
+    def _add_city_tile(self, cityid, x, y, cooldown) -> 'CityTile':
+        city = self.cities[cityid]
+        citytile = city._add_city_tile(x, y, cooldown)
+        self.citytiles_by_pos[(x, y)] = citytile
+        self.cities_by_pos[(x, y)] = city
+        self.city_tile_count += 1
+        return citytile
     def researched_coal(self) -> bool:
-        return self.research_points >= GAME_CONSTANTS["PARAMETERS"]["RESEARCH_REQUIREMENTS"]["COAL"]
+        return self.research_points >= game_constants.PARAMETERS.coal_research
     def researched_uranium(self) -> bool:
-        return self.research_points >= GAME_CONSTANTS["PARAMETERS"]["RESEARCH_REQUIREMENTS"]["URANIUM"]
+        return self.research_points >= game_constants.PARAMETERS.uranium_research
 
 
 class City:
+    __slots__ = ("cityid", "team", "fuel", "citytiles", "light_upkeep")
+
     def __init__(self, teamid, cityid, fuel, light_upkeep):
         self.cityid = cityid
         self.team = teamid
         self.fuel = fuel
         self.citytiles: list[CityTile] = []
         self.light_upkeep = light_upkeep
+    def clone(self) -> 'City':
+        clone = City(self.team, self.cityid, self.fuel, self.light_upkeep)
+        for ct in self.citytiles:
+            clone._add_city_tile(ct.pos.x, ct.pos.y, ct.cooldown)
+        return clone
     def _add_city_tile(self, x, y, cooldown):
         ct = CityTile(self.team, self.cityid, x, y, cooldown)
         self.citytiles.append(ct)
@@ -36,10 +117,12 @@ class City:
 
 
 class CityTile:
+    __slots__ = ("cityid", "team", "pos", "cooldown")
+
     def __init__(self, teamid, cityid, x, y, cooldown):
         self.cityid = cityid
         self.team = teamid
-        self.pos = Position(x, y)
+        self.pos = position(x, y)
         self.cooldown = cooldown
     def can_act(self) -> bool:
         """
@@ -64,6 +147,8 @@ class CityTile:
 
 
 class Cargo:
+    __slots__ = ("wood", "coal", "uranium")
+
     def __init__(self):
         self.wood = 0
         self.coal = 0
@@ -74,16 +159,23 @@ class Cargo:
 
 
 class Unit:
-    def __init__(self, teamid, u_type, unitid, x, y, cooldown, wood, coal, uranium):
-        self.pos = Position(x, y)
+    __slots__ = ("pos", "team", "id", "uid", "type", "cooldown", "cargo")
+
+    def __init__(self, teamid, u_type, unitid, x, y, cooldown, wood, coal, uranium, uid=-1):
+        self.pos = position(x, y)
         self.team = teamid
         self.id = unitid
+        # interned id, see Game.unit_ids
+        self.uid = uid
         self.type = u_type
         self.cooldown = cooldown
         self.cargo = Cargo()
         self.cargo.wood = wood
         self.cargo.coal = coal
         self.cargo.uranium = uranium
+    def clone(self) -> 'Unit':
+        return Unit(self.team, self.type, self.id, self.pos.x, self.pos.y, self.cooldown, self.cargo.wood, self.cargo.coal, self.cargo.uranium, self.uid)
+
     def is_worker(self) -> bool:
         return self.type == UNIT_TYPES.WORKER
 
@@ -96,16 +188,16 @@ class Unit:
         """
         spaceused = self.cargo.wood + self.cargo.coal + self.cargo.uranium
         if self.type == UNIT_TYPES.WORKER:
-            return GAME_CONSTANTS["PARAMETERS"]["RESOURCE_CAPACITY"]["WORKER"] - spaceused
+            return game_constants.PARAMETERS.worker_capacity - spaceused
         else:
-            return GAME_CONSTANTS["PARAMETERS"]["RESOURCE_CAPACITY"]["CART"] - spaceused
+            return game_constants.PARAMETERS.cart_capacity - spaceused
     
     def can_build(self, game_map) -> bool:
         """
         whether or not the unit can build where it is right now
         """
         cell = game_map.get_cell_by_pos(self.pos)
-        if not cell.has_resource() and self.can_act() and (self.cargo.wood + self.cargo.coal + self.cargo.uranium) >= GAME_CONSTANTS["PARAMETERS"]["CITY_BUILD_COST"]:
+        if not cell.has_resource() and self.can_act() and (self.cargo.wood + self.cargo.coal + self.cargo.uranium) >= game_constants.PARAMETERS.city_build_cost:
             return True
         return False
 
@@ -138,3 +230,64 @@ class Unit:
         return the command to pillage whatever is underneath the worker
         """
         return "p {}".format(self.id)
+
+
+class UnitTable:
+    """
+    a player's units stored column by column, one row per unit in the order
+    the engine sent them. Whole-army questions can be answered with array
+    expressions on the columns instead of looping over Unit objects.
+    """
+    __slots__ = ("team", "ids", "uid", "type", "x", "y", "cooldown", "wood", "coal", "uranium")
+
+    def __init__(self, team, ids=(), uid=(), type=(), x=(), y=(), cooldown=(), wood=(), coal=(), uranium=()):
+        self.team = team
+        self.ids: List[str] = list(ids)
+        # interned ids, see Game.unit_ids
+        self.uid = np.asarray(uid, dtype=np.int32)
+        self.type = np.asarray(type, dtype=np.int8)
+        self.x = np.asarray(x, dtype=np.intp)
+        self.y = np.asarray(y, dtype=np.intp)
+        self.cooldown = np.asarray(cooldown, dtype=np.float64)
+        self.wood = np.asarray(wood, dtype=np.int32)
+        self.coal = np.asarray(coal, dtype=np.int32)
+        self.uranium = np.asarray(uranium, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def unit(self, i) -> Unit:
+        return Unit(
+            self.team, int(self.type[i]), self.ids[i], int(self.x[i]), int(self.y[i]), float(self.cooldown[i]),
+            int(self.wood[i]), int(self.coal[i]), int(self.uranium[i]), int(self.uid[i]),
+        )
+
+    def units(self) -> List[Unit]:
+        team = self.team
+        return [
+            Unit(team, *row)
+            for row in zip(
+                self.type.tolist(), self.ids, self.x.tolist(), self.y.tolist(), self.cooldown.tolist(),
+                self.wood.tolist(), self.coal.tolist(), self.uranium.tolist(), self.uid.tolist(),
+            )
+        ]
+
+    def cargo(self) -> np.ndarray:
+        return self.wood + self.coal + self.uranium
+
+    def cargo_space_left(self) -> np.ndarray:
+        parameters = game_constants.PARAMETERS
+        return np.where(self.type == UNIT_TYPES.WORKER, parameters.worker_capacity, parameters.cart_capacity) - self.cargo()
+
+    def cargo_full(self) -> np.ndarray:
+        return self.cargo_space_left() <= 0
+
+    def can_act(self) -> np.ndarray:
+        return self.cooldown < 1
+
+    def fuel(self) -> np.ndarray:
+        """
+        fuel value of each unit's cargo
+        """
+        rates = game_constants.PARAMETERS.fuel_rate
+        return self.wood * rates["wood"] + self.coal * rates["coal"] + self.uranium * rates["uranium"]
@@ -0,0 +1,91 @@
+"""
+Nearest-point and radius queries by Manhattan distance.
+
+PointIndex buckets points into square blocks of the board, so a query only
+looks at the blocks overlapping the square around it; nearest doubles that
+square until it holds enough points. GameMap keeps one per turn for its city
+tiles, resource cells and buildable cells; a bot can build its own for any other
+set of points once per turn and share it between its units.
+"""
+import math
+from typing import Any, List, Tuple
+
+# side of the square blocks points are bucketed into
+DEFAULT_BUCKET = 4
+
+
+class PointIndex:
+    """
+    points on a width x height board, each with an item. Queries return
+    (distance, item) pairs, nearest first and, among equally near points, in
+    the order they were added.
+    """
+    def __init__(self, width, height, bucket=DEFAULT_BUCKET):
+        self.bucket = bucket
+        self.columns = -(-width // bucket)
+        self.rows = -(-height // bucket)
+        # per block, [order added, x, y, item] of the points in it
+        self._blocks: List[list] = [[] for _ in range(self.columns * self.rows)]
+        self._added = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, x, y, item=None):
+        self._blocks[(y // self.bucket) * self.columns + x // self.bucket].append((self._added, x, y, item))
+        self._added += 1
+        self._size += 1
+
+    def remove(self, x, y):
+        """
+        remove every point at (x, y)
+        """
+        block = self._blocks[(y // self.bucket) * self.columns + x // self.bucket]
+        kept = [point for point in block if point[1] != x or point[2] != y]
+        self._size -= len(block) - len(kept)
+        block[:] = kept
+
+    def nearest(self, x, y, k=1, max_distance=math.inf) -> List[Tuple[int, Any]]:
+        """
+        the k points nearest to (x, y), no further than max_distance
+        """
+        # every point within radius is in the blocks _collect scans, so once k
+        # of them are that close the answer is among them
+        furthest = self.columns * self.bucket + self.rows * self.bucket
+        radius = self.bucket
+        while True:
+            radius = min(radius, max_distance, furthest)
+            found = self._collect(x, y, radius)
+            if len(found) >= k or radius >= max_distance or radius >= furthest:
+                return [(distance, item) for distance, _, item in found[:k]]
+            radius *= 2
+
+    def within(self, x, y, radius) -> List[Tuple[int, Any]]:
+        """
+        every point no further than radius from (x, y)
+        """
+        return [(distance, item) for distance, _, item in self._collect(x, y, radius)]
+
+    def _collect(self, x, y, radius):
+        """
+        (distance, order added, item) of every point within radius of (x, y),
+        sorted, from the blocks overlapping the square around (x, y)
+        """
+        bucket, columns = self.bucket, self.columns
+        blocks = self._blocks
+        first_column = max(int(x - radius) // bucket, 0)
+        last_column = min(int(x + radius) // bucket, columns - 1)
+        found = []
+        for row in range(max(int(y - radius) // bucket, 0), min(int(y + radius) // bucket, self.rows - 1) + 1):
+            for block in blocks[row * columns + first_column:row * columns + last_column + 1]:
+                for order, px, py, item in block:
+                    distance = abs(px - x) + abs(py - y)
+                    if distance <= radius:
+                        found.append((distance, order, item))
+        found.sort(key=_by_distance)
+        return found
+
+
+def _by_distance(found):
+    return found[0], found[1]
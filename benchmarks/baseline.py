@@ -0,0 +1,175 @@
+"""
+The kit's Game and GameMap as they were before any of the optimizations, kept
+so benchmarks can time the current code against the original code path rather
+than against an option of the new one. Only the state and the parser are kept,
+not the command helpers.
+"""
+from lux.constants import Constants
+
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+
+
+class Position:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class Resource:
+    def __init__(self, r_type: str, amount: int):
+        self.type = r_type
+        self.amount = amount
+
+
+class Cell:
+    def __init__(self, x, y):
+        self.pos = Position(x, y)
+        self.resource: Resource = None
+        self.citytile = None
+        self.road = 0
+
+    def has_resource(self):
+        return self.resource is not None and self.resource.amount > 0
+
+
+class GameMap:
+    def __init__(self, width, height):
+        self.height = height
+        self.width = width
+        self.map = [None] * height
+        for y in range(0, self.height):
+            self.map[y] = [None] * width
+            for x in range(0, self.width):
+                self.map[y][x] = Cell(x, y)
+
+    def get_cell_by_pos(self, pos) -> Cell:
+        return self.map[pos.y][pos.x]
+
+    def get_cell(self, x, y) -> Cell:
+        return self.map[y][x]
+
+    def _setResource(self, r_type, x, y, amount):
+        cell = self.get_cell(x, y)
+        cell.resource = Resource(r_type, amount)
+
+
+class Player:
+    def __init__(self, team):
+        self.team = team
+        self.research_points = 0
+        self.units = []
+        self.cities = {}
+        self.city_tile_count = 0
+
+
+class City:
+    def __init__(self, teamid, cityid, fuel, light_upkeep):
+        self.cityid = cityid
+        self.team = teamid
+        self.fuel = fuel
+        self.citytiles = []
+        self.light_upkeep = light_upkeep
+
+    def _add_city_tile(self, x, y, cooldown):
+        ct = CityTile(self.team, self.cityid, x, y, cooldown)
+        self.citytiles.append(ct)
+        return ct
+
+
+class CityTile:
+    def __init__(self, teamid, cityid, x, y, cooldown):
+        self.cityid = cityid
+        self.team = teamid
+        self.pos = Position(x, y)
+        self.cooldown = cooldown
+
+
+class Cargo:
+    def __init__(self):
+        self.wood = 0
+        self.coal = 0
+        self.uranium = 0
+
+
+class Unit:
+    def __init__(self, teamid, u_type, unitid, x, y, cooldown, wood, coal, uranium):
+        self.pos = Position(x, y)
+        self.team = teamid
+        self.id = unitid
+        self.type = u_type
+        self.cooldown = cooldown
+        self.cargo = Cargo()
+        self.cargo.wood = wood
+        self.cargo.coal = coal
+        self.cargo.uranium = uranium
+
+
+class Game:
+    def _initialize(self, messages):
+        self.id = int(messages[0])
+        self.turn = -1
+        mapInfo = messages[1].split(" ")
+        self.map_width = int(mapInfo[0])
+        self.map_height = int(mapInfo[1])
+        self.map = GameMap(self.map_width, self.map_height)
+        self.players = [Player(0), Player(1)]
+
+    def _reset_player_states(self):
+        self.players[0].units = []
+        self.players[0].cities = {}
+        self.players[0].city_tile_count = 0
+        self.players[1].units = []
+        self.players[1].cities = {}
+        self.players[1].city_tile_count = 0
+
+    def _update(self, messages):
+        self.map = GameMap(self.map_width, self.map_height)
+        self.turn += 1
+        self._reset_player_states()
+
+        for update in messages:
+            if update == "D_DONE":
+                break
+            strs = update.split(" ")
+            input_identifier = strs[0]
+            if input_identifier == INPUT_CONSTANTS.RESEARCH_POINTS:
+                team = int(strs[1])
+                self.players[team].research_points = int(strs[2])
+            elif input_identifier == INPUT_CONSTANTS.RESOURCES:
+                r_type = strs[1]
+                x = int(strs[2])
+                y = int(strs[3])
+                amt = int(float(strs[4]))
+                self.map._setResource(r_type, x, y, amt)
+            elif input_identifier == INPUT_CONSTANTS.UNITS:
+                unittype = int(strs[1])
+                team = int(strs[2])
+                unitid = strs[3]
+                x = int(strs[4])
+                y = int(strs[5])
+                cooldown = float(strs[6])
+                wood = int(strs[7])
+                coal = int(strs[8])
+                uranium = int(strs[9])
+                self.players[team].units.append(Unit(team, unittype, unitid, x, y, cooldown, wood, coal, uranium))
+            elif input_identifier == INPUT_CONSTANTS.CITY:
+                team = int(strs[1])
+                cityid = strs[2]
+                fuel = float(strs[3])
+                lightupkeep = float(strs[4])
+                self.players[team].cities[cityid] = City(team, cityid, fuel, lightupkeep)
+            elif input_identifier == INPUT_CONSTANTS.CITY_TILES:
+                team = int(strs[1])
+                cityid = strs[2]
+                x = int(strs[3])
+                y = int(strs[4])
+                cooldown = float(strs[5])
+                city = self.players[team].cities[cityid]
+                citytile = city._add_city_tile(x, y, cooldown)
+                self.map.get_cell(x, y).citytile = citytile
+                self.players[team].city_tile_count += 1
+            elif input_identifier == INPUT_CONSTANTS.ROADS:
+                x = int(strs[1])
+                y = int(strs[2])
+                road = float(strs[3])
+                self.map.get_cell(x, y).road = road
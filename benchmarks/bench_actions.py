@@ -0,0 +1,95 @@
+"""
+Recording a turn's actions in an ActionBuffer against the list of command
+strings the agents build, on the commands of replay.json: every command
+of the replay is checked to survive decode and encode, and each turn's commands
+to come out of a buffer as they went in, less the ones a unit or city tile
+sends after its first. Timed on the units and city tiles of the last
+(late-game) turn, giving each one an action and then either writing the turn
+out, as for the engine, or reading it back as tuples, as a local harness does.
+
+    python -m benchmarks.bench_actions
+"""
+import timeit
+
+from lux import actions
+from lux.actions import ActionBuffer
+from .replay_states import load_replay, replay_games
+
+
+def late_game():
+    for game in replay_games():
+        pass
+    return game
+
+
+def check_parity(replay):
+    for turn in replay["allCommands"]:
+        for team in (0, 1):
+            commands = [cmd["command"] for cmd in turn if cmd["agentID"] == team]
+            buffer = ActionBuffer()
+            expected, seen = [], set()
+            for command in commands:
+                assert actions.encode(actions.decode(command)) == command, command
+                buffer.add(command)
+                key = actions.actor(actions.decode(command))
+                if key not in seen:
+                    seen.add(key)
+                    expected.append(command)
+            assert list(buffer) == expected
+            assert buffer.serialize() == ",".join(expected)
+            assert len(buffer.dropped) == len(commands) - len(expected)
+
+
+def legacy_turn(units, citytiles):
+    turn = [unit.move("n") for unit in units]
+    turn += [ct.research() for ct in citytiles]
+    turn = [x for x in turn if x is not None]
+    return ",".join(turn)
+
+
+def legacy_parsed(units, citytiles):
+    turn = [unit.move("n") for unit in units]
+    turn += [ct.research() for ct in citytiles]
+    return [actions.decode(command) for command in turn if command is not None]
+
+
+def buffered_parsed(units, citytiles):
+    buffer = ActionBuffer()
+    for unit in units:
+        buffer.move(unit, "n")
+    for ct in citytiles:
+        buffer.research(ct)
+    return buffer.actions
+
+
+def buffered_turn(units, citytiles):
+    buffer = ActionBuffer()
+    for unit in units:
+        buffer.move(unit, "n")
+    for ct in citytiles:
+        buffer.research(ct)
+    return buffer.serialize()
+
+
+def main():
+    check_parity(load_replay())
+    print("parity: ok")
+    game = late_game()
+    units = [u for player in game.players for u in player.units]
+    citytiles = [ct for player in game.players for city in player.cities.values() for ct in city.citytiles]
+    assert legacy_turn(units, citytiles) == buffered_turn(units, citytiles)
+    assert legacy_parsed(units, citytiles) == buffered_parsed(units, citytiles)
+    calls = len(units) + len(citytiles)
+    print(f"{len(units)} units, {len(citytiles)} city tiles")
+    for label, fn in (
+        ("written out, command strings", legacy_turn),
+        ("written out, ActionBuffer   ", buffered_turn),
+        ("as tuples, command strings  ", legacy_parsed),
+        ("as tuples, ActionBuffer     ", buffered_parsed),
+    ):
+        per_turn = min(timeit.repeat(lambda: fn(units, citytiles), number=500, repeat=5)) / 500
+        print(f"{label}: {per_turn * 1e6:7.1f} us/turn ({per_turn / calls * 1e9:6.1f} ns/action)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+assignment.assign against the greedy per-unit target choice the bots made
+before, where each unit in turn took its best target not yet taken. assign is
+first checked against every possible assignment of small random matrices, and
+top-k pruning against solving over every column. Then, on the last (late-game)
+turn of replay.json, both pick gather targets for player 0's workers and for 150
+workers spread over the board, scoring cells as the bots do; reports the total
+score each reaches and the time each takes.
+
+    python -m benchmarks.bench_assignment
+"""
+import itertools
+import math
+import random
+import time
+
+import numpy as np
+
+from lux import assignment, heatmaps
+from .replay_states import replay_games
+
+MAX_DIST = 15
+
+
+def late_game():
+    for game in replay_games():
+        pass
+    return game
+
+
+def best_total(scores):
+    rows, columns = scores.shape
+    best = 0.0
+    for picks in itertools.product(range(-1, columns), repeat=rows):
+        chosen = [c for c in picks if c >= 0]
+        if len(set(chosen)) < len(chosen):
+            continue
+        if any(c >= 0 and not scores[r, c] > 0 for r, c in enumerate(picks)):
+            continue
+        best = max(best, sum(scores[r, c] for r, c in enumerate(picks) if c >= 0))
+    return best
+
+
+def total(scores, picks):
+    return sum(scores[r, c] for r, c in enumerate(picks) if c >= 0)
+
+
+def check_parity(rng):
+    for _ in range(300):
+        scores = rng.integers(-3, 10, rng.integers(1, 5, size=2)).astype(np.float64)
+        scores[rng.random(scores.shape) < 0.2] = -np.inf
+        picks = assignment.assign(scores, top_k=None)
+        chosen = [c for c in picks if c >= 0]
+        assert len(set(chosen)) == len(chosen)
+        assert math.isclose(total(scores, picks), best_total(scores), abs_tol=1e-9)
+
+
+def map_values(game):
+    values = heatmaps.convolve(heatmaps.resource_value(game.map, game.players[0]), heatmaps.CROSS)
+    return {(x, y): value for y, row in enumerate(values.tolist()) for x, value in enumerate(row)}
+
+
+def greedy(positions, values):
+    # the bots' old get_gather_target, one unit at a time
+    taken = []
+    picks = []
+    for ux, uy in positions:
+        best_val, best_tile = 0.0, None
+        for tile in values.keys():
+            if tile in taken:
+                continue
+            dist = abs(ux - tile[0]) + abs(uy - tile[1])
+            if dist < MAX_DIST:
+                val = 1.0 * values[tile] / math.log(dist + 2)
+                if val > best_val:
+                    best_val, best_tile = val, tile
+        picks.append(best_tile)
+        if best_tile is not None:
+            taken.append(best_tile)
+    return picks
+
+
+def scored(positions, values, top_k=assignment.DEFAULT_TOP_K):
+    tiles = [tile for tile, value in values.items() if value > 0]
+    tx = np.array([tile[0] for tile in tiles])
+    ty = np.array([tile[1] for tile in tiles])
+    ux = np.array([x for x, _ in positions])
+    uy = np.array([y for _, y in positions])
+    dist = np.abs(ux[:, None] - tx[None, :]) + np.abs(uy[:, None] - ty[None, :])
+    scores = np.array([values[tile] for tile in tiles], dtype=np.float64)[None, :] / np.log(dist + 2)
+    scores[dist >= MAX_DIST] = 0
+    picks = assignment.assign(scores, top_k)
+    return [tiles[pick] if pick >= 0 else None for pick in picks]
+
+
+def value_of(positions, picks, values):
+    return sum(
+        values[tile] / math.log(abs(x - tile[0]) + abs(y - tile[1]) + 2)
+        for (x, y), tile in zip(positions, picks) if tile is not None
+    )
+
+
+def compare(label, positions, values):
+    start = time.perf_counter()
+    greedy_picks = greedy(positions, values)
+    greedy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    picks = scored(positions, values)
+    assign_time = time.perf_counter() - start
+    exact = scored(positions, values, top_k=None)
+    print(f"{label}: {len(positions)} workers")
+    print(f"  greedy        : total {value_of(positions, greedy_picks, values):8.1f} in {greedy_time * 1e3:7.1f} ms")
+    print(f"  assign, top {assignment.DEFAULT_TOP_K}: total {value_of(positions, picks, values):8.1f} in {assign_time * 1e3:7.1f} ms")
+    print(f"  assign, all   : total {value_of(positions, exact, values):8.1f}")
+
+
+def main():
+    check_parity(np.random.default_rng(0))
+    print("parity: ok")
+    game = late_game()
+    values = map_values(game)
+    workers = [(u.pos.x, u.pos.y) for u in game.players[0].units if u.is_worker()]
+    compare(f"turn {game.turn}, player 0", workers, values)
+    rng = random.Random(0)
+    crowd = [(rng.randrange(game.map.width), rng.randrange(game.map.height)) for _ in range(150)]
+    compare("150 workers", crowd, values)
+
+
+if __name__ == "__main__":
+    main()
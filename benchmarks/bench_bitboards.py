@@ -0,0 +1,102 @@
+"""
+Bitboard occupancy layers against the cell-by-cell code, over the turns of
+replay.json. Every turn is first checked for parity: each GameMap layer against
+its boolean array, adjacent against NeighborTable, and expansion sites built
+from the boards against the bots' loop over each city tile's neighbours (the
+bots keep that loop and its order; the boards are there for callers that want
+them).
+
+    python -m benchmarks.bench_bitboards
+"""
+import math
+import time
+
+import numpy as np
+
+from lux import bitboards
+from .replay_states import replay_games
+
+
+def is_empty(c):
+    if c.has_resource():
+        return False
+    if c.citytile is None:
+        return True
+    return False
+
+
+def legacy_expansion_sites(city, m):
+    borders_dup = []
+    for ct in city.citytiles:
+        borders_dup.append([m.get_cell(pos.x, pos.y) for pos in m.neighbors(ct.pos.x, ct.pos.y)])
+    borders_dup = [c for sublist in borders_dup for c in sublist]
+    return [c for c in set(borders_dup) if is_empty(c)]
+
+
+def expansion_sites(city, m):
+    city_tiles = bitboards.from_cells((ct.pos for ct in city.citytiles), m.width)
+    borders = bitboards.adjacent(city_tiles, m.width, m.height) & m.buildable_board()
+    return [m.get_cell(x, y) for x, y in bitboards.cells(borders, m.width)]
+
+
+def check_parity(games):
+    for game in games:
+        m = game.map
+        layers = [
+            (m.unit_board(0), m.unit_count[0] > 0),
+            (m.unit_board(1), m.unit_count[1] > 0),
+            (m.citytile_board(0), m.citytile_team == 0),
+            (m.citytile_board(1), m.citytile_team == 1),
+            (m.resource_board(), (m.resource_type >= 0) & (m.resource_amount > 0)),
+        ]
+        for board, mask in layers:
+            assert np.array_equal(bitboards.to_mask(board, m.width, m.height), mask), f"layer mismatch on turn {game.turn}"
+            assert bitboards.count(board) == mask.sum()
+            neighbours = m.neighbor_table.gather(mask, fill=False).any(axis=2)
+            assert np.array_equal(bitboards.to_mask(bitboards.adjacent(board, m.width, m.height), m.width, m.height), neighbours)
+        for player in game.players:
+            for city in player.cities.values():
+                legacy = sorted((c.pos.y, c.pos.x) for c in legacy_expansion_sites(city, m))
+                sites = [(c.pos.y, c.pos.x) for c in expansion_sites(city, m)]
+                assert sites == legacy, f"expansion sites mismatch on turn {game.turn} for {city.cityid}"
+
+
+def time_per_turn(games, fn, repeat=3):
+    best = math.inf
+    for _ in range(repeat):
+        elapsed = 0
+        for game in games:
+            game.map._bitboards.clear()
+            start = time.perf_counter()
+            fn(game)
+            elapsed += time.perf_counter() - start
+        best = min(best, elapsed)
+    return best / len(games)
+
+
+def all_sites(sites):
+    """
+    get_build_loc's calls: every city of the player, once for each of its units
+    """
+    def run(game):
+        for player in game.players:
+            for _ in player.units:
+                for city in player.cities.values():
+                    sites(city, game.map)
+    return run
+
+
+def main():
+    games = [game.clone() for game in replay_games() if game.turn % 10 == 0]
+    check_parity(games)
+    print(f"parity: ok on {len(games)} turns")
+    calls = sum(len(p.units) * len(p.cities) for game in games for p in game.players) / len(games)
+    print(f"{calls:.0f} get_expansion_sites calls per turn on average")
+    legacy = time_per_turn(games, all_sites(legacy_expansion_sites))
+    boards = time_per_turn(games, all_sites(expansion_sites))
+    print(f"expansion sites, neighbour loop: {legacy * 1e6:9.1f} us/turn")
+    print(f"expansion sites, bitboards     : {boards * 1e6:9.1f} us/turn ({legacy / boards:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
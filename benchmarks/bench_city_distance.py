@@ -0,0 +1,60 @@
+"""
+GameMap.city_distance against the per-cell loop over every city tile that the
+bots' get_city_dists used, over the turns of replay.json. Every turn is first
+checked for parity with the loop, for both teams.
+
+    python -m benchmarks.bench_city_distance
+"""
+import math
+import time
+
+from .replay_states import replay_games
+
+
+def get_closest_dist(coord, p):
+    closest_dist = math.inf
+    for k, city in p.cities.items():
+        for city_tile in city.citytiles:
+            dist = abs(coord[0] - city_tile.pos.x) + abs(coord[1] - city_tile.pos.y)
+            if dist < closest_dist:
+                closest_dist = dist
+    return closest_dist
+
+
+def legacy_city_distance(p, m):
+    return {(x, y): get_closest_dist((x, y), p) for x in range(m.width) for y in range(m.height)}
+
+
+def check_parity(games):
+    for game in games:
+        for player in game.players:
+            field = game.map.city_distance(player.team)
+            for (x, y), dist in legacy_city_distance(player, game.map).items():
+                assert field[y, x] == dist, f"city distance mismatch on turn {game.turn} at ({x}, {y})"
+
+
+def time_per_turn(games, fn, repeat=3):
+    best = math.inf
+    for _ in range(repeat):
+        elapsed = 0
+        for game in games:
+            game.map._city_distances.clear()
+            start = time.perf_counter()
+            fn(game)
+            elapsed += time.perf_counter() - start
+        best = min(best, elapsed)
+    return best / len(games)
+
+
+def main():
+    games = [game.clone() for game in replay_games() if game.turn % 10 == 0]
+    check_parity(games)
+    print(f"parity: ok on {len(games)} turns")
+    legacy = time_per_turn(games, lambda game: legacy_city_distance(game.players[0], game.map))
+    transform = time_per_turn(games, lambda game: game.map.city_distance(0))
+    print(f"loop over city tiles: {legacy * 1e6:9.1f} us/turn")
+    print(f"city_distance       : {transform * 1e6:9.1f} us/turn ({legacy / transform:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
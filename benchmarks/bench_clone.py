@@ -0,0 +1,79 @@
+"""
+Game.clone against copy.deepcopy on the last (late-game) turn of replay.json.
+First checks that moving a unit on a clone with move_unit keeps the clone's
+lookups in step and leaves the original untouched.
+
+    python -m benchmarks.bench_clone
+"""
+import copy
+import timeit
+
+import numpy as np
+
+from .replay_states import replay_games
+
+
+def late_game():
+    for game in replay_games():
+        pass
+    return game
+
+
+def per_call(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def branch(game):
+    # a clone that then moves one unit and spends one city's fuel, the way a
+    # search node would
+    clone = game.clone()
+    unit = clone.mutable_unit(game.players[0].units[0].id)
+    unit.cooldown += 2
+    city = clone.mutable_city(next(iter(game.players[0].cities)))
+    city.fuel -= city.light_upkeep
+    return clone
+
+
+def check_move(game):
+    unit = game.players[0].units[0]
+    start = (unit.pos.x, unit.pos.y)
+    target = (start[0] + 1, start[1]) if start[0] + 1 < game.map_width else (start[0] - 1, start[1])
+    before = game.map.unit_count.copy(), game.players[0].unit_table.x.copy(), len(game.unit_ids)
+    clone = game.clone()
+    clone.unit_ids.intern("u_new")
+    moved = clone.move_unit(unit.id, *target)
+    assert moved is not unit and (unit.pos.x, unit.pos.y) == start
+    assert moved in clone.players[0].units_by_pos[target]
+    assert moved not in clone.players[0].units_by_pos.get(start, [])
+    assert clone.players[0].units_by_id[unit.id] is moved
+    table = clone.players[0].unit_table
+    row = table.ids.index(unit.id)
+    assert (table.x[row], table.y[row]) == target
+    for g in (game, clone):
+        counts = np.zeros_like(g.map.unit_count)
+        for player in g.players:
+            for u in player.units:
+                counts[player.team, u.pos.y, u.pos.x] += 1
+        assert (counts == g.map.unit_count).all()
+    assert (game.map.unit_count == before[0]).all()
+    assert (game.players[0].unit_table.x == before[1]).all()
+    assert len(game.unit_ids) == before[2] and "u_new" not in game.unit_ids
+
+
+def main():
+    game = late_game()
+    check_move(game)
+    print("move_unit on a clone: ok")
+    units = sum(len(p.units) for p in game.players)
+    tiles = sum(p.city_tile_count for p in game.players)
+    print(f"turn {game.turn}: {units} units, {tiles} city tiles on a {game.map_width}x{game.map_height} map")
+    deepcopy = per_call(lambda: copy.deepcopy(game), 20)
+    clone = per_call(game.clone, 2000)
+    branched = per_call(lambda: branch(game), 2000)
+    print(f"copy.deepcopy     : {deepcopy * 1e6:9.1f} us")
+    print(f"Game.clone        : {clone * 1e6:9.1f} us ({deepcopy / clone:.0f}x faster)")
+    print(f"clone + 2 mutables: {branched * 1e6:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+GameMap.clusters kept up to date from the turn deltas against labelling the map
+from scratch every turn, over the turns of replay.json. Every turn is first
+checked for parity: both must group the same cells with the same amounts.
+
+    python -m benchmarks.bench_clusters
+"""
+import time
+
+from lux.clusters import ResourceClusters
+from lux.game import Game
+from .replay_states import replay_observations
+
+
+def partition(clusters):
+    """
+    the clusters as plain data, independent of their ids
+    """
+    return sorted((tuple(c.cells), tuple(sorted(c.amounts.items())), tuple(c.perimeter)) for c in clusters.clusters.values())
+
+
+def check_parity(observations):
+    game = Game()
+    game._initialize(observations[0])
+    game._update(observations[0][2:])
+    game.map.clusters
+    for turn, updates in enumerate(observations[1:], 1):
+        game._update(updates)
+        assert partition(game.map.clusters) == partition(ResourceClusters(game.map)), f"cluster mismatch on turn {turn}"
+    return len(game.map.clusters.clusters)
+
+
+def time_relabel(observations, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        game = Game()
+        game._initialize(observations[0])
+        game._update(observations[0][2:])
+        elapsed = 0
+        for updates in observations[1:]:
+            game._update(updates)
+            start = time.perf_counter()
+            ResourceClusters(game.map)
+            elapsed += time.perf_counter() - start
+        best = min(best, elapsed)
+    return best / (len(observations) - 1)
+
+
+def time_incremental(observations, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        game = Game()
+        game._initialize(observations[0])
+        game._update(observations[0][2:])
+        clusters = game.map.clusters
+        # detach the clusters so _update does not maintain them, then apply
+        # each delta by hand to time the update alone
+        game.map._clusters = None
+        elapsed = 0
+        for updates in observations[1:]:
+            game._update(updates)
+            start = time.perf_counter()
+            clusters.update(game.map, game.delta)
+            elapsed += time.perf_counter() - start
+        best = min(best, elapsed)
+    return best / (len(observations) - 1)
+
+
+def main():
+    observations = list(replay_observations())
+    remaining = check_parity(observations)
+    print(f"parity: ok over {len(observations)} turns, {remaining} clusters at the end")
+    print(f"relabel every turn: {time_relabel(observations) * 1e6:8.1f} us/turn")
+    print(f"update from delta : {time_incremental(observations) * 1e6:8.1f} us/turn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+The per-unit rule checks reading game_constants.PARAMETERS against the same
+checks through nested GAME_CONSTANTS lookups, on the units of the last
+(late-game) turn of replay.json. PARAMETERS is first checked against
+GAME_CONSTANTS, and a profile is switched in and out to check GAME_CONSTANTS
+follows it.
+
+    python -m benchmarks.bench_constants
+"""
+import timeit
+
+from lux import game_constants
+from lux.constants import Constants
+from lux.game_constants import GAME_CONSTANTS
+from .replay_states import replay_games
+
+UNIT_TYPES = Constants.UNIT_TYPES
+
+
+def late_game():
+    for game in replay_games():
+        pass
+    return game
+
+
+def legacy_cargo_space_left(unit):
+    spaceused = unit.cargo.wood + unit.cargo.coal + unit.cargo.uranium
+    if unit.type == UNIT_TYPES.WORKER:
+        return GAME_CONSTANTS["PARAMETERS"]["RESOURCE_CAPACITY"]["WORKER"] - spaceused
+    else:
+        return GAME_CONSTANTS["PARAMETERS"]["RESOURCE_CAPACITY"]["CART"] - spaceused
+
+
+def legacy_researched(player):
+    requirements = GAME_CONSTANTS["PARAMETERS"]["RESEARCH_REQUIREMENTS"]
+    return player.research_points >= requirements["COAL"], player.research_points >= requirements["URANIUM"]
+
+
+def check_parity(game):
+    assert game_constants.PARAMETERS.to_json() == GAME_CONSTANTS["PARAMETERS"]
+    game_constants.register_profile("bench", night_length=15, worker_capacity=150)
+    try:
+        game_constants.use_profile("bench")
+        assert GAME_CONSTANTS["PARAMETERS"]["NIGHT_LENGTH"] == 15
+        assert game_constants.PARAMETERS.cycle_length == 45
+        for unit in game.players[0].units:
+            assert unit.get_cargo_space_left() == legacy_cargo_space_left(unit)
+    finally:
+        game_constants.use_profile("default")
+        del game_constants.PROFILES["bench"]
+    for player in game.players:
+        assert (player.researched_coal(), player.researched_uranium()) == legacy_researched(player)
+        for unit in player.units:
+            assert unit.get_cargo_space_left() == legacy_cargo_space_left(unit)
+
+
+def per_call(fn, calls, number=200):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number / calls
+
+
+def main():
+    game = late_game()
+    check_parity(game)
+    print("parity: ok, including a profile switch")
+    units = [u for player in game.players for u in player.units]
+    players = game.players * 50
+    legacy_space = per_call(lambda: [legacy_cargo_space_left(u) for u in units], len(units))
+    space = per_call(lambda: [u.get_cargo_space_left() for u in units], len(units))
+    legacy_research = per_call(lambda: [legacy_researched(p) for p in players], len(players))
+    research = per_call(lambda: [(p.researched_coal(), p.researched_uranium()) for p in players], len(players))
+    print(f"get_cargo_space_left, GAME_CONSTANTS: {legacy_space * 1e9:6.1f} ns/unit")
+    print(f"get_cargo_space_left, PARAMETERS    : {space * 1e9:6.1f} ns/unit")
+    print(f"researched coal + uranium, GAME_CONSTANTS: {legacy_research * 1e9:6.1f} ns/player")
+    print(f"researched coal + uranium, PARAMETERS    : {research * 1e9:6.1f} ns/player")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+GameMap.distance_field over the turns of replay.json. Every field is first
+checked against a plain heapq Dijkstra walked forward from sample cells, then
+the fields a bot would want each turn (nearest resource, nearest own city tile)
+are timed on the 32x32 map.
+
+    python -m benchmarks.bench_distance
+"""
+import heapq
+import math
+import random
+import time
+
+import numpy as np
+
+from lux import distance
+from .replay_states import replay_games
+
+
+def forward_dijkstra(game_map, start, sources, costs, blocked):
+    """
+    travel time from start to the nearest source, stepping one cell at a time
+    """
+    sources = set(sources)
+    best = {start: 0}
+    heap = [(0, start)]
+    while heap:
+        d, (x, y) = heapq.heappop(heap)
+        if (x, y) in sources:
+            return d
+        if d > best[(x, y)]:
+            continue
+        for pos in game_map.neighbors(x, y):
+            if blocked[pos.y, pos.x]:
+                continue
+            reach = d + int(costs[pos.y, pos.x])
+            if reach < best.get((pos.x, pos.y), math.inf):
+                best[(pos.x, pos.y)] = reach
+                heapq.heappush(heap, (reach, (pos.x, pos.y)))
+    return math.inf
+
+
+def turn_sources(game):
+    game_map = game.map
+    ys, xs = np.nonzero(game_map.resource_type >= 0)
+    resources = list(zip(xs.tolist(), ys.tolist()))
+    cities = list(game.players[0].citytiles_by_pos)
+    return [s for s in (resources, cities) if s]
+
+
+def check_parity(games, samples=20):
+    rng = random.Random(0)
+    for game in games:
+        game_map = game.map
+        for team in (0, 1):
+            for sources in turn_sources(game):
+                for unit_type in (0, 1):
+                    field = game_map.distance_field(sources, team, unit_type)
+                    costs = distance.step_costs(game_map, unit_type)
+                    blocked = distance.blocked_cells(game_map, team)
+                    for _ in range(samples):
+                        start = (rng.randrange(game_map.width), rng.randrange(game_map.height))
+                        if blocked[start[1], start[0]]:
+                            continue
+                        expected = forward_dijkstra(game_map, start, sources, costs, blocked)
+                        assert field[start[1], start[0]] == expected, f"distance mismatch on turn {game.turn} from {start}"
+
+
+def main():
+    games = [game.clone() for game in replay_games() if game.turn % 20 == 0]
+    check_parity(games)
+    print(f"parity: ok on {len(games)} turns")
+    best = math.inf
+    fields = 0
+    for _ in range(5):
+        elapsed = 0
+        fields = 0
+        for game in games:
+            sources = turn_sources(game)
+            game.map._distance_fields.clear()
+            start = time.perf_counter()
+            for s in sources:
+                game.map.distance_field(s, 0)
+            elapsed += time.perf_counter() - start
+            fields += len(sources)
+        best = min(best, elapsed)
+    print(f"distance_field, 32x32: {best / fields * 1e6:8.1f} us/field")
+    game = games[-1]
+    sources = turn_sources(game)[0]
+    game.map.distance_field(sources, 0)
+    start = time.perf_counter()
+    for _ in range(1000):
+        game.map.distance_field(sources, 0)
+    print(f"cached lookup        : {(time.perf_counter() - start) / 1000 * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
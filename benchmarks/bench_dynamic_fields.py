@@ -0,0 +1,92 @@
+"""
+GameMap.city_travel_time and resource_travel_time, repaired from turn to turn,
+against computing the same distance fields afresh every turn, over the turns of
+replay.json. Every turn is first checked for parity with a fresh
+distance_field, for both teams' city tiles and each resource type.
+
+    python -m benchmarks.bench_dynamic_fields
+"""
+import time
+
+import numpy as np
+
+from lux import distance
+from lux.constants import Constants
+from lux.game import Game
+from lux.game_map import RESOURCE_TYPE_NAMES
+from .replay_states import replay_observations
+
+UNIT_TYPES = Constants.UNIT_TYPES
+
+
+def games(observations):
+    game = Game()
+    game._initialize(observations[0])
+    game._update(observations[0][2:])
+    yield game
+    for updates in observations[1:]:
+        game._update(updates)
+        yield game
+
+
+def fresh_fields(game_map):
+    """
+    every field afresh, keyed like GameMap._dynamic_fields
+    """
+    fields = {}
+    costs = distance.step_costs(game_map, UNIT_TYPES.WORKER)
+    for team in (0, 1):
+        blocked = distance.blocked_cells(game_map, team)
+        ys, xs = np.nonzero(game_map.citytile_team == team)
+        fields[("citytiles", team)] = distance.distance_field(zip(xs.tolist(), ys.tolist()), costs, blocked)
+        for code, r_type in enumerate(RESOURCE_TYPE_NAMES):
+            ys, xs = np.nonzero((game_map.resource_type == code) & (game_map.resource_amount > 0))
+            fields[("resources", team, r_type)] = distance.distance_field(zip(xs.tolist(), ys.tolist()), costs, blocked)
+    return fields
+
+
+def repaired_fields(game_map):
+    fields = {}
+    for team in (0, 1):
+        fields[("citytiles", team)] = game_map.city_travel_time(team)
+        for r_type in RESOURCE_TYPE_NAMES:
+            fields[("resources", team, r_type)] = game_map.resource_travel_time(team, r_type)
+    return fields
+
+
+def check_parity(observations):
+    for game in games(observations):
+        fresh = fresh_fields(game.map)
+        for key, field in repaired_fields(game.map).items():
+            assert np.array_equal(field, fresh[key]), f"{key} mismatch on turn {game.turn}"
+    dynamic = game.map._dynamic_fields.values()
+    return sum(f.repairs for f in dynamic), sum(f.recomputes for f in dynamic)
+
+
+def time_fields(observations, fields, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        elapsed = 0
+        turns = 0
+        for game in games(observations):
+            start = time.perf_counter()
+            fields(game.map)
+            elapsed += time.perf_counter() - start
+            turns += 1
+        best = min(best, elapsed)
+    return best / turns
+
+
+def main():
+    observations = list(replay_observations())
+    repairs, recomputes = check_parity(observations)
+    print(f"parity: ok over {len(observations)} turns, 8 fields a turn")
+    print(f"updates: {repairs} repaired, {recomputes} computed in full (including the first)")
+    fresh = time_fields(observations, fresh_fields)
+    repaired = time_fields(observations, repaired_fields)
+    print(f"distance_field every turn: {fresh * 1e6:8.1f} us/turn")
+    print(f"repaired from last turn  : {repaired * 1e6:8.1f} us/turn ({fresh / repaired:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+lux.heatmaps against the per-cell get_map_values the bots used, over the turns
+of replay.json. Every tenth turn is first checked for parity for both players,
+and box_sum is checked against convolve with a square kernel; then the old loop
+and a few kernels are timed.
+
+    python -m benchmarks.bench_heatmaps
+"""
+import timeit
+
+import numpy as np
+
+from lux import heatmaps
+from lux.constants import Constants
+from .replay_states import replay_games
+
+
+def get_cell_value(cell, p):
+    if not cell.has_resource():
+        return 0
+    if cell.resource.type == Constants.RESOURCE_TYPES.COAL:
+        if not p.researched_coal():
+            return 0
+        else:
+            return 50
+    if cell.resource.type == Constants.RESOURCE_TYPES.URANIUM:
+        if not p.researched_uranium():
+            return 0
+        else:
+            return 80
+    return 20
+
+
+def legacy_map_values(m, p):
+    d = {}
+    for y in range(m.height):
+        for x in range(m.width):
+            adj = [m.get_cell(pos.x, pos.y) for pos in m.neighbors(x, y)]
+            adj.append(m.get_cell(x, y))
+            d[(x, y)] = sum([get_cell_value(cell, p) for cell in adj])
+    return d
+
+
+def check_parity(games):
+    for game in games:
+        for player in game.players:
+            values = heatmaps.convolve(heatmaps.resource_value(game.map, player), heatmaps.CROSS)
+            for (x, y), value in legacy_map_values(game.map, player).items():
+                assert values[y, x] == value, f"map value mismatch on turn {game.turn} at ({x}, {y})"
+            fuel = heatmaps.fuel_value(game.map, player)
+            for radius in (1, 3, 6):
+                assert np.array_equal(heatmaps.box_sum(fuel, radius), heatmaps.convolve(fuel, heatmaps.square(radius))), \
+                    f"box_sum mismatch on turn {game.turn}, radius {radius}"
+
+
+def per_call(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    games = [game.clone() for game in replay_games() if game.turn % 10 == 0]
+    check_parity(games)
+    print(f"parity: ok on {len(games)} turns")
+    game = games[-1]
+    m, player = game.map, game.players[0]
+    print(f"get_map_values loop         : {per_call(lambda: legacy_map_values(m, player), 5) * 1e6:8.1f} us")
+    print(f"resource_value, cross(1)    : {per_call(lambda: heatmaps.convolve(heatmaps.resource_value(m, player), heatmaps.CROSS), 500) * 1e6:8.1f} us")
+    kernel = heatmaps.cross(3)
+    print(f"collection_rate, cross(3)   : {per_call(lambda: heatmaps.convolve(heatmaps.collection_rate(m, player), kernel), 500) * 1e6:8.1f} us")
+    print(f"fuel_value, box_sum radius 6: {per_call(lambda: heatmaps.box_sum(heatmaps.fuel_value(m, player), 6), 500) * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+GameMap.neighbors against the bounds-checked get_adjacent_cells the bots used,
+and NeighborTable.gather against summing shifted slices. Every board size is
+first checked for parity with the old helper.
+
+    python -m benchmarks.bench_neighbors
+"""
+import timeit
+
+import numpy as np
+
+from lux.game_map import GameMap
+
+SIZES = (12, 16, 24, 32)
+
+
+def legacy_adjacent(x, y, m):
+    adj = []
+    if x > 0:
+        adj.append(m.get_cell(x - 1, y))
+    if x < (m.width - 1):
+        adj.append(m.get_cell(x + 1, y))
+    if y > 0:
+        adj.append(m.get_cell(x, y - 1))
+    if y < (m.height - 1):
+        adj.append(m.get_cell(x, y + 1))
+    return adj
+
+
+def check_parity(m):
+    for y in range(m.height):
+        for x in range(m.width):
+            expected = [cell.pos for cell in legacy_adjacent(x, y, m)]
+            assert list(m.neighbors(x, y)) == expected, f"neighbour mismatch at ({x}, {y})"
+    plane = np.arange(m.width * m.height).reshape(m.height, m.width)
+    gathered = m.neighbor_table.gather(plane).sum(axis=2)
+    shifted = np.zeros_like(plane)
+    shifted[1:, :] += plane[:-1, :]
+    shifted[:-1, :] += plane[1:, :]
+    shifted[:, 1:] += plane[:, :-1]
+    shifted[:, :-1] += plane[:, 1:]
+    assert (gathered == shifted).all(), "gather mismatch"
+
+
+def per_call(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    for size in SIZES:
+        check_parity(GameMap(size, size))
+    print(f"parity: ok on {', '.join(f'{s}x{s}' for s in SIZES)}")
+    m = GameMap(32, 32)
+    cells = [(x, y) for y in range(m.height) for x in range(m.width)]
+
+    def legacy():
+        for x, y in cells:
+            legacy_adjacent(x, y, m)
+
+    def table():
+        for x, y in cells:
+            m.neighbors(x, y)
+
+    plane = m.resource_amount
+    print(f"get_adjacent_cells, whole map: {per_call(legacy, 50) * 1e6:8.1f} us")
+    print(f"GameMap.neighbors, whole map : {per_call(table, 50) * 1e6:8.1f} us")
+    print(f"NeighborTable.gather         : {per_call(lambda: m.neighbor_table.gather(plane), 2000) * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
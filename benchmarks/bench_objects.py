@@ -0,0 +1,118 @@
+"""
+Memory and attribute access of the lux game objects, which use __slots__,
+against the same classes with a per-instance __dict__, on the last (late-game)
+turn of replay.json. tracemalloc measures the bytes allocated building a
+turn's objects the way a bot sees them: every unit with its cargo, every city
+and city tile, and a Cell view with its Resource for every cell of the map.
+
+    python -m benchmarks.bench_objects
+"""
+import timeit
+import tracemalloc
+
+from lux import game_map, game_objects
+from .replay_states import replay_games
+
+SLOTTED = {
+    "Unit": game_objects.Unit,
+    "Cargo": game_objects.Cargo,
+    "City": game_objects.City,
+    "CityTile": game_objects.CityTile,
+    "Player": game_objects.Player,
+    "Cell": game_map.Cell,
+    "Resource": game_map.Resource,
+}
+
+
+def unslotted(cls):
+    """
+    cls with the same methods and properties but a __dict__ in place of its slots
+    """
+    body = {name: value for name, value in vars(cls).items() if name not in cls.__slots__ + ("__slots__",)}
+    return type(cls.__name__, cls.__bases__, body)
+
+
+def late_game():
+    for game in replay_games():
+        pass
+    return game
+
+
+def build_turn(game, classes):
+    """
+    the objects of one turn, built from game with the given classes; the
+    classes are swapped into the lux modules so methods that build other
+    objects build these too
+    """
+    for module in (game_objects, game_map):
+        for name, cls in classes.items():
+            if hasattr(module, name):
+                setattr(module, name, cls)
+    m = game.map
+    built = []
+    for player in game.players:
+        clone = classes["Player"](player.team)
+        clone.research_points = player.research_points
+        clone.unit_table = player.unit_table
+        clone.units
+        for cityid, city in player.cities.items():
+            copy = classes["City"](city.team, cityid, city.fuel, city.light_upkeep)
+            for ct in city.citytiles:
+                copy._add_city_tile(ct.pos.x, ct.pos.y, ct.cooldown)
+            clone.cities[cityid] = copy
+        built.append(clone)
+    cells = [classes["Cell"](x, y, m) for y in range(m.height) for x in range(m.width)]
+    built.append(cells)
+    built.append([cell.resource for cell in cells])
+    return built
+
+
+def allocated(game, classes, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        tracemalloc.start()
+        built = build_turn(game, classes)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        best = min(best, size)
+        del built
+    return best
+
+
+def per_access(fn, accesses, number=50):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number / accesses
+
+
+def access_times(game, classes):
+    built = build_turn(game, classes)
+    units = [u for player in built[:2] for u in player.units]
+    tiles = [ct for player in built[:2] for city in player.cities.values() for ct in city.citytiles]
+    cells = built[2]
+    return (
+        per_access(lambda: [(u.pos, u.cooldown, u.cargo.wood, u.type) for u in units], 4 * len(units)),
+        per_access(lambda: [(ct.pos, ct.cooldown, ct.team) for ct in tiles], 3 * len(tiles)),
+        per_access(lambda: [(c.pos, c.citytile, c.road) for c in cells], 3 * len(cells)),
+    )
+
+
+def main():
+    game = late_game()
+    plain = {name: unslotted(cls) for name, cls in SLOTTED.items()}
+    try:
+        units = sum(len(p.units) for p in game.players)
+        tiles = sum(p.city_tile_count for p in game.players)
+        print(f"turn {game.turn}: {units} units, {tiles} city tiles, {game.map.width * game.map.height} cells")
+        dict_bytes = allocated(game, plain)
+        slot_bytes = allocated(game, SLOTTED)
+        print(f"allocated per turn, __dict__ : {dict_bytes / 1024:8.1f} KiB")
+        print(f"allocated per turn, __slots__: {slot_bytes / 1024:8.1f} KiB ({1 - slot_bytes / dict_bytes:.0%} less)")
+        for label, classes in (("__dict__ ", plain), ("__slots__", SLOTTED)):
+            unit, tile, cell = access_times(game, classes)
+            print(f"attribute access, {label}: unit {unit * 1e9:5.1f} ns, city tile {tile * 1e9:5.1f} ns, "
+                  f"cell {cell * 1e9:5.1f} ns")
+    finally:
+        build_turn(game, SLOTTED)
+
+
+if __name__ == "__main__":
+    main()
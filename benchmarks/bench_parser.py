@@ -0,0 +1,57 @@
+"""
+The table-driven Game._update parser against the original if/elif parser, over
+the turns of replay.json. Every turn is first checked for parity: both parsers
+must produce the same players, cities, city tiles, units and map cells.
+
+    python -m benchmarks.bench_parser
+"""
+import time
+
+from lux.game import Game
+from tests.legacy_parser import LegacyGame, summarize
+from .replay_states import replay_observations
+
+
+def new_game(game_cls, observations):
+    game = game_cls()
+    game._initialize(observations[0])
+    return game
+
+
+def check_parity(observations):
+    legacy = new_game(LegacyGame, observations)
+    game = new_game(Game, observations)
+    joined = new_game(Game, observations)
+    for turn, updates in enumerate(observations):
+        if turn == 0:
+            updates = updates[2:]
+        legacy._update(updates)
+        game._update(updates)
+        joined._update("\n".join(updates))
+        expected = summarize(legacy)
+        assert summarize(game) == expected, f"parser mismatch on turn {turn}"
+        assert summarize(joined) == expected, f"joined buffer mismatch on turn {turn}"
+
+
+def time_parser(game_cls, observations, repeat=9):
+    best = float("inf")
+    for _ in range(repeat):
+        game = new_game(game_cls, observations)
+        start = time.perf_counter()
+        game._update(observations[0][2:])
+        for updates in observations[1:]:
+            game._update(updates)
+        best = min(best, time.perf_counter() - start)
+    return best / len(observations)
+
+
+def main():
+    observations = list(replay_observations())
+    check_parity(observations)
+    print(f"parity: ok over {len(observations)} turns")
+    print(f"if/elif parser     : {time_parser(LegacyGame, observations) * 1e6:8.1f} us/turn")
+    print(f"table-driven parser: {time_parser(Game, observations) * 1e6:8.1f} us/turn")
+
+
+if __name__ == "__main__":
+    main()
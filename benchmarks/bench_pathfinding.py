@@ -0,0 +1,190 @@
+"""
+Pathfinder against the greedy take_step loop the bots used, on late-game turns
+of replay.json and on the last of them with team 0's units replaced by 150
+workers spread over the board. Every unit of team 0 is sent to a seeded random
+cell up to 12 steps away. Reported per turn: planning time, passes over the
+units, moves made, moves that bring a unit closer to its target by travel time,
+and moves that collide: that end on the same cell as another unit outside a
+friendly city. The planners are also checked against BUDGET_MS, the time a
+bot can spend moving its units in a turn.
+
+    python -m benchmarks.bench_pathfinding
+"""
+import random
+import time
+from collections import Counter
+
+from lux.constants import Constants
+from lux.game_objects import Unit
+from lux.pathfinding import Pathfinder
+from .replay_states import replay_games
+
+DIRECTIONS = Constants.DIRECTIONS
+
+# planning time per turn a bot can afford, well inside the engine's limit
+BUDGET_MS = 25
+
+
+def legacy_take_step(u, target, m, allow_city, opp_locs, my_cities, unit_locations):
+    """
+    take_step as the bots had it, with UNIT_LOCATIONS passed in
+    """
+    target = m.get_cell(target[0], target[1])
+    if u.pos == target.pos:
+        return None
+    occ_loc = {coord for coord in unit_locations.values() if m.get_cell(coord[0], coord[1]).citytile is None}
+    occ_loc.update(opp_locs)
+    if not allow_city:
+        occ_loc.update(my_cities)
+    if u.pos.y > target.pos.y:
+        if (u.pos.x, u.pos.y - 1) not in occ_loc:
+            unit_locations[u.id] = (u.pos.x, u.pos.y - 1)
+            return DIRECTIONS.NORTH
+    elif u.pos.y < target.pos.y:
+        if (u.pos.x, u.pos.y + 1) not in occ_loc:
+            unit_locations[u.id] = (u.pos.x, u.pos.y + 1)
+            return DIRECTIONS.SOUTH
+    if u.pos.x > target.pos.x:
+        if (u.pos.x - 1, u.pos.y) not in occ_loc:
+            unit_locations[u.id] = (u.pos.x - 1, u.pos.y)
+            return DIRECTIONS.WEST
+    if u.pos.x < target.pos.x:
+        if (u.pos.x + 1, u.pos.y) not in occ_loc:
+            unit_locations[u.id] = (u.pos.x + 1, u.pos.y)
+            return DIRECTIONS.EAST
+    return None
+
+
+def legacy_plan(game, targets):
+    player, opponent = game.players
+    opp_cities = list(opponent.citytiles_by_pos)
+    my_cities = list(player.citytiles_by_pos)
+    unit_locations = {u.id: (u.pos.x, u.pos.y) for u in player.units}
+    starting_locs = dict(unit_locations)
+    moves = {}
+    passes = 0
+    moves_happened = True
+    while moves_happened:
+        moves_happened = False
+        passes += 1
+        for unit in player.units:
+            if unit.can_act() and starting_locs[unit.id] == unit_locations[unit.id]:
+                direction = legacy_take_step(unit, targets[unit.id], game.map, True, opp_cities, my_cities, unit_locations)
+                if direction is not None:
+                    moves[unit.id] = direction
+                    moves_happened = True
+    return moves, passes
+
+
+def plan(game, targets, exact=False):
+    player, opponent = game.players
+    pathfinder = Pathfinder(game.map, player.team, exact=exact)
+    for unit in opponent.units:
+        pathfinder.block(unit.pos.x, unit.pos.y)
+    for unit in player.units:
+        pathfinder.hold(unit)
+    moves = {}
+    for unit in player.units:
+        if unit.can_act():
+            direction = pathfinder.plan(unit, targets[unit.id])
+            if direction != DIRECTIONS.CENTER:
+                moves[unit.id] = direction
+    return moves, 1
+
+
+def score(game, targets, moves):
+    """
+    the number of moves that make progress and the number that collide
+    """
+    player, opponent = game.players
+    m = game.map
+    ends = Counter((u.pos.x, u.pos.y) for u in opponent.units)
+    for unit in player.units:
+        pos = unit.pos.translate(moves.get(unit.id, DIRECTIONS.CENTER), 1)
+        if m.citytile_team[pos.y, pos.x] != player.team:
+            ends[(pos.x, pos.y)] += 1
+    progress = collisions = 0
+    for unit in player.units:
+        if unit.id in moves:
+            pos = unit.pos.translate(moves[unit.id], 1)
+            collisions += ends[(pos.x, pos.y)] > 1
+            field = m.distance_field([targets[unit.id]], player.team, unit.type)
+            if field[pos.y, pos.x] < field[unit.pos.y, unit.pos.x]:
+                progress += 1
+    return progress, collisions
+
+
+def random_targets(game, rng):
+    targets = {}
+    for unit in game.players[0].units:
+        while True:
+            x = unit.pos.x + rng.randint(-12, 12)
+            y = unit.pos.y + rng.randint(-12, 12)
+            if 0 <= x < game.map_width and 0 <= y < game.map_height and game.map.citytile_team[y, x] != 1:
+                break
+        targets[unit.id] = (x, y)
+    return targets
+
+
+def crowd(game, rng, count=150):
+    """
+    game with team 0's units replaced by count workers on distinct cells off
+    the opponent's cities
+    """
+    game = game.clone()
+    cells = [
+        (x, y) for y in range(game.map_height) for x in range(game.map_width)
+        if game.map.citytile_team[y, x] != 1
+    ]
+    rng.shuffle(cells)
+    game.players[0].units = [Unit(0, 0, f"u_crowd{i}", x, y, 0, 0, 0, 0) for i, (x, y) in enumerate(cells[:count])]
+    return game
+
+
+def report(label, planner, scenarios, repeat=3):
+    elapsed = float("inf")
+    for _ in range(repeat):
+        for game, _ in scenarios:
+            game.map._distance_fields.clear()
+        start = time.perf_counter()
+        results = [planner(game, targets) for game, targets in scenarios]
+        elapsed = min(elapsed, time.perf_counter() - start)
+    passes = made = progress = collisions = 0
+    for (game, targets), (moves, loops) in zip(scenarios, results):
+        passes += loops
+        made += len(moves)
+        closer, collided = score(game, targets, moves)
+        progress += closer
+        collisions += collided
+    turns = len(scenarios)
+    ms = elapsed / turns * 1e3
+    verdict = "within budget" if ms <= BUDGET_MS else "over budget"
+    print(
+        f"  {label}: {ms:6.2f} ms/turn ({verdict}), {passes / turns:4.1f} passes, "
+        f"{made / turns:5.1f} moves, {progress / turns:5.1f} closer to target, {collisions / turns:4.1f} collisions"
+    )
+
+
+def main():
+    rng = random.Random(0)
+    games = [game.clone() for game in replay_games() if game.turn >= 240 and game.turn % 10 == 0]
+    scenarios = [(game, random_targets(game, rng)) for game in games]
+    crowded = crowd(games[-1], rng)
+    crowded_scenarios = [(crowded, random_targets(crowded, rng))]
+    planners = (
+        ("take_step loop        ", legacy_plan),
+        ("Pathfinder            ", plan),
+        ("Pathfinder, exact=True", lambda game, targets: plan(game, targets, exact=True)),
+    )
+    units = sum(len(game.players[0].units) for game in games)
+    for title, cases in (
+        (f"{len(scenarios)} late-game turns, {units / len(scenarios):.0f} units of team 0 per turn", scenarios),
+        (f"turn {crowded.turn} with {len(crowded.players[0].units)} units of team 0", crowded_scenarios),
+    ):
+        print(title)
+        for label, planner in planners:
+            report(label, planner, cases)
+
+
+if __name__ == "__main__":
+    main()
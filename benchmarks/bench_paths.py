@@ -0,0 +1,109 @@
+"""
+GameMap.paths against finding every path afresh, over the turns of replay.json.
+Every turn, each unit asks for its way to the nearest city tile of its team,
+as a unit heading home would. Every path the cache returns is first checked to
+be walkable on the current map and to take as long as a fresh shortest path.
+
+    python -m benchmarks.bench_paths
+"""
+import time
+
+from lux import distance
+from lux.game import Game
+from lux.paths import shortest_path
+from .replay_states import replay_observations
+
+
+def queries(game):
+    """
+    (start, goal, team) for every unit, goal its team's nearest city tile
+    """
+    found = []
+    for player in game.players:
+        homes = game.map.citytile_points(player.team)
+        for unit in player.units:
+            nearest = homes.nearest(unit.pos.x, unit.pos.y)
+            if nearest:
+                home = nearest[0][1]
+                found.append(((unit.pos.x, unit.pos.y), (home.x, home.y), player.team))
+    return found
+
+
+def travel_time(game_map, path, team):
+    """
+    turns to walk path, or None if it steps off the board or onto a blocked cell
+    """
+    cost = distance.step_costs(game_map)
+    blocked = distance.blocked_cells(game_map, team)
+    total = 0
+    for (x, y), (nx, ny) in zip(path, path[1:]):
+        if abs(nx - x) + abs(ny - y) != 1 or blocked[ny, nx]:
+            return None
+        total += int(cost[ny, nx])
+    return total
+
+
+def games(observations):
+    game = Game()
+    game._initialize(observations[0])
+    game._update(observations[0][2:])
+    yield game
+    for updates in observations[1:]:
+        game._update(updates)
+        yield game
+
+
+def check_parity(observations):
+    checked = 0
+    for game in games(observations):
+        for start, goal, team in queries(game):
+            path = game.map.paths.path(start, goal, team)
+            fresh = shortest_path(game.map, start, goal, team)
+            if fresh is None:
+                assert path is None, f"unreachable path returned on turn {game.turn}"
+                continue
+            assert path[0] == start and path[-1] == goal
+            cached_time = travel_time(game.map, path, team)
+            assert cached_time is not None, f"blocked path returned on turn {game.turn}"
+            width = game.map.width
+            best = travel_time(game.map, [(i % width, i // width) for i in fresh], team)
+            assert cached_time == best, f"slower path returned on turn {game.turn}"
+            checked += 1
+    return checked, game.map.paths
+
+
+def time_paths(observations, cached, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        elapsed = 0
+        turns = 0
+        for game in games(observations):
+            work = queries(game)
+            start = time.perf_counter()
+            if cached:
+                paths = game.map.paths
+                for source, goal, team in work:
+                    paths.path(source, goal, team)
+            else:
+                for source, goal, team in work:
+                    shortest_path(game.map, source, goal, team)
+            elapsed += time.perf_counter() - start
+            turns += 1
+        best = min(best, elapsed)
+    return best / turns
+
+
+def main():
+    observations = list(replay_observations())
+    checked, paths = check_parity(observations)
+    print(f"parity: ok on {checked} paths")
+    print(f"cache: {paths.hits} hits, {paths.misses} misses, {paths.invalidated} invalidated, "
+          f"{paths.evicted} evicted, {len(paths)} kept")
+    fresh = time_paths(observations, cached=False)
+    cached = time_paths(observations, cached=True)
+    print(f"shortest_path every query: {fresh * 1e6:8.1f} us/turn")
+    print(f"GameMap.paths            : {cached * 1e6:8.1f} us/turn ({fresh / cached:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+The hashable, pooled Position against the original class for direction_to and
+for the "is this unit on one of these cells" membership tests the bots do.
+
+    python -m benchmarks.bench_position
+"""
+import random
+import timeit
+
+from lux.constants import Constants
+from lux.game_map import Position, position, _extend_position_pool
+
+DIRECTIONS = Constants.DIRECTIONS
+
+
+class LegacyPosition:
+    """
+    Position as it was before it became immutable and hashable
+    """
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def __sub__(self, pos) -> int:
+        return abs(pos.x - self.x) + abs(pos.y - self.y)
+
+    def distance_to(self, pos):
+        return self - pos
+
+    def __eq__(self, pos) -> bool:
+        return self.x == pos.x and self.y == pos.y
+
+    def translate(self, direction, units) -> 'LegacyPosition':
+        if direction == DIRECTIONS.NORTH:
+            return LegacyPosition(self.x, self.y - units)
+        elif direction == DIRECTIONS.EAST:
+            return LegacyPosition(self.x + units, self.y)
+        elif direction == DIRECTIONS.SOUTH:
+            return LegacyPosition(self.x, self.y + units)
+        elif direction == DIRECTIONS.WEST:
+            return LegacyPosition(self.x - units, self.y)
+        elif direction == DIRECTIONS.CENTER:
+            return LegacyPosition(self.x, self.y)
+
+    def direction_to(self, target_pos):
+        check_dirs = [
+            DIRECTIONS.NORTH,
+            DIRECTIONS.EAST,
+            DIRECTIONS.SOUTH,
+            DIRECTIONS.WEST,
+        ]
+        closest_dist = self.distance_to(target_pos)
+        closest_dir = DIRECTIONS.CENTER
+        for direction in check_dirs:
+            newpos = self.translate(direction, 1)
+            dist = target_pos.distance_to(newpos)
+            if dist < closest_dist:
+                closest_dir = direction
+                closest_dist = dist
+        return closest_dir
+
+
+def per_call(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    _extend_position_pool(32, 32)
+    rng = random.Random(0)
+    coords = [(rng.randrange(32), rng.randrange(32)) for _ in range(200)]
+    pairs = list(zip(coords, coords[1:]))
+
+    legacy_pairs = [(LegacyPosition(*a), LegacyPosition(*b)) for a, b in pairs]
+    pooled_pairs = [(position(*a), position(*b)) for a, b in pairs]
+    for (a, b), (c, d) in zip(legacy_pairs, pooled_pairs):
+        assert a.direction_to(b) == c.direction_to(d)
+    legacy = per_call(lambda: [a.direction_to(b) for a, b in legacy_pairs], 200) / len(pairs)
+    pooled = per_call(lambda: [a.direction_to(b) for a, b in pooled_pairs], 200) / len(pairs)
+    print(f"direction_to  legacy: {legacy * 1e9:7.0f} ns   pooled: {pooled * 1e9:7.0f} ns")
+
+    # 40 expansion sites, one unit position looked up against them
+    sites = coords[:40]
+    legacy_sites = [LegacyPosition(*c) for c in sites]
+    pooled_sites = {position(*c) for c in sites}
+    legacy_unit = LegacyPosition(*coords[-1])
+    pooled_unit = position(*coords[-1])
+    legacy = per_call(lambda: legacy_unit in [p for p in legacy_sites], 20000)
+    pooled = per_call(lambda: pooled_unit in pooled_sites, 20000)
+    print(f"membership    list scan: {legacy * 1e9:7.0f} ns   set lookup: {pooled * 1e9:7.0f} ns")
+
+    legacy = per_call(lambda: [LegacyPosition(x, y).translate(DIRECTIONS.EAST, 1) for x, y in coords], 500) / len(coords)
+    pooled = per_call(lambda: [position(x, y).translate(DIRECTIONS.EAST, 1) for x, y in coords], 500) / len(coords)
+    print(f"translate     legacy: {legacy * 1e9:7.0f} ns   pooled: {pooled * 1e9:7.0f} ns")
+    assert position(3, 4) is position(3, 4).translate(DIRECTIONS.CENTER, 0)
+    assert hash(Position(3, 4)) == hash(position(3, 4))
+
+
+if __name__ == "__main__":
+    main()
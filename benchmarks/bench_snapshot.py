@@ -0,0 +1,47 @@
+"""
+Binary snapshots (Game.to_bytes / Game.from_bytes) against pickle for every
+turn of replay.json: size, save and load time, and the time to scan all of the
+snapshots for a statistic without rebuilding any Game.
+
+    python -m benchmarks.bench_snapshot
+"""
+import pickle
+import time
+
+from lux.game import Game
+from lux.snapshot import iter_snapshots
+from tests.legacy_parser import summarize
+from .replay_states import replay_games
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    snapshots = []
+    pickles = []
+    for game in replay_games():
+        snapshots.append(game.to_bytes())
+        pickles.append(pickle.dumps(game))
+        restored = Game.from_bytes(snapshots[-1])
+        assert summarize(restored) == summarize(game), f"snapshot mismatch on turn {game.turn}"
+    print(f"round trip: ok over {len(snapshots)} turns")
+
+    turns = len(snapshots)
+    games, load_snapshot = timed(lambda: [Game.from_bytes(s) for s in snapshots])
+    _, load_pickle = timed(lambda: [pickle.loads(p) for p in pickles])
+    _, save_snapshot = timed(lambda: [g.to_bytes() for g in games])
+    _, save_pickle = timed(lambda: [pickle.dumps(g) for g in games])
+    print(f"snapshot: {sum(map(len, snapshots)) / turns:8.0f} bytes/turn, save {save_snapshot / turns * 1e6:7.1f} us, load {load_snapshot / turns * 1e6:7.1f} us")
+    print(f"pickle  : {sum(map(len, pickles)) / turns:8.0f} bytes/turn, save {save_pickle / turns * 1e6:7.1f} us, load {load_pickle / turns * 1e6:7.1f} us")
+
+    buffer = b"".join(snapshots)
+    cargo, scan = timed(lambda: [int(s.units["wood"].sum()) for s in iter_snapshots(buffer)])
+    print(f"scan of {len(cargo)} snapshots for total wood carried: {scan * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+PointIndex queries against linear scans over the same points, on the point sets
+GameMap indexes (city tiles, resources, buildable cells) over the turns of
+replay.json. Every query is first checked against a brute-force answer,
+including the order of equally near points; then nearest and within are timed
+against scans of the same points, from every unit of a late-game turn.
+
+    python -m benchmarks.bench_spatial
+"""
+import random
+import timeit
+
+from lux.constants import Constants
+from .replay_states import replay_games
+
+RESOURCE_TYPES = Constants.RESOURCE_TYPES
+
+
+def layers(game):
+    m = game.map
+    return [
+        m.citytile_points(0),
+        m.citytile_points(1),
+        m.resource_points(),
+        m.resource_points(RESOURCE_TYPES.WOOD),
+        m.buildable_points(),
+    ]
+
+
+def brute_force(index, x, y):
+    """
+    every point of index as (distance, item), nearest first, then in the order added
+    """
+    points = sorted((point for block in index._blocks for point in block), key=lambda point: point[0])
+    return sorted(((abs(px - x) + abs(py - y), item) for _, px, py, item in points), key=lambda found: found[0])
+
+
+def check_parity(games, queries=10):
+    rng = random.Random(0)
+    for game in games:
+        for index in layers(game):
+            for _ in range(queries):
+                x, y = rng.randrange(game.map_width), rng.randrange(game.map_height)
+                expected = brute_force(index, x, y)
+                for k in (1, 3, 8):
+                    assert index.nearest(x, y, k) == expected[:k], f"nearest mismatch on turn {game.turn}"
+                radius = rng.randrange(12)
+                within = [found for found in expected if found[0] <= radius]
+                assert index.within(x, y, radius) == within, f"within mismatch on turn {game.turn}"
+
+
+def per_call(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def scan_nearest(points, x, y):
+    return min(((abs(px - x) + abs(py - y), order, item) for order, px, py, item in points), default=None)
+
+
+def scan_within(points, x, y, radius):
+    found = [(abs(px - x) + abs(py - y), order, item) for order, px, py, item in points]
+    return sorted(found for found in found if found[0] <= radius)
+
+
+def main():
+    games = [game.clone() for game in replay_games() if game.turn % 10 == 0]
+    check_parity(games)
+    print(f"parity: ok on {len(games)} turns")
+    game = games[-1]
+    m = game.map
+    queries = [(u.pos.x, u.pos.y) for player in game.players for u in player.units]
+    print(f"turn {game.turn}, {len(queries)} queries (one per unit) per run")
+    print(f"{'points':<18}{'size':>6}{'scan nearest':>14}{'index nearest':>15}{'scan within 5':>15}{'index within 5':>16}")
+    for name, index in (
+        ("city tiles", m.citytile_points(0)),
+        ("resources", m.resource_points()),
+        ("buildable cells", m.buildable_points()),
+    ):
+        points = sorted((point for block in index._blocks for point in block), key=lambda point: point[0])
+        timings = [
+            per_call(lambda: [scan_nearest(points, x, y) for x, y in queries], 20),
+            per_call(lambda: [index.nearest(x, y) for x, y in queries], 20),
+            per_call(lambda: [scan_within(points, x, y, 5) for x, y in queries], 20),
+            per_call(lambda: [index.within(x, y, 5) for x, y in queries], 20),
+        ]
+        print(f"{name:<18}{len(index):>6}" + "".join(f"{t * 1e6:>12.0f} us" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
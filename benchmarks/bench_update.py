@@ -0,0 +1,76 @@
+"""
+Game._update against the original kit's (benchmarks.baseline), which built a
+new GameMap of Cell objects every turn, over the turns of replay.json. Timed
+for the update alone and for the update followed by a row-major walk of the
+cells reading what a bot reads from them (resource, city tile, road), since the
+current map no longer builds its Cells every turn.
+
+    python -m benchmarks.bench_update
+"""
+import time
+import tracemalloc
+
+from lux.game import Game
+from . import baseline
+from .replay_states import replay_observations
+
+
+def play(game_cls, observations, walk):
+    game = game_cls()
+    game._initialize(observations[0])
+    game._update(observations[0][2:])
+    for updates in observations[1:]:
+        yield game
+        game._update(updates)
+        if walk:
+            walk_cells(game)
+
+
+def walk_cells(game):
+    for row in game.map.map:
+        for cell in row:
+            if cell.has_resource():
+                cell.resource.amount
+            cell.citytile
+            cell.road
+
+
+def time_updates(game_cls, observations, walk, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in play(game_cls, observations, walk):
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best / (len(observations) - 1)
+
+
+def allocations_per_turn(game_cls, observations, walk):
+    tracemalloc.start()
+    total = 0
+    turns = play(game_cls, observations, walk)
+    next(turns)
+    while True:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            next(turns)
+        except StopIteration:
+            break
+        total += max(tracemalloc.get_traced_memory()[1] - before, 0)
+    tracemalloc.stop()
+    return total / (len(observations) - 1)
+
+
+def main():
+    observations = list(replay_observations())
+    for walk in (False, True):
+        print("update and cell walk" if walk else "update only")
+        for label, game_cls in (("original kit", baseline.Game), ("Game        ", Game)):
+            seconds = time_updates(game_cls, observations, walk)
+            peak = allocations_per_turn(game_cls, observations, walk)
+            print(f"  {label}: {seconds * 1e6:8.1f} us/turn, {peak / 1024:8.1f} KiB peak allocation/turn")
+
+
+if __name__ == "__main__":
+    main()
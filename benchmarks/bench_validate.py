@@ -0,0 +1,108 @@
+"""
+validate.resolve against a straightforward resolution of the same moves that
+re-checks every unit against every other until nothing changes, on every turn
+of replay.json with the commands each team sent that turn. Reports how many of
+the replay's commands resolve would have flagged, and times both on the busiest
+turn.
+
+    python -m benchmarks.bench_validate
+"""
+import timeit
+from collections import Counter
+
+from lux import validate
+from lux.actions import MOVE, decode
+from .replay_states import load_replay, replay_games
+
+
+def turn_commands(commands, team):
+    return [cmd["command"] for cmd in commands if cmd["agentID"] == team]
+
+
+def naive_positions(game, team, commands):
+    """
+    unit id -> end position of the team's units, moving every unit given a
+    valid move and then cancelling moves until no unit shares a cell outside a
+    city or swaps with another
+    """
+    game_map = game.map
+    units = game.players[team].units_by_id
+    targets, seen = {}, set()
+    for command in commands:
+        action = decode(command)
+        if action[0] != MOVE or action[1] in seen:
+            seen.add(action[1])
+            continue
+        seen.add(action[1])
+        unit = units.get(action[1])
+        if unit is None or not unit.can_act() or action[2] not in validate.STEPS:
+            continue
+        dx, dy = validate.STEPS[action[2]]
+        x, y = unit.pos.x + dx, unit.pos.y + dy
+        if (dx, dy) == (0, 0) or not (0 <= x < game_map.width and 0 <= y < game_map.height):
+            continue
+        owner = game_map.citytile_team[y, x]
+        if owner >= 0 and owner != team:
+            continue
+        targets[unit.id] = (x, y)
+
+    def in_city(cell):
+        return game_map.citytile_team[cell[1], cell[0]] >= 0
+
+    everyone = [u for player in game.players for u in player.units]
+    start = {u.id: (u.pos.x, u.pos.y) for u in everyone}
+    changed = True
+    while changed:
+        changed = False
+        end = {unitid: targets.get(unitid, cell) for unitid, cell in start.items()}
+        for unitid, target in list(targets.items()):
+            if in_city(target) and in_city(start[unitid]):
+                continue
+            shared = not in_city(target) and any(
+                cell == target for other, cell in end.items() if other != unitid
+            )
+            swapped = any(
+                start[other] == target and other_target == start[unitid]
+                for other, other_target in targets.items() if other != unitid
+            )
+            if shared or swapped:
+                del targets[unitid]
+                changed = True
+    return {unitid: targets.get(unitid, start[unitid]) for unitid in units}
+
+
+def main():
+    commands = load_replay()["allCommands"]
+    reasons = Counter()
+    total = 0
+    busiest = None
+    for turn, game in enumerate(replay_games()):
+        if turn >= len(commands):
+            break
+        for team in (0, 1):
+            sent = turn_commands(commands[turn], team)
+            result = validate.resolve(game, sent, team)
+            assert result.positions == naive_positions(game, team, sent), turn
+            assert len(result.accepted) + result.wasted == len(sent)
+            total += len(sent)
+            reasons.update(reason for _, reason in result.rejected)
+        sent = turn_commands(commands[turn], 0)
+        if busiest is None or len(sent) > busiest[0]:
+            busiest = (len(sent), turn, game.clone(), sent)
+    print("parity: ok")
+    print(f"{sum(reasons.values())} of {total} commands rejected")
+    for reason, count in reasons.most_common():
+        print(f"  {count:5d} {reason}")
+
+    _, turn, game, sent = busiest
+    units = len(game.players[0].units)
+    number = 50
+    fast = min(timeit.repeat(lambda: validate.resolve(game, sent, 0), number=number, repeat=5)) / number
+    naive = min(timeit.repeat(lambda: naive_positions(game, 0, sent), number=number, repeat=5)) / number
+    print(f"turn {turn}: {len(sent)} commands, {units} units")
+    print(f"naive  : {naive * 1e3:7.3f} ms/turn")
+    print(f"resolve: {fast * 1e3:7.3f} ms/turn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Rebuild per-turn observations from a replay file.
+
+Replays only store the commands each agent sent, so this plays them forward on a
+simplified copy of the rules (moves, city building, unit spawns, research,
+gathering and wood regrowth) over a resource layout generated from the replay
+seed. The states are not bit-exact with the real match, but they have the same
+shape: the same unit ids, the same number of units, cities and city tiles per
+turn, which is what the benchmarks care about.
+"""
+import json
+import math
+import random
+from os import path
+
+REPLAY_PATH = path.abspath(path.join(path.dirname(__file__), "..", "replay.json"))
+
+MOVES = {"n": (0, -1), "e": (1, 0), "s": (0, 1), "w": (-1, 0), "c": (0, 0)}
+COLLECTION_RATE = {"wood": 20, "coal": 5, "uranium": 2}
+FUEL_RATE = {"wood": 1, "coal": 10, "uranium": 40}
+RESEARCH_REQUIREMENT = {"wood": 0, "coal": 50, "uranium": 200}
+
+
+class _Unit:
+    def __init__(self, team, unitid, x, y):
+        self.team = team
+        self.id = unitid
+        self.x = x
+        self.y = y
+        self.cooldown = 0
+        self.cargo = {"wood": 0, "coal": 0, "uranium": 0}
+
+
+class ReplayState:
+    def __init__(self, replay, width=32, height=32):
+        self.width = width
+        self.height = height
+        self.commands = replay["allCommands"]
+        self.rng = random.Random(replay["seed"])
+        self.turn = 0
+        self.research_points = [0, 0]
+        self.units = {}
+        self.cities = {}
+        self.citytiles = {}
+        self.roads = {}
+        self.resources = {}
+        self.next_unit = 1
+        self.next_city = 1
+        self._place_start()
+        self._place_resources()
+
+    def _place_start(self):
+        # the first turn's research commands point at each team's starting city tile
+        starts = {}
+        for cmd in self.commands[0]:
+            strs = cmd["command"].split(" ")
+            if strs[0] == "r":
+                starts[cmd["agentID"]] = (int(strs[1]), int(strs[2]))
+        for team in (0, 1):
+            x, y = starts[team]
+            self._spawn_unit(team, x, y)
+        for team in (0, 1):
+            x, y = starts[team]
+            self._build_citytile(team, x, y)
+
+    def _place_resources(self):
+        half = self.height // 2
+        for r_type, clusters, size, amount in (("wood", 8, 7, 400), ("coal", 3, 4, 350), ("uranium", 2, 3, 320)):
+            for _ in range(clusters):
+                x = self.rng.randrange(self.width)
+                y = self.rng.randrange(half)
+                for _ in range(size):
+                    if (x, y) not in self.citytiles and (x, self.height - 1 - y) not in self.citytiles:
+                        amt = amount + self.rng.randrange(-50, 50)
+                        self.resources[(x, y)] = [r_type, amt]
+                        self.resources[(x, self.height - 1 - y)] = [r_type, amt]
+                    dx, dy = self.rng.choice(list(MOVES.values()))
+                    x = min(max(x + dx, 0), self.width - 1)
+                    y = min(max(y + dy, 0), half - 1)
+
+    def _spawn_unit(self, team, x, y):
+        unitid = f"u_{self.next_unit}"
+        self.next_unit += 1
+        self.units[unitid] = _Unit(team, unitid, x, y)
+
+    def _build_citytile(self, team, x, y):
+        cityid = None
+        for dx, dy in ((0, -1), (1, 0), (0, 1), (-1, 0)):
+            neighbour = self.citytiles.get((x + dx, y + dy))
+            if neighbour is not None and neighbour[0] == team:
+                cityid = neighbour[1]
+                break
+        if cityid is None:
+            cityid = f"c_{self.next_city}"
+            self.next_city += 1
+            self.cities[cityid] = [team, 0.0]
+        self.citytiles[(x, y)] = [team, cityid, 0]
+        self.roads[(x, y)] = 6.0
+
+    def step(self):
+        """
+        apply the commands of the current turn and advance to the next one
+        """
+        for cmd in self.commands[self.turn]:
+            team = cmd["agentID"]
+            strs = cmd["command"].split(" ")
+            if strs[0] == "m" and strs[1] in self.units:
+                unit = self.units[strs[1]]
+                dx, dy = MOVES[strs[2]]
+                x, y = unit.x + dx, unit.y + dy
+                blocked = (x, y) in self.citytiles and self.citytiles[(x, y)][0] != team
+                if 0 <= x < self.width and 0 <= y < self.height and not blocked:
+                    unit.x, unit.y = x, y
+                    unit.cooldown = 2
+                    self.roads[(x, y)] = min(self.roads.get((x, y), 0.0) + 0.25, 6.0)
+            elif strs[0] == "bcity" and strs[1] in self.units:
+                unit = self.units[strs[1]]
+                if (unit.x, unit.y) not in self.citytiles and (unit.x, unit.y) not in self.resources:
+                    self._build_citytile(team, unit.x, unit.y)
+                    unit.cargo = {"wood": 0, "coal": 0, "uranium": 0}
+                    unit.cooldown = 2
+            elif strs[0] in ("bw", "bc", "r"):
+                pos = (int(strs[1]), int(strs[2]))
+                if pos in self.citytiles:
+                    self.citytiles[pos][2] = 10
+                    if strs[0] == "r":
+                        self.research_points[team] += 1
+                    else:
+                        self._spawn_unit(team, *pos)
+        self._gather()
+        for unit in self.units.values():
+            unit.cooldown = max(unit.cooldown - 1, 0)
+        for tile in self.citytiles.values():
+            tile[2] = max(tile[2] - 1, 0)
+        for res in self.resources.values():
+            if res[0] == "wood" and res[1] < 500:
+                res[1] = min(res[1] * 1.025, 500)
+        self.turn += 1
+
+    def _gather(self):
+        for unit in self.units.values():
+            pos = (unit.x, unit.y)
+            if pos in self.citytiles:
+                city = self.cities[self.citytiles[pos][1]]
+                for r_type, amount in unit.cargo.items():
+                    city[1] += amount * FUEL_RATE[r_type]
+                unit.cargo = {"wood": 0, "coal": 0, "uranium": 0}
+                continue
+            for dx, dy in MOVES.values():
+                res = self.resources.get((unit.x + dx, unit.y + dy))
+                if res is None or self.research_points[unit.team] < RESEARCH_REQUIREMENT[res[0]]:
+                    continue
+                space = 100 - sum(unit.cargo.values())
+                amount = min(COLLECTION_RATE[res[0]], space, math.floor(res[1]))
+                unit.cargo[res[0]] += amount
+                res[1] -= amount
+                if res[1] <= 0:
+                    del self.resources[(unit.x + dx, unit.y + dy)]
+        for cityid, city in self.cities.items():
+            tiles = sum(1 for t in self.citytiles.values() if t[1] == cityid)
+            city[1] = max(city[1] - 0.1 * 23 * tiles, 0.0)
+
+    def updates(self):
+        """
+        the observation lines the engine would send for the current turn
+        """
+        lines = [f"rp {team} {rp}" for team, rp in enumerate(self.research_points)]
+        for (x, y), (r_type, amount) in self.resources.items():
+            lines.append(f"r {r_type} {x} {y} {amount}")
+        for unit in self.units.values():
+            cargo = unit.cargo
+            lines.append(f"u 0 {unit.team} {unit.id} {unit.x} {unit.y} {unit.cooldown} {cargo['wood']} {cargo['coal']} {cargo['uranium']}")
+        for cityid, (team, fuel) in self.cities.items():
+            tiles = sum(1 for t in self.citytiles.values() if t[1] == cityid)
+            lines.append(f"c {team} {cityid} {fuel} {23 * tiles}")
+        for (x, y), (team, cityid, cooldown) in self.citytiles.items():
+            lines.append(f"ct {team} {cityid} {x} {y} {cooldown}")
+        for (x, y), road in self.roads.items():
+            lines.append(f"ccd {x} {y} {road}")
+        lines.append("D_DONE")
+        return lines
+
+
+def load_replay(replay_path=REPLAY_PATH):
+    with open(replay_path) as f:
+        return json.load(f)
+
+
+def replay_observations(replay_path=REPLAY_PATH, player=0):
+    """
+    yields the update list for every turn of the replay, the first one including
+    the player id and map size header that Game._initialize expects
+    """
+    state = ReplayState(load_replay(replay_path))
+    yield [str(player), f"{state.width} {state.height}"] + state.updates()
+    while state.turn < len(state.commands) - 1:
+        state.step()
+        yield state.updates()
+
+
+def replay_games(replay_path=REPLAY_PATH, game_cls=None):
+    """
+    yields a Game brought up to date with each turn of the replay in turn. The
+    same Game object is updated and yielded every turn.
+    """
+    if game_cls is None:
+        from lux.game import Game as game_cls
+    game = None
+    for updates in replay_observations(replay_path):
+        if game is None:
+            game = game_cls()
+            game._initialize(updates)
+            game._update(updates[2:])
+        else:
+            game._update(updates)
+        yield game
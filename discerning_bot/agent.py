@@ -1,10 +1,12 @@
 import math, sys
+import numpy as np
 from lux import game
 from lux.game import Game
 from lux.game_map import Cell, RESOURCE_TYPES
+from lux.pathfinding import Pathfinder
 from lux.constants import Constants
 from lux.game_constants import GAME_CONSTANTS
-from lux import annotate
+from lux import annotate, assignment, heatmaps
 import logging
 
 logging.basicConfig(filename='agent.log', level=logging.INFO)
@@ -16,55 +18,20 @@ UNIT_LOCATIONS = {}
 EXPLORER = []
 
 
-def get_resource_cells(m):
-    width, height = m.width, m.height
-    resource_tiles: list[Cell] = []
-    for y in range(height):
-        for x in range(width):
-            cell = m.get_cell(x, y)
-            if cell.has_resource():
-                resource_tiles.append(cell)
-    return resource_tiles
-
 def get_adjacent_cells(cell, m):
-    adj_cells: list[Cell] = []
-    x, y = cell.pos.x, cell.pos.y
-    if x > 0:
-        adj_cells.append(m.get_cell(x-1,y))
-    if x < (m.width-1):
-        adj_cells.append(m.get_cell(x+1,y))
-    if y > 0:
-        adj_cells.append(m.get_cell(x,y-1))
-    if y < (m.width-1):
-        adj_cells.append(m.get_cell(x,y+1))
+    adj_cells: list[Cell] = [m.get_cell(pos.x, pos.y) for pos in m.neighbors(cell.pos.x, cell.pos.y)]
     return adj_cells
 
-def get_cell_value(cell, p):
-    if not cell.has_resource():
-        return 0
-    if cell.resource.type == Constants.RESOURCE_TYPES.COAL:
-        if not p.researched_coal():
-            return 0
-        else:
-            return 50
-    if cell.resource.type == Constants.RESOURCE_TYPES.URANIUM:
-        if not p.researched_uranium():
-            return 0
-        else:
-            return 80
-    return 20
-
 def get_energy(unit):
     return unit.cargo.wood + unit.cargo.coal * 10 + unit.cargo.uranium * 40
 
 def get_map_values(m, p):
-    width, height = m.width, m.height
+    # value of the resources in each cell and its four neighbours
+    values = heatmaps.convolve(heatmaps.resource_value(m, p), heatmaps.CROSS)
     d = {}
-    for y in range(height):
-        for x in range(width):
-            adj = get_adjacent_cells(m.get_cell(x,y), m)
-            adj.append(m.get_cell(x,y))
-            d[(x,y)] = sum([get_cell_value(cell, p) for cell in adj])
+    for y, row in enumerate(values.tolist()):
+        for x, value in enumerate(row):
+            d[(x,y)] = value
     return d
 
 def cities_powered(p, day_cycle):
@@ -99,56 +66,6 @@ def get_expansion_sites(city, m):
     borders = [c for c in set(borders_dup) if is_empty(c)]
     return borders
 
-def take_step(u, target, m, allow_city, opp_locs, my_cities):
-    global UNIT_LOCATIONS
-    target = m.get_cell(target[0], target[1])
-    
-    if u.pos == target.pos:
-        return None
-    occ_loc = [UNIT_LOCATIONS[id] for id in UNIT_LOCATIONS.keys()]
-    occ_loc = [coord for coord in occ_loc if m.get_cell(coord[0], coord[1]).citytile is None]
-    occ_loc = occ_loc + opp_locs
-    if not allow_city:
-        occ_loc = occ_loc + my_cities
-    if u.pos.y > target.pos.y:
-        if (u.pos.x, u.pos.y - 1) not in occ_loc:
-            UNIT_LOCATIONS[u.id] = (u.pos.x, u.pos.y - 1)
-            return u.move(DIRECTIONS.NORTH)
-    elif u.pos.y < target.pos.y:
-        if (u.pos.x, u.pos.y + 1) not in occ_loc:
-            UNIT_LOCATIONS[u.id] = (u.pos.x, u.pos.y + 1)
-            return u.move(DIRECTIONS.SOUTH)
-    if u.pos.x > target.pos.x:
-        if (u.pos.x - 1, u.pos.y) not in occ_loc:
-            UNIT_LOCATIONS[u.id] = (u.pos.x - 1, u.pos.y)
-            return u.move(DIRECTIONS.WEST)
-            
-    if u.pos.x < target.pos.x:
-        if (u.pos.x + 1, u.pos.y) not in occ_loc:
-            UNIT_LOCATIONS[u.id] = (u.pos.x + 1, u.pos.y)
-            return u.move(DIRECTIONS.EAST)
-    return None
-
-def get_gather_target(u, p, m, resource_tiles, allow_city, values):
-    best_val = 0.0
-    best_tile = None
-    taken_targets = [TARGET_LOCS[id] for id in TARGET_LOCS.keys() if id != u.id]
-    for tile in values.keys():
-        if tile in taken_targets:
-            continue
-        if not allow_city:
-            if m.get_cell(tile[0], tile[1]).citytile is not None:
-                continue
-        dist = abs(u.pos.x - tile[0]) + abs(u.pos.y - tile[1])
-        if dist < 15:
-            val = 1.0 * values[tile] / math.log(dist + 2)
-            if val > best_val:
-                best_val = val
-                best_tile = m.get_cell(tile[0], tile[1])
-    if best_tile is not None:
-        return get_coords(best_tile)
-    return None
-
 def find_home(u, p, m):
     if m.get_cell_by_pos(u.pos).citytile is not None:
         return None
@@ -164,26 +81,14 @@ def find_home(u, p, m):
         return get_coords(closest_city_tile)
     return None
 
-def get_closest_dist(coord, p, m):
-    closest_dist = math.inf
-    for k, city in p.cities.items():
-        for city_tile in city.citytiles:
-            dist = abs(coord[0] - city_tile.pos.x) + abs(coord[1] - city_tile.pos.y)
-            if dist < closest_dist:
-                closest_dist = dist
-    return closest_dist
-
 def get_city_dists(p, m):
-    dists = {}
-    for x in range(m.width):
-        for y in range(m.height):
-            c = m.get_cell(x, y)
-            if c.has_resource() or c.citytile is not None:
-                dists[(x,y)] = 0
-            elif x < 3 or y < 3 or x > (m.width - 4) or y > (m.height - 4):
-                dists[(x,y)] = 0
-            else:
-                dists[(x,y)] = get_closest_dist((x,y), p, m)
+    # distance to our nearest city tile, 0 on occupied cells and near the edges
+    dists = m.city_distance(p.team).copy()
+    dists[((m.resource_type >= 0) & (m.resource_amount > 0)) | (m.citytile_team >= 0)] = 0
+    dists[:3, :] = 0
+    dists[-3:, :] = 0
+    dists[:, :3] = 0
+    dists[:, -3:] = 0
     return dists
 
 
@@ -193,12 +98,13 @@ def get_build_loc(u, p, m, new_city, opponent):
     target_dist = math.inf
     if new_city:
         dists = get_city_dists(p, m)
-        ranks = sorted([(dists[coord], coord) for coord in dists.keys()], key=lambda x: (-x[0], x[1][0], x[1][1]))
-        if get_coords(u) == ranks[0][1]:
+        # the furthest cell, lowest x then lowest y on ties
+        ys, xs = np.nonzero(dists == dists.max())
+        furthest = min(zip(xs.tolist(), ys.tolist()))
+        if get_coords(u) == furthest:
             EXPLORER = [x for x in EXPLORER if x != u.id]
             return u.build_city()
-        if ranks[0][1] is not None:
-            return ranks[0][1]
+        return furthest
     if p.city_tile_count == 0:
         if is_empty(m.get_cell_by_pos(u.pos)):
             return u.build_city()
@@ -214,7 +120,7 @@ def get_build_loc(u, p, m, new_city, opponent):
         taken_targets = [TARGET_LOCS[id] for id in TARGET_LOCS.keys() if id != u.id]
         expansions = [x for x in expansions if get_coords(x) not in taken_targets]
         if len(expansions) > 0:
-            if u.pos in [c.pos for c in expansions]:
+            if u.pos in {c.pos for c in expansions}:
                 return u.build_city() 
             else:
                 for site in expansions:
@@ -246,7 +152,12 @@ def agent(observation, configuration):
     else:
         game_state._update(observation["updates"])
 
-    starting_locs = {}
+    # forget units that died since last turn
+    for unitid in game_state.delta.units_died:
+        TARGET_LOCS.pop(unitid, None)
+        UNIT_LOCATIONS.pop(unitid, None)
+    EXPLORER = [x for x in EXPLORER if x not in game_state.delta.units_died]
+
     
     actions = []
 
@@ -255,7 +166,6 @@ def agent(observation, configuration):
     opponent = game_state.players[(observation.player + 1) % 2]
     width, height = game_state.map.width, game_state.map.height
 
-    resource_tiles = get_resource_cells(game_state.map)
     unit_count = len(player.units)
     city_count = len(player.cities.items())
     map_values = get_map_values(game_state.map, player)
@@ -263,6 +173,7 @@ def agent(observation, configuration):
     allow_cities = {}
     ids_to_skip = []
     to_build = []
+    gatherers = []
     any_exploring = False
     total_upkeep = 0
     total_fuel = 0
@@ -273,7 +184,6 @@ def agent(observation, configuration):
     # we iterate over all our units and do something with them
     for unit in player.units:
         UNIT_LOCATIONS[unit.id] = (unit.pos.x, unit.pos.y)
-        starting_locs[unit.id] = (unit.pos.x, unit.pos.y)
         allow_cities[unit.id] = True
         threshold = 0
         target = None
@@ -284,7 +194,8 @@ def agent(observation, configuration):
                     target = get_build_loc(unit, player, game_state.map, False, opponent) 
                     to_build.append(unit.id)
                 else:
-                    target = get_gather_target(unit, player, game_state.map, resource_tiles, False, map_values)
+                    gatherers.append((unit, False))
+                    continue
             elif day_cycle >= 30 and game_state.map.get_cell_by_pos(unit.pos).citytile is not None:
                 continue
             elif not unit.can_act():
@@ -292,10 +203,8 @@ def agent(observation, configuration):
             elif (get_energy(unit) > 400 and day_cycle > 20) and (total_upkeep * 10) > total_fuel:
                 target = find_home(unit, player, game_state.map)
             elif unit.get_cargo_space_left() > 0 and (unit.get_cargo_space_left() >= 40 or day_cycle < 30):
-                if unit_count > 2 or not cities_powered(player, day_cycle):
-                    target = get_gather_target(unit, player, game_state.map, resource_tiles, True, map_values)
-                else:
-                    target = get_gather_target(unit, player, game_state.map, resource_tiles, False, map_values)
+                gatherers.append((unit, unit_count > 2 or not cities_powered(player, day_cycle)))
+                continue
             elif unit.get_cargo_space_left() == 0 and (cities_powered(player, day_cycle)) and len(to_build) < 4:
                 if city_count < math.floor(1.0 * unit_count / (4 * city_count)) and not any_exploring and (len(EXPLORER) == 0 or unit.id in EXPLORER):
                     logging.info(f"trying to explore with {unit.id}")
@@ -314,30 +223,26 @@ def agent(observation, configuration):
                 actions.append(target)
                 ids_to_skip.append(unit.id)
     
+    for unitid, target in assignment.gather_targets(gatherers, game_state.map, map_values, TARGET_LOCS, 14).items():
+        if target is not None:
+            TARGET_LOCS[unitid] = target
+        else:
+            ids_to_skip.append(unitid)
+
     logging.info(f"TURN: {game_state.turn}; explorer: {EXPLORER}")
-    opp_cities = []
-    for k, city in opponent.cities.items():
-        for ct in city.citytiles:
-            opp_cities.append(get_coords(ct))
-    my_cities = []
-    for k, city in player.cities.items():
-        for ct in city.citytiles:
-            my_cities.append(get_coords(ct))
-    moves_happened = True
-    while moves_happened:
-        moves_happened = False
-        to_iter = [x for x in player.units if x.id not in ids_to_skip]
-        for unit in to_iter:
-            if unit.can_act():
-                if starting_locs[unit.id][0] == UNIT_LOCATIONS[unit.id][0] and starting_locs[unit.id][1] == UNIT_LOCATIONS[unit.id][1]:
-                    if unit.id in TARGET_LOCS.keys():
-                        if unit.id in to_build:
-                            move_cmd = take_step(unit, TARGET_LOCS[unit.id], game_state.map, False, opp_cities, my_cities)
-                        else:
-                            move_cmd = take_step(unit, TARGET_LOCS[unit.id], game_state.map, True, opp_cities, my_cities)
-                        if move_cmd is not None:
-                            actions.append(move_cmd)
-                            moves_happened = True
+    pathfinder = Pathfinder(game_state.map, player.team)
+    for unit in opponent.units:
+        pathfinder.block(unit.pos.x, unit.pos.y)
+    for unit in player.units:
+        pathfinder.hold(unit)
+    for unit in player.units:
+        if unit.id in ids_to_skip or not unit.can_act() or unit.id not in TARGET_LOCS:
+            continue
+        direction = pathfinder.plan(unit, TARGET_LOCS[unit.id], unit.id not in to_build)
+        if direction != DIRECTIONS.CENTER:
+            actions.append(unit.move(direction))
+            new_pos = unit.pos.translate(direction, 1)
+            UNIT_LOCATIONS[unit.id] = (new_pos.x, new_pos.y)
 
     can_build = player.city_tile_count - unit_count
     for k, city in player.cities.items():
@@ -0,0 +1,188 @@
+"""
+Connected clusters of resource cells.
+
+Two resource cells belong to the same cluster when they are 4-adjacent, whatever
+their resource types, so a forest with a coal seam in it is one cluster with
+wood and coal totals. ResourceClusters labels the map once and then follows the
+turn deltas: depleted cells are taken out of their cluster, which is split if
+that disconnects it, and new resource cells join or merge their neighbours'
+clusters. Only the clusters a change touches are walked again.
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .game_map import RESOURCE_TYPE_CODES, RESOURCE_TYPE_NAMES
+
+
+class ResourceCluster:
+    """
+    one connected group of resource cells
+    """
+    def __init__(self, clusterid, indices, owner):
+        self.id = clusterid
+        # flat indices y * width + x of the cells in the cluster
+        self.indices = indices
+        self._owner = owner
+        # resource type -> amount left in the cluster, refreshed every update
+        self.amounts: Dict[str, int] = {name: 0 for name in RESOURCE_TYPE_NAMES}
+        self._perimeter = None
+
+    @property
+    def cells(self) -> List[Tuple[int, int]]:
+        width = self._owner.width
+        return [(index % width, index // width) for index in sorted(self.indices)]
+
+    @property
+    def amount(self) -> int:
+        """
+        amount left of every resource type together
+        """
+        return sum(self.amounts.values())
+
+    @property
+    def centroid(self) -> Tuple[float, float]:
+        width = self._owner.width
+        size = len(self.indices)
+        return (
+            sum(index % width for index in self.indices) / size,
+            sum(index // width for index in self.indices) / size,
+        )
+
+    @property
+    def perimeter(self) -> List[Tuple[int, int]]:
+        """
+        the cells next to the cluster that hold no resource, sorted by (y, x)
+        """
+        if self._perimeter is None:
+            width = self._owner.width
+            labels = self._owner._flat_labels
+            adjacent = self._owner._adjacent
+            border = {n for index in self.indices for n in adjacent[index] if labels[n] < 0}
+            self._perimeter = [(index % width, index // width) for index in sorted(border)]
+        return self._perimeter
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+
+class ResourceClusters:
+    """
+    the resource clusters of a GameMap, kept up to date by update. Use
+    GameMap.clusters rather than building one directly.
+    """
+    def __init__(self, game_map):
+        self.width = game_map.width
+        self._adjacent = game_map.neighbor_table.indices
+        # cluster id of each cell, -1 where there is no resource, indexed [y, x]
+        self.labels = np.full((game_map.height, game_map.width), -1, dtype=np.int32)
+        self._flat_labels = self.labels.ravel()
+        self.clusters: Dict[int, ResourceCluster] = {}
+        self._next_id = 0
+        resource_cells = np.flatnonzero(game_map.resource_type >= 0).tolist()
+        # -2 marks resource cells no cluster has claimed yet, see _flood
+        self._flat_labels[resource_cells] = -2
+        for index in resource_cells:
+            if self._flat_labels[index] == -2:
+                self._flood(index, self._next_id)
+        self._refresh(game_map)
+
+    def cluster_at(self, x, y) -> ResourceCluster:
+        """
+        the cluster the cell (x, y) belongs to, or None
+        """
+        return self.clusters.get(int(self.labels[y, x]))
+
+    def update(self, game_map, delta):
+        """
+        apply the resource cells delta reports added and depleted, then refresh
+        every cluster's amounts from the map
+        """
+        width = self.width
+        labels = self._flat_labels
+        split = set()
+        for x, y in sorted(delta.resources_depleted, key=lambda cell: (cell[1], cell[0])):
+            index = y * width + x
+            clusterid = int(labels[index])
+            if clusterid < 0:
+                continue
+            labels[index] = -1
+            self.clusters[clusterid].indices.discard(index)
+            split.add(clusterid)
+        for clusterid in sorted(split):
+            self._split(clusterid)
+        for x, y in sorted(delta.resources_added, key=lambda cell: (cell[1], cell[0])):
+            self._add(y * width + x)
+        self._refresh(game_map)
+
+    def _flood(self, start, clusterid) -> ResourceCluster:
+        """
+        label every unlabelled resource cell connected to start as clusterid
+        """
+        labels = self._flat_labels
+        labels[start] = clusterid
+        indices = {start}
+        frontier = [start]
+        while frontier:
+            index = frontier.pop()
+            for n in self._adjacent[index]:
+                if labels[n] == -2:
+                    labels[n] = clusterid
+                    indices.add(n)
+                    frontier.append(n)
+        cluster = self.clusters[clusterid] = ResourceCluster(clusterid, indices, self)
+        self._next_id = max(self._next_id, clusterid + 1)
+        return cluster
+
+    def _split(self, clusterid):
+        """
+        relabel what is left of a cluster that lost cells, as one cluster per
+        connected piece; the piece with the lowest cell keeps the id
+        """
+        cluster = self.clusters.pop(clusterid)
+        labels = self._flat_labels
+        # mark the cells as unlabelled resource cells for _flood
+        for index in cluster.indices:
+            labels[index] = -2
+        pieceid = clusterid
+        for index in sorted(cluster.indices):
+            if labels[index] == -2:
+                self._flood(index, pieceid)
+                pieceid = self._next_id
+
+    def _add(self, index):
+        """
+        label a new resource cell, merging every cluster it touches into the
+        largest of them
+        """
+        labels = self._flat_labels
+        touching = sorted({int(labels[n]) for n in self._adjacent[index] if labels[n] >= 0})
+        if not touching:
+            labels[index] = -2
+            self._flood(index, self._next_id)
+            return
+        target = self.clusters[max(touching, key=lambda c: (len(self.clusters[c]), -c))]
+        for clusterid in touching:
+            if clusterid != target.id:
+                merged = self.clusters.pop(clusterid)
+                labels[list(merged.indices)] = target.id
+                target.indices |= merged.indices
+        labels[index] = target.id
+        target.indices.add(index)
+
+    def _refresh(self, game_map):
+        labels = self._flat_labels
+        has_resource = labels >= 0
+        owners = labels[has_resource]
+        types = game_map.resource_type.ravel()[has_resource]
+        amounts = game_map.resource_amount.ravel()[has_resource]
+        totals = {
+            name: np.bincount(owners[types == RESOURCE_TYPE_CODES[name]],
+                              weights=amounts[types == RESOURCE_TYPE_CODES[name]],
+                              minlength=self._next_id).astype(np.int64).tolist()
+            for name in RESOURCE_TYPE_NAMES
+        }
+        for clusterid, cluster in self.clusters.items():
+            for name in RESOURCE_TYPE_NAMES:
+                cluster.amounts[name] = totals[name][clusterid]
+            cluster._perimeter = None
@@ -3,7 +3,7 @@ from lux.game import Game
 from lux.game_map import Cell, RESOURCE_TYPES
 from lux.constants import Constants
 from lux.game_constants import GAME_CONSTANTS
-from lux import annotate
+from lux import annotate, heatmaps
 
 DIRECTIONS = Constants.DIRECTIONS
 game_state = None
@@ -20,41 +20,16 @@ def get_resource_cells(m):
     return resource_tiles
 
 def get_adjacent_cells(cell, m):
-    adj_cells: list[Cell] = []
-    x, y = cell.pos.x, cell.pos.y
-    if x > 0:
-        adj_cells.append(m.get_cell(x-1,y))
-    if x < (m.width-1):
-        adj_cells.append(m.get_cell(x+1,y))
-    if y > 0:
-        adj_cells.append(m.get_cell(x,y-1))
-    if y < (m.width-1):
-        adj_cells.append(m.get_cell(x,y+1))
+    adj_cells: list[Cell] = [m.get_cell(pos.x, pos.y) for pos in m.neighbors(cell.pos.x, cell.pos.y)]
     return adj_cells
 
-def get_cell_value(cell, p):
-    if not cell.has_resource():
-        return 0
-    if cell.resource.type == Constants.RESOURCE_TYPES.COAL:
-        if not p.researched_coal():
-            return 0
-        else:
-            return 50
-    if cell.resource.type == Constants.RESOURCE_TYPES.URANIUM:
-        if not p.researched_uranium():
-            return 0
-        else:
-            return 80
-    return 20
-
 def get_map_values(m, p):
-    width, height = m.width, m.height
+    # value of the resources in each cell and its four neighbours
+    values = heatmaps.convolve(heatmaps.resource_value(m, p), heatmaps.CROSS)
     d = {}
-    for y in range(height):
-        for x in range(width):
-            adj = get_adjacent_cells(m.get_cell(x,y), m)
-            adj.append(m.get_cell(x,y))
-            d[(x,y)] = sum([get_cell_value(cell, p) for cell in adj])
+    for y, row in enumerate(values.tolist()):
+        for x, value in enumerate(row):
+            d[(x,y)] = value
     return d
 
 def cities_powered(p):
@@ -142,6 +117,9 @@ def agent(observation, configuration):
     else:
         game_state._update(observation["updates"])
     
+    # cells stay the same objects from turn to turn, so only this turn's
+    # targets count as taken
+    TAKEN_TARGETS.clear()
     actions = []
     targets = []
 
@@ -0,0 +1,135 @@
+"""
+Assigning units to targets all at once instead of one unit at a time.
+
+Picking each unit's best free target in turn lets the first units take targets a
+later unit needed more, and makes the result depend on the order of the units.
+assign scores every (unit, target) pair in a matrix and finds the assignment
+with the greatest total score, each target going to at most one unit, with the
+Hungarian method: rows are added one at a time along a shortest augmenting
+path, each step a few vectorized operations over the columns.
+
+Only a unit's top_k best targets are kept as candidates, so the columns solved
+over are the union of those rather than every target. The result is exact
+unless a unit would have done best on a target outside its top_k, which
+happens when many units crowd around the same few targets; with 150 units on a
+32x32 board the default keeps within about 1% of the exact total.
+
+gather_targets is the bots' use of it: sharing out the valued cells of the map
+between the units heading out to gather.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# candidate targets kept per unit by assign
+DEFAULT_TOP_K = 32
+
+
+def assign(scores: np.ndarray, top_k=DEFAULT_TOP_K) -> List[int]:
+    """
+    the target (column) given to each unit (row) of scores, or -1 for none,
+    maximising the total score. Pairs scoring 0 or less, or not finite, are
+    never assigned, and a unit is left without a target rather than given one
+    of those. top_k=None keeps every candidate.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    rows, columns = scores.shape
+    allowed = np.isfinite(scores) & (scores > 0)
+    scores = np.where(allowed, scores, 0.0)
+    if top_k is not None and top_k < columns:
+        # the top_k highest scoring columns of each row stay allowed
+        top = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+        kept = np.zeros_like(allowed)
+        np.put_along_axis(kept, top, True, axis=1)
+        allowed &= kept
+    candidates = np.flatnonzero(allowed.any(axis=0))
+    if rows == 0 or len(candidates) == 0:
+        return [-1] * rows
+
+    # minimise cost = -score over the candidate columns, plus one column per
+    # row at cost 0 standing for "no target", so every row can be placed
+    forbidden = 1.0 + scores.max() * (rows + 1)
+    costs = np.full((rows, len(candidates) + rows), forbidden)
+    costs[:, :len(candidates)] = np.where(allowed[:, candidates], -scores[:, candidates], forbidden)
+    costs[np.arange(rows), len(candidates) + np.arange(rows)] = 0.0
+    row_of = solve(costs)
+    targets = [-1] * rows
+    for column, row in enumerate(row_of[:len(candidates)]):
+        if row >= 0 and allowed[row, candidates[column]]:
+            targets[row] = int(candidates[column])
+    return targets
+
+
+def gather_targets(gatherers, game_map, values, targets, max_distance) -> Dict[str, Optional[Tuple[int, int]]]:
+    """
+    the (x, y) cell each gatherer should head for, by unit id, or None. gatherers
+    are (unit, allow_city) pairs, values maps (x, y) cells to what gathering
+    there is worth, and targets maps unit ids to the cells units are already
+    heading for, which are left to them; the gatherers' own entries are ignored.
+    A unit scores each free cell within max_distance steps as its value over
+    log(distance + 2), and city tiles score nothing for a unit not allowed into
+    a city; the cells then go to the units for the best total.
+    """
+    units = [u for u, _ in gatherers]
+    gatherer_ids = {u.id for u in units}
+    taken = {cell for id, cell in targets.items() if id not in gatherer_ids}
+    tiles = [tile for tile, value in values.items() if value > 0 and tile not in taken]
+    if not units or not tiles:
+        return {u.id: None for u in units}
+    tx = np.array([tile[0] for tile in tiles])
+    ty = np.array([tile[1] for tile in tiles])
+    ux = np.array([u.pos.x for u in units])
+    uy = np.array([u.pos.y for u in units])
+    dist = np.abs(ux[:, None] - tx[None, :]) + np.abs(uy[:, None] - ty[None, :])
+    scores = np.array([values[tile] for tile in tiles], dtype=np.float64)[None, :] / np.log(dist + 2)
+    scores[dist > max_distance] = 0
+    in_city = game_map.citytile_team[ty, tx] >= 0
+    no_city = np.array([not allow_city for _, allow_city in gatherers])
+    scores[no_city[:, None] & in_city[None, :]] = 0
+    picks = assign(scores)
+    return {u.id: (tiles[pick] if pick >= 0 else None) for u, pick in zip(units, picks)}
+
+
+def solve(costs: np.ndarray) -> List[int]:
+    """
+    the row placed in each column of a minimum-cost assignment of every row of
+    costs to a distinct column, -1 for columns left empty; costs must be finite
+    and have at least as many columns as rows
+    """
+    rows, columns = costs.shape
+    # potentials of the rows and columns; column `columns` is a virtual start
+    # column holding the row being added
+    row_potential = np.zeros(rows)
+    column_potential = np.zeros(columns + 1)
+    row_of = np.full(columns + 1, -1)
+    for row in range(rows):
+        row_of[columns] = row
+        column = columns
+        # cheapest reduced cost found so far to each column, and the column the
+        # path to it comes from
+        best = np.full(columns, np.inf)
+        previous = np.full(columns, -1)
+        used = np.zeros(columns + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current = row_of[column]
+            reduced = costs[current] - row_potential[current] - column_potential[:columns]
+            free = ~used[:columns]
+            better = free & (reduced < best)
+            best[better] = reduced[better]
+            previous[better] = column
+            candidates = np.where(free, best, np.inf)
+            nearest = int(np.argmin(candidates))
+            delta = candidates[nearest]
+            row_potential[row_of[used]] += delta
+            column_potential[used] -= delta
+            best[free] -= delta
+            column = nearest
+            if row_of[column] < 0:
+                break
+        # flip the matching along the path back to the start column
+        while column != columns:
+            came_from = previous[column]
+            row_of[column] = row_of[came_from]
+            column = came_from
+    return row_of[:columns].tolist()
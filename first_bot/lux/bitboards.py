@@ -0,0 +1,106 @@
+"""
+Occupancy layers of a board as bitboards.
+
+A bitboard is a Python int with bit y * width + x set for every cell (x, y) in
+the layer; a 32x32 board fits in one int. Unions, intersections and
+differences of layers are |, & and & ~, and the cells next to a layer are a
+few shifts, so questions like "empty cells next to my city" cost a handful of
+int operations however many cells are involved. GameMap builds the layers of
+each turn on demand, see GameMap.unit_board and its neighbours.
+"""
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+
+def from_mask(mask: np.ndarray) -> int:
+    """
+    the bitboard of the cells set in the boolean [y, x] array mask
+    """
+    return int.from_bytes(np.packbits(mask.ravel(), bitorder="little").tobytes(), "little")
+
+
+def from_cells(cells, width) -> int:
+    """
+    the bitboard of cells, (x, y) tuples or Positions
+    """
+    board = 0
+    for cell in cells:
+        x, y = (cell.x, cell.y) if hasattr(cell, "x") else cell
+        board |= 1 << (y * width + x)
+    return board
+
+
+def to_mask(board, width, height) -> np.ndarray:
+    """
+    board as a boolean [y, x] array
+    """
+    size = width * height
+    packed = np.frombuffer(board.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(packed, count=size, bitorder="little").astype(bool).reshape(height, width)
+
+
+def bit(x, y, width) -> int:
+    return 1 << (y * width + x)
+
+
+def contains(board, x, y, width) -> bool:
+    return (board >> (y * width + x)) & 1 == 1
+
+
+def count(board) -> int:
+    return bin(board).count("1")
+
+
+def indices(board) -> Iterator[int]:
+    """
+    the flat indices y * width + x of the cells in board, lowest first
+    """
+    while board:
+        lowest = board & -board
+        yield lowest.bit_length() - 1
+        board ^= lowest
+
+
+def cells(board, width) -> Iterator[Tuple[int, int]]:
+    """
+    the (x, y) of the cells in board, in (y, x) order
+    """
+    for index in indices(board):
+        yield index % width, index // width
+
+
+def adjacent(board, width, height) -> int:
+    """
+    the cells 4-adjacent to a cell of board, whether or not they are in board
+    """
+    full, first_column, last_column = _edges(width, height)
+    return (
+        ((board >> 1) & ~last_column)
+        | ((board << 1) & ~first_column & full)
+        | (board >> width)
+        | ((board << width) & full)
+    )
+
+
+def expand(board, width, height) -> int:
+    """
+    board and the cells 4-adjacent to it
+    """
+    return board | adjacent(board, width, height)
+
+
+_EDGES: Dict[Tuple[int, int], Tuple[int, int, int]] = {}
+
+
+def _edges(width, height) -> Tuple[int, int, int]:
+    """
+    the bitboards of the whole board, its first column and its last column;
+    shifting by one bit wraps cells across a row end, and these mask them out
+    """
+    edges = _EDGES.get((width, height))
+    if edges is None:
+        full = (1 << (width * height)) - 1
+        first_column = sum(1 << (y * width) for y in range(height))
+        edges = _EDGES[(width, height)] = (full, first_column, first_column << (width - 1))
+    return edges
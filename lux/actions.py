@@ -0,0 +1,158 @@
+"""
+A turn's actions, recorded as tuples and written out once.
+
+Each action is a tuple of its command code followed by the command's arguments,
+in the order the engine reads them: (MOVE, unit id, direction),
+(RESEARCH, x, y) and so on. ActionBuffer keeps at most one action per unit and
+per city tile, the first one given, since the engine refuses any later ones.
+Agents record actions with its typed methods (move, build_city, research, ...)
+and return ActionBuffer.commands(), the list of command strings the engine
+expects, while a local harness can read the tuples from ActionBuffer.actions
+without parsing anything.
+"""
+from typing import Dict, Iterator, List, Tuple
+
+MOVE = "m"
+TRANSFER = "t"
+BUILD_CITY = "bcity"
+PILLAGE = "p"
+RESEARCH = "r"
+BUILD_WORKER = "bw"
+BUILD_CART = "bc"
+
+UNIT_COMMANDS = frozenset((MOVE, TRANSFER, BUILD_CITY, PILLAGE))
+CITYTILE_COMMANDS = frozenset((RESEARCH, BUILD_WORKER, BUILD_CART))
+
+# command string layouts by the length of the action tuple, for encode
+_FORMATS = {n: " ".join(["%s"] * n) for n in range(1, 6)}
+
+# annotation commands (see lux.annotate) all start with this
+ANNOTATION_PREFIX = "d"
+
+
+def encode(action) -> str:
+    """
+    the command string for an action tuple
+    """
+    return _FORMATS[len(action)] % action
+
+
+def decode(command) -> tuple:
+    """
+    the action tuple for a unit or city tile command string
+    """
+    parts = command.split(" ")
+    code = parts[0]
+    if code in CITYTILE_COMMANDS:
+        return code, int(parts[1]), int(parts[2])
+    if code == TRANSFER:
+        return code, parts[1], parts[2], parts[3], int(parts[4])
+    return tuple(parts)
+
+
+def actor(action):
+    """
+    what an action is for: the unit id, or the city tile's (x, y)
+    """
+    if action[0] in CITYTILE_COMMANDS:
+        return action[1], action[2]
+    return action[1]
+
+
+class ActionBuffer:
+    """
+    the actions of one turn, at most one per unit and per city tile
+    """
+    def __init__(self):
+        # unit id or city tile (x, y) -> action, in the order they were given one
+        self._actions: Dict[tuple, tuple] = {}
+        # the command string of each kept action, in the same order; the typed
+        # methods format it as they go, so writing the turn out only joins them
+        self._commands: List[str] = []
+        # annotation command strings, written out after the actions
+        self.annotations: List[str] = []
+        # actions refused because their unit or city tile already had one
+        self.dropped: List[tuple] = []
+
+    def add(self, action) -> bool:
+        """
+        record an action, as a tuple or a command string; None is ignored.
+        Returns whether it was kept. The typed methods below are cheaper.
+        """
+        if action is None:
+            return False
+        if isinstance(action, str):
+            if action.startswith(ANNOTATION_PREFIX):
+                self.annotations.append(action)
+                return True
+            command, action = action, decode(action)
+        else:
+            command = encode(action)
+        return self._put(actor(action), action, command)
+
+    def move(self, unit, direction) -> bool:
+        uid = unit.id
+        return self._put(uid, (MOVE, uid, direction), f"m {uid} {direction}")
+
+    def transfer(self, unit, dest_id, resource_type, amount) -> bool:
+        uid = unit.id
+        return self._put(
+            uid, (TRANSFER, uid, dest_id, resource_type, amount), f"t {uid} {dest_id} {resource_type} {amount}"
+        )
+
+    def build_city(self, unit) -> bool:
+        uid = unit.id
+        return self._put(uid, (BUILD_CITY, uid), f"bcity {uid}")
+
+    def pillage(self, unit) -> bool:
+        uid = unit.id
+        return self._put(uid, (PILLAGE, uid), f"p {uid}")
+
+    def research(self, citytile) -> bool:
+        x, y = citytile.pos.x, citytile.pos.y
+        return self._put((x, y), (RESEARCH, x, y), f"r {x} {y}")
+
+    def build_worker(self, citytile) -> bool:
+        x, y = citytile.pos.x, citytile.pos.y
+        return self._put((x, y), (BUILD_WORKER, x, y), f"bw {x} {y}")
+
+    def build_cart(self, citytile) -> bool:
+        x, y = citytile.pos.x, citytile.pos.y
+        return self._put((x, y), (BUILD_CART, x, y), f"bc {x} {y}")
+
+    def _put(self, key, action, command) -> bool:
+        if key in self._actions:
+            self.dropped.append(action)
+            return False
+        self._actions[key] = action
+        self._commands.append(command)
+        return True
+
+    @property
+    def actions(self) -> List[Tuple]:
+        return list(self._actions.values())
+
+    def has_acted(self, key) -> bool:
+        """
+        whether the unit id or city tile (x, y) already has an action
+        """
+        return key in self._actions
+
+    def commands(self) -> List[str]:
+        """
+        the turn's command strings, actions then annotations; what agent()
+        returns to the engine
+        """
+        return self._commands + self.annotations
+
+    def serialize(self) -> str:
+        """
+        the whole turn as the single line the engine reads
+        """
+        return ",".join(self._commands + self.annotations)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.commands())
+
+    def __len__(self) -> int:
+        return len(self._actions) + len(self.annotations)
@@ -1,56 +1,439 @@
+import copy
 import math
-from typing import List
+from typing import Dict, List, Tuple
 
+import numpy as np
+
+from . import bitboards, distance
+from .paths import PathCache
+from .spatial import PointIndex
 from .constants import Constants
 
 DIRECTIONS = Constants.DIRECTIONS
 RESOURCE_TYPES = Constants.RESOURCE_TYPES
+UNIT_TYPES = Constants.UNIT_TYPES
+
+
+# codes used for resource types in GameMap.resource_type, -1 means no resource
+RESOURCE_TYPE_NAMES = (RESOURCE_TYPES.WOOD, RESOURCE_TYPES.COAL, RESOURCE_TYPES.URANIUM)
+RESOURCE_TYPE_CODES = {name: code for code, name in enumerate(RESOURCE_TYPE_NAMES)}
 
 
 class Resource:
+    __slots__ = ("type", "amount")
+
     def __init__(self, r_type: str, amount: int):
         self.type = r_type
         self.amount = amount
 
 
 class Cell:
-    def __init__(self, x, y):
-        self.pos = Position(x, y)
-        self.resource: Resource = None
-        self.citytile = None
-        self.road = 0
+    """
+    a view onto one cell of a GameMap; resource and road are read from and
+    written to the map's arrays
+    """
+    __slots__ = ("pos", "_map", "_index")
+
+    def __init__(self, x, y, game_map):
+        self.pos = position(x, y)
+        self._map = game_map
+        self._index = y * game_map.width + x
+
+    @property
+    def citytile(self):
+        return self._map._citytiles[self._index]
+
+    @citytile.setter
+    def citytile(self, citytile):
+        self._map._citytiles[self._index] = citytile
+
+    @property
+    def resource(self) -> Resource:
+        code = self._map.resource_type.item(self.pos.y, self.pos.x)
+        if code < 0:
+            return None
+        # a new Resource on every access, so one kept by the caller is a
+        # snapshot that later turns do not change
+        return Resource(RESOURCE_TYPE_NAMES[code], self._map.resource_amount.item(self.pos.y, self.pos.x))
+
+    @resource.setter
+    def resource(self, resource: Resource):
+        if resource is None:
+            self._map.resource_type[self.pos.y, self.pos.x] = -1
+            self._map.resource_amount[self.pos.y, self.pos.x] = 0
+        else:
+            self._map.resource_type[self.pos.y, self.pos.x] = RESOURCE_TYPE_CODES[resource.type]
+            self._map.resource_amount[self.pos.y, self.pos.x] = resource.amount
+
+    @property
+    def road(self) -> float:
+        return self._map.road.item(self.pos.y, self.pos.x)
+
+    @road.setter
+    def road(self, road):
+        self._map.road[self.pos.y, self.pos.x] = road
+
     def has_resource(self):
-        return self.resource is not None and self.resource.amount > 0
+        return self._map.resource_type.item(self.pos.y, self.pos.x) >= 0 and self._map.resource_amount.item(self.pos.y, self.pos.x) > 0
 
 
 class GameMap:
     def __init__(self, width, height):
         self.height = height
         self.width = width
-        self.map: List[List[Cell]] = [None] * height
-        for y in range(0, self.height):
-            self.map[y] = [None] * width
-            for x in range(0, self.width):
-                self.map[y][x] = Cell(x, y)
+        _extend_position_pool(width, height)
+        self.neighbor_table = neighbor_table(width, height)
+        # per-cell state planes indexed [y, x], filled in directly by Game._update
+        self.resource_type = np.full((height, width), -1, dtype=np.int8)
+        self.resource_amount = np.zeros((height, width), dtype=np.int32)
+        self.citytile_team = np.full((height, width), -1, dtype=np.int8)
+        # interned id (Game.city_ids) of the city owning each citytile
+        self.city_index = np.full((height, width), -1, dtype=np.int16)
+        self.road = np.zeros((height, width), dtype=np.float64)
+        self.unit_count = np.zeros((2, height, width), dtype=np.int16)
+        # lowest cooldown of the units on each cell, inf where there are none
+        self.unit_cooldown = np.full((height, width), np.inf, dtype=np.float64)
+        # citytile on each cell by flat index y * width + x
+        self._citytiles: list = [None] * (width * height)
+        # flat indices given a citytile since the last reset
+        self._citytile_indices: List[int] = []
+        # Cell views, created the first time each one is asked for
+        self._cells: List[Cell] = [None] * (width * height)
+        # the rows of Cells returned by map, built on first use after a reset
+        self._grid: List[List[Cell]] = None
+        # distance fields computed since the last reset, see distance_field
+        self._distance_fields: Dict[tuple, np.ndarray] = {}
+        # team -> city_distance(team) since the last reset
+        self._city_distances: Dict[int, np.ndarray] = {}
+        # travel-time fields kept across turns and repaired as the map changes,
+        # and the ones brought up to date since the last reset, see
+        # city_travel_time
+        self._dynamic_fields: Dict[tuple, distance.DynamicField] = {}
+        self._travel_times: Dict[tuple, np.ndarray] = {}
+        # PointIndex per point set since the last reset, see resource_points
+        self._point_indexes: Dict[tuple, PointIndex] = {}
+        # bitboard per occupancy layer since the last reset, see unit_board
+        self._bitboards: Dict[tuple, int] = {}
+        # resource clusters, labelled the first time they are asked for and then
+        # kept up to date by Game._update
+        self._clusters = None
+        # shortest paths kept across turns, see paths
+        self._paths = None
+
+    @property
+    def map(self) -> List[List[Cell]]:
+        if self._grid is None:
+            self._grid = [[self.get_cell(x, y) for x in range(self.width)] for y in range(self.height)]
+        return self._grid
+
+    @property
+    def clusters(self):
+        """
+        the connected clusters of resource cells, see lux.clusters
+        """
+        if self._clusters is None:
+            # imported here as lux.clusters builds on this module
+            from .clusters import ResourceClusters
+            self._clusters = ResourceClusters(self)
+        return self._clusters
+
+    @property
+    def paths(self):
+        """
+        the shortest paths cached across turns, see lux.paths
+        """
+        if self._paths is None:
+            self._paths = PathCache(self)
+        return self._paths
+
+    def clone(self) -> 'GameMap':
+        """
+        a copy of this map with its own state planes; its Cell views are created
+        lazily, so the copy costs little more than copying the arrays
+        """
+        clone = GameMap.__new__(GameMap)
+        clone.height = self.height
+        clone.width = self.width
+        clone.neighbor_table = self.neighbor_table
+        clone.resource_type = self.resource_type.copy()
+        clone.resource_amount = self.resource_amount.copy()
+        clone.citytile_team = self.citytile_team.copy()
+        clone.city_index = self.city_index.copy()
+        clone.road = self.road.copy()
+        clone.unit_count = self.unit_count.copy()
+        clone.unit_cooldown = self.unit_cooldown.copy()
+        clone._citytiles = self._citytiles.copy()
+        clone._citytile_indices = self._citytile_indices.copy()
+        clone._cells = [None] * (self.width * self.height)
+        clone._grid = None
+        clone._distance_fields = {}
+        clone._city_distances = {}
+        # a DynamicField never changes the arrays it holds, so a shallow copy
+        # can be repaired independently of the original
+        clone._dynamic_fields = {key: copy.copy(field) for key, field in self._dynamic_fields.items()}
+        clone._travel_times = {}
+        clone._point_indexes = {}
+        clone._bitboards = {}
+        clone._clusters = None
+        clone._paths = None
+        return clone
 
     def get_cell_by_pos(self, pos) -> Cell:
-        return self.map[pos.y][pos.x]
+        return self.get_cell(pos.x, pos.y)
 
     def get_cell(self, x, y) -> Cell:
-        return self.map[y][x]
+        cell = self._cells[y * self.width + x]
+        if cell is None:
+            cell = self._cells[y * self.width + x] = Cell(x, y, self)
+        return cell
+
+    def neighbors(self, x, y) -> Tuple['Position', ...]:
+        """
+        the on-board neighbours of (x, y), west, east, north then south. The
+        tuple is shared, do not modify it.
+        """
+        return self.neighbor_table.positions[y * self.width + x]
+
+    def distance_field(self, sources, team, unit_type=UNIT_TYPES.WORKER, blocked=None, roads=True) -> np.ndarray:
+        """
+        travel time in turns for a unit of team and unit_type from every cell to
+        the nearest of sources, (x, y) tuples or Positions, indexed [y, x]; see
+        lux.distance. blocked is a boolean [y, x] array of cells units cannot
+        enter and defaults to the opponent's city tiles. Fields are cached until
+        the next update and are read-only, so every unit can share them.
+        """
+        sources = tuple(sorted({(s.x, s.y) if isinstance(s, Position) else tuple(s) for s in sources}))
+        key = (sources, team, unit_type, roads, None if blocked is None else blocked.tobytes())
+        field = self._distance_fields.get(key)
+        if field is None:
+            if blocked is None:
+                blocked = distance.blocked_cells(self, team)
+            costs = distance.step_costs(self, unit_type, roads)
+            field = distance.distance_field(sources, costs, blocked)
+            field.flags.writeable = False
+            self._distance_fields[key] = field
+        return field
+
+    def city_distance(self, team) -> np.ndarray:
+        """
+        Manhattan distance from every cell to the nearest city tile of team,
+        indexed [y, x], inf everywhere if team has none. Cached until the next
+        update and read-only.
+        """
+        field = self._city_distances.get(team)
+        if field is None:
+            field = distance.manhattan_field(self.citytile_team == team)
+            field.flags.writeable = False
+            self._city_distances[team] = field
+        return field
+
+    def city_travel_time(self, team, unit_type=UNIT_TYPES.WORKER) -> np.ndarray:
+        """
+        travel time in turns for a unit of team and unit_type from every cell to
+        the nearest city tile of team, as distance_field gives it. The field is
+        kept from turn to turn and only the cells the map's changes reach are
+        recomputed, see lux.distance.DynamicField. Read-only.
+        """
+        return self._travel_time(("citytiles", team, unit_type), lambda: self.citytile_team == team)
+
+    def resource_travel_time(self, team, r_type, unit_type=UNIT_TYPES.WORKER) -> np.ndarray:
+        """
+        travel time in turns for a unit of team and unit_type from every cell to
+        the nearest cell holding r_type, kept up to date like city_travel_time
+        """
+        code = RESOURCE_TYPE_CODES[r_type]
+        return self._travel_time(
+            ("resources", team, r_type, unit_type), lambda: (self.resource_type == code) & (self.resource_amount > 0)
+        )
+
+    def _travel_time(self, key, make_sources) -> np.ndarray:
+        field = self._travel_times.get(key)
+        if field is None:
+            team, unit_type = key[1], key[-1]
+            sources = make_sources()
+            costs = distance.step_costs(self, unit_type)
+            blocked = distance.blocked_cells(self, team)
+            dynamic = self._dynamic_fields.get(key)
+            if dynamic is None:
+                dynamic = self._dynamic_fields[key] = distance.DynamicField(self, sources, costs, blocked)
+                field = dynamic.field
+            else:
+                field = dynamic.update(sources, costs, blocked)
+            self._travel_times[key] = field
+        return field
+
+    def resource_points(self, r_type=None) -> PointIndex:
+        """
+        the cells holding r_type, or any resource if r_type is None, as a
+        PointIndex of their Positions. Like the other point indexes it is built
+        once per turn and shared.
+        """
+        if r_type is None:
+            return self._points(("resources",), self._has_resource)
+        code = RESOURCE_TYPE_CODES[r_type]
+        return self._points(("resources", r_type), lambda: (self.resource_type == code) & (self.resource_amount > 0))
+
+    def citytile_points(self, team) -> PointIndex:
+        """
+        the city tiles of team as a PointIndex of their Positions
+        """
+        return self._points(("citytiles", team), lambda: self.citytile_team == team)
+
+    def buildable_points(self) -> PointIndex:
+        """
+        the cells a city tile could be built on, with no resource and no city
+        tile, as a PointIndex of their Positions
+        """
+        return self._points(("buildable",), self._buildable)
+
+    def _points(self, key, make_mask) -> PointIndex:
+        """
+        the cached PointIndex for key, built from the cells make_mask() sets
+        """
+        index = self._point_indexes.get(key)
+        if index is None:
+            index = self._point_indexes[key] = PointIndex(self.width, self.height)
+            ys, xs = np.nonzero(make_mask())
+            for x, y in zip(xs.tolist(), ys.tolist()):
+                index.add(x, y, position(x, y))
+        return index
+
+    def unit_board(self, team) -> int:
+        """
+        the cells holding a unit of team as a bitboard, see lux.bitboards. Like
+        the other layers it is built once per turn and shared.
+        """
+        return self._board(("units", team), lambda: self.unit_count[team] > 0)
+
+    def citytile_board(self, team) -> int:
+        """
+        the city tiles of team as a bitboard
+        """
+        return self._board(("citytiles", team), lambda: self.citytile_team == team)
+
+    def resource_board(self) -> int:
+        """
+        the cells holding any resource as a bitboard
+        """
+        return self._board(("resources",), self._has_resource)
+
+    def buildable_board(self) -> int:
+        """
+        the cells a city tile could be built on, with no resource and no city
+        tile, as a bitboard
+        """
+        return self._board(("buildable",), self._buildable)
+
+    def _has_resource(self) -> np.ndarray:
+        return (self.resource_type >= 0) & (self.resource_amount > 0)
+
+    def _buildable(self) -> np.ndarray:
+        return ~self._has_resource() & (self.citytile_team < 0)
+
+    def _board(self, key, make_mask) -> int:
+        """
+        the cached bitboard for key, built from the cells make_mask() sets
+        """
+        board = self._bitboards.get(key)
+        if board is None:
+            board = self._bitboards[key] = bitboards.from_mask(make_mask())
+        return board
 
     def _setResource(self, r_type, x, y, amount):
         """
         do not use this function, this is for internal tracking of state
         """
-        cell = self.get_cell(x, y)
-        cell.resource = Resource(r_type, amount)
+        self.resource_type[y, x] = RESOURCE_TYPE_CODES[r_type]
+        self.resource_amount[y, x] = amount
+
+    def _setCityTile(self, x, y, citytile, city_index=-1):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        index = y * self.width + x
+        self._citytiles[index] = citytile
+        self.citytile_team[y, x] = citytile.team
+        self.city_index[y, x] = city_index
+        self._citytile_indices.append(index)
+
+    def _setRoad(self, x, y, road):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self.road[y, x] = road
+
+    def _setResources(self, r_types, xs, ys, amounts):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self.resource_type[ys, xs] = [RESOURCE_TYPE_CODES[r_type] for r_type in r_types]
+        self.resource_amount[ys, xs] = amounts
+
+    def _setCityTiles(self, citytiles, city_indices):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        for citytile, city_index in zip(citytiles, city_indices):
+            self._setCityTile(citytile.pos.x, citytile.pos.y, citytile, city_index)
+
+    def _setRoads(self, xs, ys, roads):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self.road[ys, xs] = roads
+
+    def _setUnits(self, teams, xs, ys, cooldowns):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        np.add.at(self.unit_count, (teams, ys, xs), 1)
+        np.minimum.at(self.unit_cooldown, (ys, xs), cooldowns)
+
+    def _reset(self):
+        """
+        do not use this function, this is for internal tracking of state
+
+        clears the per-turn state (resources, citytiles, roads, units) so the map
+        can be refilled by the next update
+        """
+        self.resource_type.fill(-1)
+        self.resource_amount.fill(0)
+        self.citytile_team.fill(-1)
+        self.city_index.fill(-1)
+        self.road.fill(0)
+        self.unit_count.fill(0)
+        self.unit_cooldown.fill(np.inf)
+        for index in self._citytile_indices:
+            self._citytiles[index] = None
+        self._citytile_indices.clear()
+        self._grid = None
+        self._distance_fields.clear()
+        self._city_distances.clear()
+        self._travel_times.clear()
+        self._point_indexes.clear()
+        self._bitboards.clear()
 
 
 class Position:
+    """
+    an immutable, hashable board position. Use position(x, y) to get the shared
+    instance for a cell instead of allocating a new one.
+    """
+    __slots__ = ("x", "y", "_hash")
+
     def __init__(self, x, y):
-        self.x = x
-        self.y = y
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+        object.__setattr__(self, "_hash", hash((x, y)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Position is immutable")
+
+    def __reduce__(self):
+        return (Position, (self.x, self.y))
+
+    def __hash__(self) -> int:
+        return self._hash
 
     def __sub__(self, pos) -> int:
         return abs(pos.x - self.x) + abs(pos.y - self.y)
@@ -65,38 +448,29 @@ class Position:
         return (self - pos) <= 1
 
     def __eq__(self, pos) -> bool:
+        if not isinstance(pos, Position):
+            return NotImplemented
         return self.x == pos.x and self.y == pos.y
 
     def equals(self, pos):
         return self == pos
 
     def translate(self, direction, units) -> 'Position':
-        if direction == DIRECTIONS.NORTH:
-            return Position(self.x, self.y - units)
-        elif direction == DIRECTIONS.EAST:
-            return Position(self.x + units, self.y)
-        elif direction == DIRECTIONS.SOUTH:
-            return Position(self.x, self.y + units)
-        elif direction == DIRECTIONS.WEST:
-            return Position(self.x - units, self.y)
-        elif direction == DIRECTIONS.CENTER:
-            return Position(self.x, self.y)
+        step = _DIRECTION_STEPS.get(direction)
+        if step is None:
+            return None
+        return position(self.x + step[0] * units, self.y + step[1] * units)
 
     def direction_to(self, target_pos: 'Position') -> DIRECTIONS:
         """
         Return closest position to target_pos from this position
         """
-        check_dirs = [
-            DIRECTIONS.NORTH,
-            DIRECTIONS.EAST,
-            DIRECTIONS.SOUTH,
-            DIRECTIONS.WEST,
-        ]
-        closest_dist = self.distance_to(target_pos)
+        x, y = self.x, self.y
+        tx, ty = target_pos.x, target_pos.y
+        closest_dist = abs(tx - x) + abs(ty - y)
         closest_dir = DIRECTIONS.CENTER
-        for direction in check_dirs:
-            newpos = self.translate(direction, 1)
-            dist = target_pos.distance_to(newpos)
+        for direction, dx, dy in _CHECK_STEPS:
+            dist = abs(tx - x - dx) + abs(ty - y - dy)
             if dist < closest_dist:
                 closest_dir = direction
                 closest_dist = dist
@@ -104,3 +478,97 @@ class Position:
 
     def __str__(self) -> str:
         return f"({self.x}, {self.y})"
+
+
+_DIRECTION_STEPS = {
+    DIRECTIONS.NORTH: (0, -1),
+    DIRECTIONS.EAST: (1, 0),
+    DIRECTIONS.SOUTH: (0, 1),
+    DIRECTIONS.WEST: (-1, 0),
+    DIRECTIONS.CENTER: (0, 0),
+}
+# the order direction_to tries moves in, which decides ties
+_CHECK_STEPS = tuple(
+    (direction, *_DIRECTION_STEPS[direction])
+    for direction in (DIRECTIONS.NORTH, DIRECTIONS.EAST, DIRECTIONS.SOUTH, DIRECTIONS.WEST)
+)
+
+# shared Positions for every cell of the largest board seen so far, [y][x]
+_POSITION_POOL: List[List[Position]] = []
+
+
+def _extend_position_pool(width, height):
+    old_width = len(_POSITION_POOL[0]) if _POSITION_POOL else 0
+    width = max(width, old_width)
+    for y, row in enumerate(_POSITION_POOL):
+        row.extend(Position(x, y) for x in range(old_width, width))
+    for y in range(len(_POSITION_POOL), height):
+        _POSITION_POOL.append([Position(x, y) for x in range(width)])
+
+
+def position(x, y) -> Position:
+    """
+    the shared Position for (x, y), or a new one if (x, y) is off every board
+    seen so far
+    """
+    if x >= 0 and y >= 0:
+        try:
+            return _POSITION_POOL[y][x]
+        except IndexError:
+            pass
+    return Position(x, y)
+
+
+class NeighborTable:
+    """
+    the neighbours of every cell of a width x height board by flat index
+    y * width + x. Use neighbor_table(width, height) to get the shared table for
+    a board size.
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        size = width * height
+        _extend_position_pool(width, height)
+        # flat indices of the on-board neighbours of each cell
+        self.indices: List[Tuple[int, ...]] = []
+        # the same neighbours as pooled Positions
+        self.positions: List[Tuple[Position, ...]] = []
+        # one column per step in _NEIGHBOR_STEPS, size where the step leaves the
+        # board, so a plane padded with one extra value can be gathered in one go
+        self.padded = np.full((size, len(_NEIGHBOR_STEPS)), size, dtype=np.intp)
+        for y in range(height):
+            for x in range(width):
+                indices = []
+                for column, (dx, dy) in enumerate(_NEIGHBOR_STEPS):
+                    nx, ny = x + dx, y + dy
+                    if 0 <= nx < width and 0 <= ny < height:
+                        indices.append(ny * width + nx)
+                        self.padded[y * width + x, column] = ny * width + nx
+                self.indices.append(tuple(indices))
+                self.positions.append(tuple(position(i % width, i // width) for i in indices))
+
+    def gather(self, plane, fill=0) -> np.ndarray:
+        """
+        the values of plane (indexed [y, x]) on the neighbours of every cell, as
+        a (height, width, 4) array in _NEIGHBOR_STEPS order with fill wherever
+        the neighbour is off the board
+        """
+        flat = np.append(plane.ravel(), np.asarray(fill, dtype=plane.dtype))
+        return flat[self.padded].reshape(self.height, self.width, len(_NEIGHBOR_STEPS))
+
+
+# west, east, north, south: the order the bots' get_adjacent_cells used
+_NEIGHBOR_STEPS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+_NEIGHBOR_TABLES: Dict[Tuple[int, int], NeighborTable] = {}
+
+
+def neighbor_table(width, height) -> NeighborTable:
+    """
+    the shared NeighborTable for a board size, built the first time it is asked for
+    """
+    table = _NEIGHBOR_TABLES.get((width, height))
+    if table is None:
+        table = _NEIGHBOR_TABLES[(width, height)] = NeighborTable(width, height)
+    return table
@@ -0,0 +1,198 @@
+"""
+Cooperative pathfinding for one team's units, in the style of windowed
+hierarchical cooperative A* (WHCA*).
+
+Units are planned one after another. Each searches space-time, (cell, turn),
+up to a short window, avoiding the cells the units planned before it reserved
+for each turn, and estimates the rest of the way with Manhattan distance or,
+with exact=True, its travel time from GameMap.distance_field. Exact estimates
+steer around opponent cities outside the window but cost one distance field
+per target, too much for a large army. Friendly city tiles are never reserved, since any
+number of units may stand on them. Plans are redone every turn; only their
+first step is acted on.
+"""
+import heapq
+from typing import Dict, Tuple
+
+from . import distance
+from .constants import Constants
+
+DIRECTIONS = Constants.DIRECTIONS
+
+# turns looked ahead by Pathfinder.plan; longer windows cost more and, with
+# plans redone every turn, barely change the first step
+DEFAULT_HORIZON = 4
+
+_STEP_DIRECTIONS = {
+    (0, -1): DIRECTIONS.NORTH,
+    (1, 0): DIRECTIONS.EAST,
+    (0, 1): DIRECTIONS.SOUTH,
+    (-1, 0): DIRECTIONS.WEST,
+}
+
+
+class Pathfinder:
+    """
+    plans collision-free moves for the units of team on game_map for one turn
+    """
+    def __init__(self, game_map, team, horizon=DEFAULT_HORIZON, exact=False):
+        self.map = game_map
+        self.team = team
+        self.horizon = horizon
+        # estimate the way beyond the window with GameMap.distance_field instead
+        # of Manhattan distance
+        self.exact = exact
+        self.width = game_map.width
+        self._adjacent = game_map.neighbor_table.indices
+        self._own_cities = game_map.citytile_team == team
+        self._stackable = self._own_cities.ravel().tolist()
+        self._blocked = distance.blocked_cells(game_map, team)
+        # allow_city -> (blocked array, the same as a flat list), built once per
+        # turn rather than once per unit
+        self._blocked_by_kind = {}
+        self._step_costs = {}
+        # (flat index, turn) -> id of the unit that will be there
+        self.reserved: Dict[Tuple[int, int], str] = {}
+
+    def block(self, x, y):
+        """
+        keep every unit off (x, y), e.g. because an opponent's unit stands there
+        """
+        self._blocked[y, x] = True
+        self._blocked_by_kind.clear()
+
+    def hold(self, unit, turns=None):
+        """
+        reserve the cell unit stands on for the next turns turns (the whole
+        window by default). Hold every unit before planning any, so units
+        planned early do not walk into units planned later; plan releases the
+        unit's own hold.
+        """
+        index = unit.pos.y * self.width + unit.pos.x
+        if self._stackable[index]:
+            return
+        last = self.horizon if turns is None else min(turns, self.horizon)
+        for turn in range(last + 1):
+            self.reserved.setdefault((index, turn), unit.id)
+
+    def plan(self, unit, target, allow_city=True) -> str:
+        """
+        plan unit's way to target, (x, y) or a Position, reserve it and return
+        the direction to move in this turn (DIRECTIONS.CENTER to stay). Units
+        that may not enter friendly city tiles on the way pass allow_city=False.
+        """
+        width = self.width
+        horizon = self.horizon
+        reserved = self.reserved
+        stackable = self._stackable
+        uid = unit.id
+        start = unit.pos.y * width + unit.pos.x
+        tx, ty = (target.x, target.y) if hasattr(target, "x") else target
+        goal = ty * width + tx
+        for turn in range(horizon + 1):
+            if reserved.get((start, turn)) == uid:
+                del reserved[(start, turn)]
+        if start == goal:
+            self._reserve_stay(uid, start, 0)
+            return DIRECTIONS.CENTER
+
+        blocked, is_blocked = self._blocked_cells(allow_city)
+        cost, cheapest = self._costs(unit.type)
+        if self.exact:
+            field = self.map.distance_field([(tx, ty)], self.team, unit.type, blocked=blocked).ravel().tolist()
+            field[start] = min((field[n] + cost[n] for n in self._adjacent[start]), default=distance.UNREACHABLE)
+            estimate = field.__getitem__
+        else:
+            def estimate(index):
+                return (abs(index % width - tx) + abs(index // width - ty)) * cheapest
+
+        def free(index, first, last):
+            if stackable[index]:
+                return True
+            for turn in range(first, min(last, horizon) + 1):
+                claim = reserved.get((index, turn))
+                if claim is not None and claim != uid:
+                    return False
+            return True
+
+        # a unit on cooldown cannot move until it drops below 1
+        ready = min(int(unit.cooldown), horizon)
+        if estimate(start) == distance.UNREACHABLE or not free(start, 0, ready):
+            self._reserve_stay(uid, start, 0)
+            return DIRECTIONS.CENTER
+        # heap entries are (estimated arrival, -turns so far, order, cell, turn):
+        # among equally good states the one furthest along is expanded first,
+        # then the one found first
+        order = 0
+        heap = [(ready + estimate(start), -ready, order, start, ready)]
+        parents = {(start, ready): None}
+        end = None
+        while heap:
+            _, elapsed, _, index, turn = heapq.heappop(heap)
+            if (index == goal and free(index, turn, horizon)) or turn >= horizon:
+                end = (index, turn)
+                break
+            elapsed = -elapsed
+            moves = [(index, 1)]
+            # a unit may always come back to the cell it started on, e.g. a
+            # friendly city tile it is not allowed to walk through
+            moves.extend((n, cost[n]) for n in self._adjacent[index] if not is_blocked[n] or n == start)
+            for neighbor, steps in moves:
+                arrival = min(turn + steps, horizon)
+                state = (neighbor, arrival)
+                if state in parents or not free(neighbor, turn + 1, arrival):
+                    continue
+                remaining = estimate(neighbor)
+                if remaining == distance.UNREACHABLE:
+                    continue
+                parents[state] = (index, turn)
+                order += 1
+                heapq.heappush(heap, (elapsed + steps + remaining, -(elapsed + steps), order, neighbor, arrival))
+        if end is None:
+            self._reserve_stay(uid, start, 0)
+            return DIRECTIONS.CENTER
+
+        path = [end]
+        while parents[path[-1]] is not None:
+            path.append(parents[path[-1]])
+        path.reverse()
+        self._reserve_stay(uid, start, 0, ready)
+        for (_, turn), (index, arrival) in zip(path, path[1:]):
+            self._reserve_stay(uid, index, turn + 1, arrival)
+        if end[0] == goal:
+            self._reserve_stay(uid, goal, end[1])
+
+        # only a step taken on turn 0 is a move to make now
+        first_index = path[1][0] if len(path) > 1 else start
+        if first_index == start or path[0][1] != 0:
+            return DIRECTIONS.CENTER
+        step = (first_index % width - unit.pos.x, first_index // width - unit.pos.y)
+        return _STEP_DIRECTIONS[step]
+
+    def _blocked_cells(self, allow_city):
+        """
+        the cells a unit may not step onto, as an array and as a flat list
+        """
+        kind = self._blocked_by_kind.get(allow_city)
+        if kind is None:
+            blocked = self._blocked if allow_city else self._blocked | self._own_cities
+            kind = self._blocked_by_kind[allow_city] = (blocked, blocked.ravel().tolist())
+        return kind
+
+    def _costs(self, unit_type):
+        """
+        turns to step onto each cell for unit_type, by flat index, and the fewest
+        turns any step takes
+        """
+        costs = self._step_costs.get(unit_type)
+        if costs is None:
+            flat = distance.step_costs(self.map, unit_type).ravel().tolist()
+            costs = self._step_costs[unit_type] = (flat, min(flat))
+        return costs
+
+    def _reserve_stay(self, uid, index, first, last=None):
+        if self._stackable[index]:
+            return
+        last = self.horizon if last is None else min(last, self.horizon)
+        for turn in range(first, last + 1):
+            self.reserved.setdefault((index, turn), uid)
@@ -3,7 +3,7 @@ from lux.game import Game
 from lux.game_map import Cell, RESOURCE_TYPES
 from lux.constants import Constants
 from lux.game_constants import GAME_CONSTANTS
-from lux import annotate
+from lux import annotate, assignment, heatmaps
 import logging
 
 logging.basicConfig(filename='agent.log', level=logging.INFO)
@@ -14,52 +14,17 @@ TARGET_LOCS = {}
 UNIT_LOCATIONS = {}
 
 
-def get_resource_cells(m):
-    width, height = m.width, m.height
-    resource_tiles: list[Cell] = []
-    for y in range(height):
-        for x in range(width):
-            cell = m.get_cell(x, y)
-            if cell.has_resource():
-                resource_tiles.append(cell)
-    return resource_tiles
-
 def get_adjacent_cells(cell, m):
-    adj_cells: list[Cell] = []
-    x, y = cell.pos.x, cell.pos.y
-    if x > 0:
-        adj_cells.append(m.get_cell(x-1,y))
-    if x < (m.width-1):
-        adj_cells.append(m.get_cell(x+1,y))
-    if y > 0:
-        adj_cells.append(m.get_cell(x,y-1))
-    if y < (m.width-1):
-        adj_cells.append(m.get_cell(x,y+1))
+    adj_cells: list[Cell] = [m.get_cell(pos.x, pos.y) for pos in m.neighbors(cell.pos.x, cell.pos.y)]
     return adj_cells
 
-def get_cell_value(cell, p):
-    if not cell.has_resource():
-        return 0
-    if cell.resource.type == Constants.RESOURCE_TYPES.COAL:
-        if not p.researched_coal():
-            return 0
-        else:
-            return 50
-    if cell.resource.type == Constants.RESOURCE_TYPES.URANIUM:
-        if not p.researched_uranium():
-            return 0
-        else:
-            return 80
-    return 20
-
 def get_map_values(m, p):
-    width, height = m.width, m.height
+    # value of the resources in each cell and its four neighbours
+    values = heatmaps.convolve(heatmaps.resource_value(m, p), heatmaps.CROSS)
     d = {}
-    for y in range(height):
-        for x in range(width):
-            adj = get_adjacent_cells(m.get_cell(x,y), m)
-            adj.append(m.get_cell(x,y))
-            d[(x,y)] = sum([get_cell_value(cell, p) for cell in adj])
+    for y, row in enumerate(values.tolist()):
+        for x, value in enumerate(row):
+            d[(x,y)] = value
     return d
 
 def cities_powered(p):
@@ -138,26 +103,6 @@ def take_step(u, target, m, allow_city):
                     return u.move(DIRECTIONS.EAST)
     return None
 
-def get_gather_target(u, p, m, resource_tiles, allow_city, values):
-    best_val = 0.0
-    best_tile = None
-    taken_targets = [TARGET_LOCS[id] for id in TARGET_LOCS.keys() if id != u.id]
-    for tile in values.keys():
-        if tile in taken_targets:
-            continue
-        if not allow_city:
-            if m.get_cell(tile[0], tile[1]).citytile is not None:
-                continue
-        dist = abs(u.pos.x - tile[0]) + abs(u.pos.y - tile[1])
-        if dist < 10:
-            val = 1.0 * values[tile] / math.log(dist + 2)
-            if val > best_val:
-                best_val = val
-                best_tile = m.get_cell(tile[0], tile[1])
-    if best_tile is not None:
-        return get_coords(best_tile)
-    return None
-
 def find_home(u, p, m):
     if m.get_cell_by_pos(u.pos).citytile is not None:
         return None
@@ -217,6 +162,11 @@ def agent(observation, configuration):
     else:
         game_state._update(observation["updates"])
 
+    # forget units that died since last turn
+    for unitid in game_state.delta.units_died:
+        TARGET_LOCS.pop(unitid, None)
+        UNIT_LOCATIONS.pop(unitid, None)
+
     starting_locs = {}
     
     actions = []
@@ -226,12 +176,12 @@ def agent(observation, configuration):
     opponent = game_state.players[(observation.player + 1) % 2]
     width, height = game_state.map.width, game_state.map.height
 
-    resource_tiles = get_resource_cells(game_state.map)
     unit_count = len(player.units)
     map_values = get_map_values(game_state.map, player)
     day_cycle = game_state.turn % 40
     allow_cities = {}
     ids_to_skip = []
+    gatherers = []
 
     # we iterate over all our units and do something with them
     for unit in player.units:
@@ -249,10 +199,8 @@ def agent(observation, configuration):
             elif not unit.can_act():
                 continue
             elif unit.get_cargo_space_left() > 0:
-                if unit_count > 2:
-                    target = get_gather_target(unit, player, game_state.map, resource_tiles, True, map_values)
-                else:
-                    target = get_gather_target(unit, player, game_state.map, resource_tiles, False, map_values)
+                gatherers.append((unit, unit_count > 2))
+                continue
             elif cities_powered(player) or player.city_tile_count == 0:
                 target = get_build_loc(unit, player, game_state.map) 
                 allow_city = False
@@ -264,7 +212,12 @@ def agent(observation, configuration):
             else:
                 actions.append(target)
                 ids_to_skip.append(unit.id)
-    
+    for unitid, target in assignment.gather_targets(gatherers, game_state.map, map_values, TARGET_LOCS, 9).items():
+        if target is not None:
+            TARGET_LOCS[unitid] = target
+        else:
+            ids_to_skip.append(unitid)
+
     moves_happened = True
     logging.info(f"TURN {game_state.turn}")
     logging.info(f"{[x.id for x in player.units]}")
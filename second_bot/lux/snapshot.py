@@ -0,0 +1,146 @@
+"""
+Compact binary snapshots of a Game.
+
+A snapshot is a fixed little-endian header followed by packed records for the
+units, cities, city tiles, resources and roads, then the id table, in that
+order:
+
+    header | units | cities | city tiles | resources | roads | ids
+
+Unit and city ids are stored as indices into the id table, the snapshot's unit
+ids then city ids joined by spaces (ids come from space-separated observation
+lines, so none contains a space), so ids of any format round-trip. Cooldowns
+and roads are stored as float32, which holds every value the engine sends
+exactly; fuel and light upkeep are float64. Snapshots can be written back to
+back into one file; Snapshot reads one without copying and iter_snapshots walks
+a buffer of them.
+"""
+import struct
+from typing import Iterator, List
+
+import numpy as np
+
+MAGIC = b"LUXS"
+VERSION = 2
+
+# magic, version, total size in bytes, game id, turn, width, height,
+# research points of both teams, the record count of every section, then the
+# size in bytes of the id table
+HEADER = struct.Struct("<4sHIhhHHii5II")
+
+UNIT_DTYPE = np.dtype([
+    ("team", "u1"), ("type", "u1"), ("id", "<u4"), ("x", "u1"), ("y", "u1"),
+    ("cooldown", "<f4"), ("wood", "<i4"), ("coal", "<i4"), ("uranium", "<i4"),
+])
+CITY_DTYPE = np.dtype([("team", "u1"), ("id", "<u4"), ("fuel", "<f8"), ("light_upkeep", "<f8")])
+CITYTILE_DTYPE = np.dtype([("team", "u1"), ("city_id", "<u4"), ("x", "u1"), ("y", "u1"), ("cooldown", "<f4")])
+RESOURCE_DTYPE = np.dtype([("type", "i1"), ("x", "u1"), ("y", "u1"), ("amount", "<i4")])
+ROAD_DTYPE = np.dtype([("x", "u1"), ("y", "u1"), ("road", "<f4")])
+
+SECTIONS = (
+    ("units", UNIT_DTYPE),
+    ("cities", CITY_DTYPE),
+    ("citytiles", CITYTILE_DTYPE),
+    ("resources", RESOURCE_DTYPE),
+    ("roads", ROAD_DTYPE),
+)
+
+
+def pack(game) -> bytes:
+    """
+    serialize the current state of game
+    """
+    cities = [c for p in game.players for c in p.cities.values()]
+    citytiles = [ct for c in cities for ct in c.citytiles]
+
+    tables = [p.unit_table for p in game.players]
+    units = np.empty(sum(len(t) for t in tables), dtype=UNIT_DTYPE)
+    ids = []
+    start = 0
+    for table in tables:
+        rows = slice(start, start + len(table))
+        units["team"][rows] = table.team
+        for name in ("type", "x", "y", "cooldown", "wood", "coal", "uranium"):
+            units[name][rows] = getattr(table, name)
+        ids.extend(table.ids)
+        start += len(table)
+    units["id"] = np.arange(len(units))
+    city_index = {c.cityid: len(ids) + i for i, c in enumerate(cities)}
+    ids.extend(c.cityid for c in cities)
+
+    records = {
+        "units": units,
+        "cities": np.array(
+            [(c.team, city_index[c.cityid], c.fuel, c.light_upkeep) for c in cities],
+            dtype=CITY_DTYPE,
+        ),
+        "citytiles": np.array(
+            [(ct.team, city_index[ct.cityid], ct.pos.x, ct.pos.y, ct.cooldown) for ct in citytiles],
+            dtype=CITYTILE_DTYPE,
+        ),
+    }
+    game_map = game.map
+    ys, xs = np.nonzero(game_map.resource_type >= 0)
+    resources = np.empty(len(xs), dtype=RESOURCE_DTYPE)
+    resources["type"] = game_map.resource_type[ys, xs]
+    resources["x"] = xs
+    resources["y"] = ys
+    resources["amount"] = game_map.resource_amount[ys, xs]
+    records["resources"] = resources
+    ys, xs = np.nonzero(game_map.road)
+    roads = np.empty(len(xs), dtype=ROAD_DTYPE)
+    roads["x"] = xs
+    roads["y"] = ys
+    roads["road"] = game_map.road[ys, xs]
+    records["roads"] = roads
+
+    id_table = " ".join(ids).encode("utf-8")
+    body = b"".join(records[name].tobytes() for name, _ in SECTIONS) + id_table
+    header = HEADER.pack(
+        MAGIC, VERSION, HEADER.size + len(body), game.id, game.turn, game.map_width, game.map_height,
+        game.players[0].research_points, game.players[1].research_points,
+        *(len(records[name]) for name, _ in SECTIONS), len(id_table),
+    )
+    return header + body
+
+
+class Snapshot:
+    """
+    a read-only view of one packed snapshot. The record arrays are views into
+    the buffer it was read from, nothing is copied.
+    """
+    def __init__(self, buffer, offset=0):
+        view = memoryview(buffer)
+        (magic, version, self.size, self.game_id, self.turn, self.width, self.height,
+         rp0, rp1, *counts, id_table_size) = HEADER.unpack_from(view, offset)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} Lux snapshot")
+        self.research_points = (rp0, rp1)
+        position = offset + HEADER.size
+        for (name, dtype), count in zip(SECTIONS, counts):
+            setattr(self, name, np.frombuffer(view, dtype=dtype, count=count, offset=position))
+            position += count * dtype.itemsize
+        self._id_table = view[position:position + id_table_size]
+        self._ids = None
+
+    @property
+    def ids(self) -> List[str]:
+        """
+        the unit and city ids the id fields of the records index, decoded on
+        first access so scans that do not need them skip it
+        """
+        if self._ids is None:
+            self._ids = bytes(self._id_table).decode("utf-8").split(" ") if len(self._id_table) else []
+        return self._ids
+
+
+def iter_snapshots(buffer) -> Iterator[Snapshot]:
+    """
+    yields every snapshot in a buffer of snapshots written back to back
+    """
+    offset = 0
+    while offset < len(buffer):
+        snapshot = Snapshot(buffer, offset)
+        offset += snapshot.size
+        yield snapshot
+
@@ -0,0 +1,276 @@
+"""
+A turn's commands resolved the way the engine plays them, before they are sent.
+
+The engine drops a command it finds invalid and cancels moves that collide,
+without telling the agent. resolve checks each command against the current
+Game as the engine would: the unit or city tile exists and is ours, can act and
+has not been given an action already, a move stays on the board and off the
+opponent's city tiles, a worker building a city carries enough and stands on an
+empty cell, and a city tile only builds units while there are fewer units than
+city tiles. Moves are then resolved together: units moving onto the same cell
+outside a city all stay, two units swapping cells both stay, and a unit moving
+onto a cell where a unit stays stays as well, which can in turn block the units
+moving onto its own cell. Every step is a dict lookup per unit, so a turn costs
+O(units).
+
+The opponent's commands are not known, so its units are taken to stay where
+they are; a move can still fail on the engine because an opposing unit moved
+into its way.
+"""
+from typing import Dict, List, Tuple
+
+from . import game_constants
+from .actions import (
+    ANNOTATION_PREFIX, BUILD_CITY, CITYTILE_COMMANDS, MOVE, PILLAGE, RESEARCH, TRANSFER, actor, decode, encode,
+)
+from .constants import Constants
+
+DIRECTIONS = Constants.DIRECTIONS
+RESOURCE_TYPES = Constants.RESOURCE_TYPES
+
+# (dx, dy) of a move in each direction
+STEPS = {
+    DIRECTIONS.NORTH: (0, -1),
+    DIRECTIONS.EAST: (1, 0),
+    DIRECTIONS.SOUTH: (0, 1),
+    DIRECTIONS.WEST: (-1, 0),
+    DIRECTIONS.CENTER: (0, 0),
+}
+
+_RESOURCE_NAMES = frozenset((RESOURCE_TYPES.WOOD, RESOURCE_TYPES.COAL, RESOURCE_TYPES.URANIUM))
+
+# reasons a command is rejected
+NO_SUCH_UNIT = "no such unit"
+NO_SUCH_CITYTILE = "no such city tile"
+NOT_OWNED = "not ours"
+ALREADY_ACTED = "already given an action"
+COOLDOWN = "on cooldown"
+BAD_COMMAND = "malformed command"
+OFF_MAP = "off the map"
+OPPONENT_CITYTILE = "onto an opponent city tile"
+COLLISION = "collides with another move"
+SWAP = "swaps cells with another unit"
+BLOCKED = "blocked by a unit that stays"
+NOT_WORKER = "not a worker"
+ON_RESOURCE = "on a resource"
+ON_CITYTILE = "on a city tile"
+NOT_ENOUGH_CARGO = "not enough cargo"
+NOT_ADJACENT = "not adjacent"
+NOTHING_TO_TRANSFER = "nothing to transfer"
+UNIT_CAP = "as many units as city tiles"
+
+
+class Resolution:
+    """
+    what the engine would make of a turn's commands
+    """
+    def __init__(self):
+        # action tuples that would succeed, in the order given
+        self.accepted: List[tuple] = []
+        # (action tuple, reason) of the ones that would not
+        self.rejected: List[Tuple[tuple, str]] = []
+        # unit id -> (x, y) at the end of the turn, for every unit of the team
+        self.positions: Dict[str, Tuple[int, int]] = {}
+
+    @property
+    def wasted(self) -> int:
+        return len(self.rejected)
+
+    def commands(self) -> List[str]:
+        """
+        the accepted actions as command strings, to send in place of the turn
+        """
+        return [encode(action) for action in self.accepted]
+
+
+def resolve(game, commands, team=None) -> Resolution:
+    """
+    resolve commands, an ActionBuffer or command strings or action tuples, for
+    team (default game.id) against game as it stands. Annotations are ignored.
+    """
+    if team is None:
+        team = game.id
+    game_map = game.map
+    width, height = game_map.width, game_map.height
+    citytile_team = game_map.citytile_team
+    player = game.players[team]
+    units = player.units_by_id
+    opponent_units = game.players[1 - team].units_by_id
+    parameters = game_constants.PARAMETERS
+
+    result = Resolution()
+    valid = []
+    acted = set()
+    # units built earlier in the turn count towards the cap
+    unit_count = len(player.units)
+    # unit id -> (action, (x, y) from, (x, y) to) of the valid moves that change cell
+    moves: Dict[str, tuple] = {}
+
+    for action in _actions(commands):
+        key = actor(action)
+        if key in acted:
+            result.rejected.append((action, ALREADY_ACTED))
+            continue
+        acted.add(key)
+        code = action[0]
+        if code in CITYTILE_COMMANDS:
+            x, y = key
+            citytile = player.citytiles_by_pos.get(key)
+            if citytile is None:
+                on_map = 0 <= x < width and 0 <= y < height
+                reason = NOT_OWNED if on_map and citytile_team.item(y, x) >= 0 else NO_SUCH_CITYTILE
+            elif not citytile.can_act():
+                reason = COOLDOWN
+            elif code != RESEARCH and unit_count >= player.city_tile_count:
+                reason = UNIT_CAP
+            else:
+                reason = None
+                if code != RESEARCH:
+                    unit_count += 1
+        else:
+            unit = units.get(key)
+            if unit is None:
+                reason = NOT_OWNED if key in opponent_units else NO_SUCH_UNIT
+            elif not unit.can_act():
+                reason = COOLDOWN
+            elif code == MOVE:
+                reason = _check_move(action, unit, width, height, citytile_team, team, moves)
+            elif code == BUILD_CITY:
+                reason = _check_build_city(unit, game_map, parameters)
+            elif code == PILLAGE:
+                if not unit.is_worker():
+                    reason = NOT_WORKER
+                elif citytile_team.item(unit.pos.y, unit.pos.x) >= 0:
+                    reason = ON_CITYTILE
+                else:
+                    reason = None
+            elif code == TRANSFER:
+                reason = _check_transfer(action, unit, units, opponent_units)
+            else:
+                reason = BAD_COMMAND
+        if reason is None:
+            valid.append(action)
+        else:
+            result.rejected.append((action, reason))
+
+    cancelled = _resolve_moves(moves, game, team, citytile_team)
+    for action in valid:
+        reason = cancelled.get(action[1]) if action[0] == MOVE else None
+        if reason is None:
+            result.accepted.append(action)
+        else:
+            result.rejected.append((action, reason))
+
+    for unit in player.units:
+        move = moves.get(unit.id)
+        if move is not None and unit.id not in cancelled:
+            result.positions[unit.id] = move[2]
+        else:
+            result.positions[unit.id] = (unit.pos.x, unit.pos.y)
+    return result
+
+
+def _actions(commands):
+    if hasattr(commands, "actions"):
+        return commands.actions
+    actions = []
+    for command in commands:
+        if isinstance(command, str):
+            if command.startswith(ANNOTATION_PREFIX):
+                continue
+            command = decode(command)
+        actions.append(command)
+    return actions
+
+
+def _check_move(action, unit, width, height, citytile_team, team, moves):
+    if len(action) != 3 or action[2] not in STEPS:
+        return BAD_COMMAND
+    dx, dy = STEPS[action[2]]
+    if dx == 0 and dy == 0:
+        return None
+    x, y = unit.pos.x + dx, unit.pos.y + dy
+    if not (0 <= x < width and 0 <= y < height):
+        return OFF_MAP
+    owner = citytile_team.item(y, x)
+    if owner >= 0 and owner != team:
+        return OPPONENT_CITYTILE
+    moves[unit.id] = (action, (unit.pos.x, unit.pos.y), (x, y))
+    return None
+
+
+def _check_build_city(unit, game_map, parameters):
+    if not unit.is_worker():
+        return NOT_WORKER
+    cell = game_map.get_cell(unit.pos.x, unit.pos.y)
+    if cell.citytile is not None:
+        return ON_CITYTILE
+    if cell.has_resource():
+        return ON_RESOURCE
+    if unit.cargo.wood + unit.cargo.coal + unit.cargo.uranium < parameters.city_build_cost:
+        return NOT_ENOUGH_CARGO
+    return None
+
+
+def _check_transfer(action, unit, units, opponent_units):
+    if len(action) != 5 or action[3] not in _RESOURCE_NAMES:
+        return BAD_COMMAND
+    dest = units.get(action[2])
+    if dest is None or dest is unit:
+        return NOT_OWNED if action[2] in opponent_units else NO_SUCH_UNIT
+    if abs(dest.pos.x - unit.pos.x) + abs(dest.pos.y - unit.pos.y) != 1:
+        return NOT_ADJACENT
+    if action[4] <= 0 or getattr(unit.cargo, action[3]) <= 0:
+        return NOTHING_TO_TRANSFER
+    return None
+
+
+def _resolve_moves(moves, game, team, citytile_team) -> Dict[str, str]:
+    """
+    unit id -> reason for each move in moves the engine would cancel
+    """
+    cancelled: Dict[str, str] = {}
+    if not moves:
+        return cancelled
+    # target cell -> ids of the units moving onto it, and origin cell -> ids of
+    # the units moving off it
+    by_target: Dict[Tuple[int, int], List[str]] = {}
+    by_origin: Dict[Tuple[int, int], List[str]] = {}
+    for unitid, (_, origin, target) in moves.items():
+        by_target.setdefault(target, []).append(unitid)
+        by_origin.setdefault(origin, []).append(unitid)
+
+    def in_city(cell):
+        return citytile_team.item(cell[1], cell[0]) >= 0
+
+    # cells outside cities a unit stays on, whose movers are yet to be blocked
+    staying = []
+    for player in game.players:
+        for unit in player.units:
+            cell = (unit.pos.x, unit.pos.y)
+            if (player.team != team or unit.id not in moves) and not in_city(cell):
+                staying.append(cell)
+
+    def cancel(unitid, reason):
+        if unitid not in cancelled:
+            cancelled[unitid] = reason
+            origin = moves[unitid][1]
+            if not in_city(origin):
+                staying.append(origin)
+
+    for target, unitids in by_target.items():
+        if len(unitids) > 1 and not in_city(target):
+            for unitid in unitids:
+                cancel(unitid, COLLISION)
+    for unitid, (_, origin, target) in moves.items():
+        if in_city(origin) and in_city(target):
+            continue
+        for other in by_origin.get(target, ()):
+            if moves[other][2] == origin:
+                cancel(unitid, SWAP)
+                cancel(other, SWAP)
+
+    while staying:
+        for unitid in by_target.get(staying.pop(), ()):
+            cancel(unitid, BLOCKED)
+    return cancelled
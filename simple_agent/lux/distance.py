@@ -0,0 +1,232 @@
+"""
+Shortest travel time, in turns, from every cell of a GameMap to the nearest of a
+set of source cells.
+
+Moving onto a cell puts a unit on cooldown for its type's UNIT_ACTION_COOLDOWN
+less the road level of that cell, and a unit can act again once its cooldown
+drops below 1, so a step onto a cell costs max(1, floor(cooldown - road)) turns.
+Fields are found by fast sweeping: every row and column is relaxed in both
+directions with vectorized running minimums, and the sweeps are repeated until
+a whole round changes nothing. DynamicField keeps a field from turn to turn and
+repairs only the cells a change reaches.
+"""
+import heapq
+import math
+from typing import Iterable
+
+import numpy as np
+
+from .constants import Constants
+from . import game_constants
+
+UNIT_TYPES = Constants.UNIT_TYPES
+
+# travel time to a cell no source can reach
+UNREACHABLE = math.inf
+
+
+def step_costs(game_map, unit_type=UNIT_TYPES.WORKER, roads=True) -> np.ndarray:
+    """
+    turns it takes a unit of unit_type to step onto each cell, indexed [y, x]
+    """
+    cooldown = game_constants.PARAMETERS.unit_action_cooldown[unit_type]
+    if not roads:
+        return np.full((game_map.height, game_map.width), max(1, cooldown), dtype=np.int64)
+    return np.maximum(1, np.floor(cooldown - game_map.road)).astype(np.int64)
+
+
+def blocked_cells(game_map, team) -> np.ndarray:
+    """
+    cells units of team cannot move onto: the opponent's city tiles
+    """
+    return game_map.citytile_team == (1 - team)
+
+
+def distance_field(sources: Iterable, costs: np.ndarray, blocked: np.ndarray) -> np.ndarray:
+    """
+    travel time in turns from every cell to the nearest (x, y) in sources, as a
+    float array indexed [y, x] holding UNREACHABLE where no source can be reached.
+    costs is the turns to step onto each cell and blocked marks the cells that
+    cannot be stepped onto; sources on blocked cells are never reached.
+    """
+    # stepping onto a blocked cell costs more than any real path, so anything
+    # that far away is unreachable. The sweeps run on int32, whose running
+    # minimums are much faster than float64's.
+    limit = costs.size * int(costs.max()) + 1
+    far = 1 << 28
+    step = np.where(blocked, limit, costs).astype(np.int32)
+    dist = np.full(step.shape, far, dtype=np.int32)
+    for x, y in sources:
+        dist[y, x] = 0
+    dist[blocked] = far
+
+    # running totals of the step costs along every row (axis 1) and column
+    # (axis 0): the cost of walking a straight line is a difference of two
+    # totals, so a whole sweep is one minimum.accumulate
+    sweeps = []
+    for axis, backwards in ((1, np.s_[:, ::-1]), (0, np.s_[::-1])):
+        inclusive = np.cumsum(step, axis=axis, dtype=np.int32)
+        sweeps.append((axis, backwards, inclusive - step, inclusive))
+    minimum = np.minimum.accumulate
+    while True:
+        previous = dist
+        for axis, backwards, exclusive, inclusive in sweeps:
+            # towards increasing index: dist[i] = min(dist[i], dist[i-1] + step[i-1])
+            dist = minimum(dist - exclusive, axis=axis) + exclusive
+            # towards decreasing index: dist[i] = min(dist[i], dist[i+1] + step[i+1])
+            dist = minimum((dist + inclusive)[backwards], axis=axis)[backwards] - inclusive
+        if np.array_equal(dist, previous):
+            break
+    field = dist.astype(np.float64)
+    field[(dist >= limit) | blocked] = UNREACHABLE
+    return field
+
+
+def manhattan_field(sources: np.ndarray) -> np.ndarray:
+    """
+    Manhattan distance from every cell to the nearest cell set in the boolean
+    [y, x] array sources, ignoring obstacles, as a float array holding
+    UNREACHABLE everywhere if no cell is set. A forward and a backward running
+    minimum along each axis is enough for the L1 metric.
+    """
+    if not sources.any():
+        return np.full(sources.shape, UNREACHABLE)
+    height, width = sources.shape
+    dist = np.where(sources, 0, height + width).astype(np.int32)
+    minimum = np.minimum.accumulate
+    for axis, offsets, backwards in (
+        (1, np.arange(width, dtype=np.int32), np.s_[:, ::-1]),
+        (0, np.arange(height, dtype=np.int32)[:, None], np.s_[::-1]),
+    ):
+        # dist[i] = min over k <= i of dist[k] + i - k, then over k >= i of dist[k] + k - i
+        dist = minimum(dist - offsets, axis=axis) + offsets
+        dist = minimum((dist + offsets)[backwards], axis=axis)[backwards] - offsets
+    return dist.astype(np.float64)
+
+
+class DynamicField:
+    """
+    a distance_field kept up to date as its sources, step costs and blocked
+    cells change, by repairing only the cells the changes reach.
+
+    A change that can only make cells nearer (a new source, a cheaper or
+    unblocked cell) is spread outwards from the changed cell with Dijkstra's
+    algorithm. A change that can make cells further (a source removed, a
+    dearer or newly blocked cell) first clears every cell whose distance ran
+    through the changed cell, then refills them from the cells around them.
+    When more than max_changes cells change, or more than max_cleared cells
+    would be cleared, the field is computed in full instead.
+    """
+    def __init__(self, game_map, sources, costs, blocked, max_changes=None, max_cleared=None):
+        size = costs.size
+        self.shape = costs.shape
+        self._adjacent = game_map.neighbor_table.indices
+        self.max_changes = size // 16 if max_changes is None else max_changes
+        self.max_cleared = size // 4 if max_cleared is None else max_cleared
+        # how often update repaired the field and how often it fell back
+        self.repairs = 0
+        self.recomputes = 0
+        self._recompute(sources, costs, blocked)
+
+    def update(self, sources, costs, blocked) -> np.ndarray:
+        """
+        bring the field up to date with sources, a boolean [y, x] array, costs
+        and blocked, as for distance_field, and return it
+        """
+        changed = np.flatnonzero(
+            (sources != self._sources) | (costs != self._costs) | (blocked != self._blocked)
+        ).tolist()
+        if not changed:
+            return self.field
+        if len(changed) > self.max_changes or not self._repair(changed, sources, costs, blocked):
+            self._recompute(sources, costs, blocked)
+        return self.field
+
+    def _recompute(self, sources, costs, blocked):
+        ys, xs = np.nonzero(sources)
+        self.recomputes += 1
+        field = distance_field(zip(xs.tolist(), ys.tolist()), costs, blocked)
+        field.flags.writeable = False
+        self.field = field
+        self._dist = field.ravel().tolist()
+        self._sources = sources.copy()
+        self._costs = costs.copy()
+        self._blocked = blocked.copy()
+
+    def _repair(self, changed, sources, costs, blocked) -> bool:
+        """
+        repair the field for the changed flat indices; False, with nothing
+        changed, if too many cells would need clearing
+        """
+        old_source = self._sources.ravel().tolist()
+        old_cost = self._costs.ravel().tolist()
+        old_blocked = self._blocked.ravel().tolist()
+        is_source = sources.ravel().tolist()
+        cost = costs.ravel().tolist()
+        is_blocked = blocked.ravel().tolist()
+        adjacent = self._adjacent
+        dist = self._dist
+
+        # cells whose distance may have grown: the changed cells that lost
+        # something, and every cell whose shortest path stepped onto one of
+        # them. A cell's distance is the cheapest step onto a neighbour plus
+        # that neighbour's distance, so v leans on u if the two add up.
+        cleared = {
+            i for i in changed
+            if (old_source[i] and not is_source[i]) or cost[i] > old_cost[i] or (is_blocked[i] and not old_blocked[i])
+        }
+        frontier = list(cleared)
+        while frontier:
+            u = frontier.pop()
+            if dist[u] == UNREACHABLE:
+                continue
+            through = dist[u] + old_cost[u]
+            for v in adjacent[u]:
+                if v not in cleared and dist[v] == through:
+                    cleared.add(v)
+                    frontier.append(v)
+                    if len(cleared) > self.max_cleared:
+                        return False
+
+        dist = dist.copy()
+        for i in cleared:
+            dist[i] = UNREACHABLE
+        touched = set(cleared)
+        # refill the cleared cells from their neighbours, then spread every
+        # cell that was refilled or got cheaper to step onto
+        heap = []
+        for v in cleared.union(changed):
+            if is_blocked[v]:
+                continue
+            if is_source[v]:
+                best = 0
+            else:
+                best = min((dist[n] + cost[n] for n in adjacent[v] if not is_blocked[n]), default=UNREACHABLE)
+            if best < dist[v]:
+                dist[v] = best
+                touched.add(v)
+            if dist[v] != UNREACHABLE:
+                heap.append((dist[v], v))
+        heapq.heapify(heap)
+        while heap:
+            reach, u = heapq.heappop(heap)
+            if reach > dist[u]:
+                continue
+            through = reach + cost[u]
+            for v in adjacent[u]:
+                if through < dist[v] and not is_blocked[v]:
+                    dist[v] = through
+                    touched.add(v)
+                    heapq.heappush(heap, (through, v))
+
+        field = self.field.copy()
+        touched = sorted(touched)
+        field.flat[touched] = [dist[i] for i in touched]
+        field.flags.writeable = False
+        self.field = field
+        self._dist = dist
+        self._sources = sources.copy()
+        self._costs = costs.copy()
+        self._blocked = blocked.copy()
+        self.repairs += 1
+        return True
@@ -1,6 +1,11 @@
+import numpy as np
+
 from .constants import Constants
-from .game_map import GameMap
-from .game_objects import Player, Unit, City, CityTile
+from .game_map import GameMap, RESOURCE_TYPE_NAMES, position
+from .game_delta import DeltaTracker, TurnDelta
+from .ids import IdInterner
+from .game_objects import Player, Unit, City, CityTile, UnitTable
+from .snapshot import Snapshot, pack
 
 INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
 
@@ -18,69 +23,278 @@ class Game:
         self.map_height = int(mapInfo[1])
         self.map = GameMap(self.map_width, self.map_height)
         self.players = [Player(0), Player(1)]
+        # unit and city id strings interned to dense integers for the match
+        self.unit_ids = IdInterner()
+        self.city_ids = IdInterner()
+        # changes made by the most recent update, see TurnDelta
+        self.delta = TurnDelta()
+        self._delta_tracker = DeltaTracker(self.map_width, self.map_height)
+        # ids of the units and cities this game has its own copy of, None when
+        # it owns all of them (see clone)
+        self._owned_ids = None
+
+    def clone(self) -> 'Game':
+        """
+        a copy of this game for lookahead search. The map planes, the id
+        interners and the players' unit lists and city dicts are copied, but
+        the Unit, City and CityTile objects are shared with this game until
+        mutable_unit or mutable_city is called for them on the clone, so change
+        them only through those, and move units with move_unit
+        """
+        clone = Game.__new__(Game)
+        clone.__dict__.update(self.__dict__)
+        clone.unit_ids = self.unit_ids.clone()
+        clone.city_ids = self.city_ids.clone()
+        clone.map = self.map.clone()
+        clone.players = [player.clone() for player in self.players]
+        clone._delta_tracker = self._delta_tracker.clone()
+        clone._owned_ids = set()
+        return clone
+
+    def mutable_unit(self, unitid) -> Unit:
+        """
+        the unit with this id, copied first if it is still shared with the game
+        this one was cloned from
+        """
+        for player in self.players:
+            unit = player.units_by_id.get(unitid)
+            if unit is not None:
+                if self._owned_ids is not None and unitid not in self._owned_ids:
+                    copy = unit.clone()
+                    stack = player.units_by_pos[(unit.pos.x, unit.pos.y)]
+                    stack[stack.index(unit)] = copy
+                    player.units[player.units.index(unit)] = copy
+                    player.units_by_id[unitid] = copy
+                    self._owned_ids.add(unitid)
+                    unit = copy
+                return unit
+        return None
+
+    def move_unit(self, unitid, x, y) -> Unit:
+        """
+        move the unit with this id to (x, y), keeping its player's
+        units_by_pos and unit_table and the map's unit planes in step; the unit
+        is copied first if it is still shared (see mutable_unit). Returns the
+        unit, or None if there is no unit with this id.
+        """
+        unit = self.mutable_unit(unitid)
+        if unit is None:
+            return None
+        player = self.players[unit.team]
+        old_x, old_y = unit.pos.x, unit.pos.y
+        stack = player.units_by_pos[(old_x, old_y)]
+        stack.remove(unit)
+        if not stack:
+            del player.units_by_pos[(old_x, old_y)]
+        unit.pos = position(x, y)
+        player.units_by_pos.setdefault((x, y), []).append(unit)
+
+        table = player.unit_table
+        if self._owned_ids is not None and ("unit_table", unit.team) not in self._owned_ids:
+            # the other columns are only read, so they can stay shared
+            table = player.unit_table = UnitTable(
+                table.team, table.ids, table.uid, table.type, table.x.copy(), table.y.copy(),
+                table.cooldown, table.wood, table.coal, table.uranium,
+            )
+            self._owned_ids.add(("unit_table", unit.team))
+        row = table.ids.index(unitid)
+        table.x[row] = x
+        table.y[row] = y
+
+        game_map = self.map
+        game_map.unit_count[unit.team, old_y, old_x] -= 1
+        game_map.unit_count[unit.team, y, x] += 1
+        left = [u.cooldown for p in self.players for u in p.units_by_pos.get((old_x, old_y), ())]
+        game_map.unit_cooldown[old_y, old_x] = min(left, default=np.inf)
+        game_map.unit_cooldown[y, x] = min(game_map.unit_cooldown[y, x], unit.cooldown)
+        # the unit layers of the turn were built from the old positions
+        game_map._bitboards.clear()
+        return unit
+
+    def mutable_city(self, cityid) -> City:
+        """
+        the city with this id, copied along with its city tiles first if it is
+        still shared with the game this one was cloned from
+        """
+        for player in self.players:
+            city = player.cities.get(cityid)
+            if city is not None:
+                if self._owned_ids is not None and cityid not in self._owned_ids:
+                    city = player.cities[cityid] = city.clone()
+                    for citytile in city.citytiles:
+                        pos = (citytile.pos.x, citytile.pos.y)
+                        player.citytiles_by_pos[pos] = citytile
+                        player.cities_by_pos[pos] = city
+                        self.map._citytiles[citytile.pos.y * self.map_width + citytile.pos.x] = citytile
+                    self._owned_ids.add(cityid)
+                return city
+        return None
+
+    def to_bytes(self) -> bytes:
+        """
+        the current state as a compact binary snapshot, see lux.snapshot
+        """
+        return pack(self)
+
+    @staticmethod
+    def from_bytes(data, offset=0) -> 'Game':
+        """
+        rebuild a game from a snapshot made by to_bytes. data may be any
+        buffer, e.g. a file of snapshots written back to back
+        """
+        snapshot = data if isinstance(data, Snapshot) else Snapshot(data, offset)
+        game = Game()
+        game._initialize([str(snapshot.game_id), f"{snapshot.width} {snapshot.height}"])
+        game.turn = snapshot.turn
+        for player, research_points in zip(game.players, snapshot.research_points):
+            player.research_points = research_points
+
+        names = snapshot.ids
+        units = snapshot.units
+        for player in game.players:
+            rows = units[units["team"] == player.team]
+            ids = [names[index] for index in rows["id"].tolist()]
+            player.unit_table = UnitTable(
+                player.team, ids, game.unit_ids.intern_all(ids), rows["type"], rows["x"], rows["y"],
+                rows["cooldown"], rows["wood"], rows["coal"], rows["uranium"],
+            )
+        if len(units):
+            game.map._setUnits(units["team"].astype(np.intp), units["x"].astype(np.intp), units["y"].astype(np.intp), units["cooldown"])
+        for team, index, fuel, light_upkeep in snapshot.cities.tolist():
+            game.players[team].cities[names[index]] = City(team, names[index], fuel, light_upkeep)
+        citytiles = []
+        city_indices = []
+        for team, index, x, y, cooldown in snapshot.citytiles.tolist():
+            citytiles.append(game.players[team]._add_city_tile(names[index], x, y, cooldown))
+            city_indices.append(game.city_ids.intern(names[index]))
+        game.map._setCityTiles(citytiles, city_indices)
+        resources = snapshot.resources
+        if len(resources):
+            game.map._setResources(
+                [RESOURCE_TYPE_NAMES[code] for code in resources["type"].tolist()],
+                resources["x"].astype(np.intp), resources["y"].astype(np.intp), resources["amount"],
+            )
+        roads = snapshot.roads
+        if len(roads):
+            game.map._setRoads(roads["x"].astype(np.intp), roads["y"].astype(np.intp), roads["road"])
+        game.delta = game._delta_tracker.update(game)
+        return game
 
     def _end_turn(self):
         print("D_FINISH")
 
     def _reset_player_states(self):
-        self.players[0].units = []
-        self.players[0].cities = {}
-        self.players[0].city_tile_count = 0
-        self.players[1].units = []
-        self.players[1].cities = {}
-        self.players[1].city_tile_count = 0
+        self.players[0]._reset()
+        self.players[1]._reset()
 
     def _update(self, messages):
         """
         update state
+
+        messages is the list of update lines for this turn, or the same lines
+        joined by newlines into a single string
         """
-        self.map = GameMap(self.map_width, self.map_height)
+        if isinstance(messages, str):
+            messages = messages.split("\n")
+        # the map is kept for the whole match and reset in place, so what it
+        # carries across turns survives the update
+        self.map._reset()
         self.turn += 1
         self._reset_player_states()
+        self._owned_ids = None
 
+        # group the lines by record type in one pass, then split each group's
+        # fields in one go and hand them to its handler, which converts every
+        # numeric column of the group with one array call; handlers run in
+        # table order so cities exist before their tiles whatever order the
+        # lines arrived in
+        records = {identifier: [] for identifier in self._PARSERS}
         for update in messages:
-            if update == "D_DONE":
+            if update == INPUT_CONSTANTS.DONE:
                 break
-            strs = update.split(" ")
-            input_identifier = strs[0]
-            if input_identifier == INPUT_CONSTANTS.RESEARCH_POINTS:
-                team = int(strs[1])
-                self.players[team].research_points = int(strs[2])
-            elif input_identifier == INPUT_CONSTANTS.RESOURCES:
-                r_type = strs[1]
-                x = int(strs[2])
-                y = int(strs[3])
-                amt = int(float(strs[4]))
-                self.map._setResource(r_type, x, y, amt)
-            elif input_identifier == INPUT_CONSTANTS.UNITS:
-                unittype = int(strs[1])
-                team = int(strs[2])
-                unitid = strs[3]
-                x = int(strs[4])
-                y = int(strs[5])
-                cooldown = float(strs[6])
-                wood = int(strs[7])
-                coal = int(strs[8])
-                uranium = int(strs[9])
-                self.players[team].units.append(Unit(team, unittype, unitid, x, y, cooldown, wood, coal, uranium))
-            elif input_identifier == INPUT_CONSTANTS.CITY:
-                team = int(strs[1])
-                cityid = strs[2]
-                fuel = float(strs[3])
-                lightupkeep = float(strs[4])
-                self.players[team].cities[cityid] = City(team, cityid, fuel, lightupkeep)
-            elif input_identifier == INPUT_CONSTANTS.CITY_TILES:
-                team = int(strs[1])
-                cityid = strs[2]
-                x = int(strs[3])
-                y = int(strs[4])
-                cooldown = float(strs[5])
-                city = self.players[team].cities[cityid]
-                citytile = city._add_city_tile(x, y, cooldown)
-                self.map.get_cell(x, y).citytile = citytile
-                self.players[team].city_tile_count += 1;
-            elif input_identifier == INPUT_CONSTANTS.ROADS:
-                x = int(strs[1])
-                y = int(strs[2])
-                road = float(strs[3])
-                self.map.get_cell(x, y).road = road
+            identifier, _, fields = update.partition(" ")
+            group = records.get(identifier)
+            if group is not None:
+                group.append(fields)
+        for identifier, parse in self._PARSERS.items():
+            if records[identifier]:
+                parse(self, " ".join(records[identifier]).split(" "))
+        self.delta = self._delta_tracker.update(self)
+        if self.map._clusters is not None:
+            self.map._clusters.update(self.map, self.delta)
+        if self.map._paths is not None:
+            self.map._paths.update(self.delta)
+
+    # each handler gets the fields of every record of its type, one record after
+    # another, so field i of the records is fields[i::fields per record]
+
+    def _parse_research_points(self, fields):
+        teams = np.array(fields[0::2], dtype=np.intp).tolist()
+        for team, points in zip(teams, np.array(fields[1::2], dtype=np.int64).tolist()):
+            self.players[team].research_points = points
+
+    def _parse_resources(self, fields):
+        self.map._setResources(
+            fields[0::4],
+            np.array(fields[1::4], dtype=np.intp),
+            np.array(fields[2::4], dtype=np.intp),
+            np.array(fields[3::4], dtype=np.float64).astype(np.int32),
+        )
+
+    def _parse_units(self, fields):
+        ids = fields[2::9]
+        teams = np.array(fields[1::9], dtype=np.intp)
+        xs = np.array(fields[3::9], dtype=np.intp)
+        ys = np.array(fields[4::9], dtype=np.intp)
+        cooldowns = np.array(fields[5::9], dtype=np.float64)
+        uids = self.unit_ids.intern_all(ids)
+        columns = [np.array(fields[i::9], dtype=np.int32) for i in (0, 6, 7, 8)]
+        for player in self.players:
+            rows = np.flatnonzero(teams == player.team)
+            types, woods, coals, uraniums = (column[rows] for column in columns)
+            player.unit_table = UnitTable(
+                player.team, [ids[i] for i in rows.tolist()], uids[rows], types, xs[rows], ys[rows], cooldowns[rows], woods, coals, uraniums,
+            )
+        self.map._setUnits(teams, xs, ys, cooldowns)
+
+    def _parse_cities(self, fields):
+        players = self.players
+        for team, cityid, fuel, light_upkeep in zip(
+            np.array(fields[0::4], dtype=np.intp).tolist(),
+            fields[1::4],
+            np.array(fields[2::4], dtype=np.float64).tolist(),
+            np.array(fields[3::4], dtype=np.float64).tolist(),
+        ):
+            players[team].cities[cityid] = City(team, cityid, fuel, light_upkeep)
+
+    def _parse_city_tiles(self, fields):
+        players = self.players
+        cityids = fields[1::5]
+        citytiles = [
+            players[team]._add_city_tile(cityid, x, y, cooldown)
+            for team, cityid, x, y, cooldown in zip(
+                np.array(fields[0::5], dtype=np.intp).tolist(),
+                cityids,
+                np.array(fields[2::5], dtype=np.intp).tolist(),
+                np.array(fields[3::5], dtype=np.intp).tolist(),
+                np.array(fields[4::5], dtype=np.float64).tolist(),
+            )
+        ]
+        self.map._setCityTiles(citytiles, self.city_ids.intern_all(cityids).tolist())
+
+    def _parse_roads(self, fields):
+        self.map._setRoads(
+            np.array(fields[0::3], dtype=np.intp),
+            np.array(fields[1::3], dtype=np.intp),
+            np.array(fields[2::3], dtype=np.float64),
+        )
+
+    # record type -> handler for every record of that type in the turn
+    _PARSERS = {
+        INPUT_CONSTANTS.RESEARCH_POINTS: _parse_research_points,
+        INPUT_CONSTANTS.RESOURCES: _parse_resources,
+        INPUT_CONSTANTS.UNITS: _parse_units,
+        INPUT_CONSTANTS.CITY: _parse_cities,
+        INPUT_CONSTANTS.CITY_TILES: _parse_city_tiles,
+        INPUT_CONSTANTS.ROADS: _parse_roads,
+    }
@@ -0,0 +1,113 @@
+"""
+Heatmaps over a GameMap's resource planes.
+
+A heatmap runs a per-cell value plane through a kernel, so every cell gets the
+weighted sum of the values around it: resource_value through CROSS is what the
+bots' get_map_values computed cell by cell. Small kernels are applied as a sum
+of shifted copies of the plane, and box_sum answers square windows of any
+radius from a summed-area table.
+"""
+import numpy as np
+
+from .constants import Constants
+from . import game_constants
+from .game_map import RESOURCE_TYPE_NAMES
+
+RESOURCE_TYPES = Constants.RESOURCE_TYPES
+
+# what the bots' get_cell_value gave a cell of each researched resource type
+RESOURCE_VALUES = {RESOURCE_TYPES.WOOD: 20, RESOURCE_TYPES.COAL: 50, RESOURCE_TYPES.URANIUM: 80}
+
+
+def cross(radius=1) -> np.ndarray:
+    """
+    a kernel of ones over the cells within Manhattan distance radius of the centre
+    """
+    offsets = np.arange(-radius, radius + 1)
+    return (np.abs(offsets)[:, None] + np.abs(offsets)[None, :] <= radius).astype(np.int64)
+
+
+def square(radius=1) -> np.ndarray:
+    """
+    a kernel of ones over the (2 * radius + 1) squared cells around the centre
+    """
+    return np.ones((2 * radius + 1, 2 * radius + 1), dtype=np.int64)
+
+
+# a cell and its four neighbours
+CROSS = cross(1)
+
+
+def convolve(plane, kernel) -> np.ndarray:
+    """
+    for every cell of plane (indexed [y, x]), the sum of kernel times the values
+    around it, with the kernel's centre on the cell and nothing off the board.
+    The kernel needs odd sides; only its non-zero entries cost anything.
+    """
+    ky, kx = kernel.shape
+    ry, rx = ky // 2, kx // 2
+    height, width = plane.shape
+    padded = np.zeros((height + 2 * ry, width + 2 * rx), dtype=np.result_type(plane, kernel))
+    padded[ry:ry + height, rx:rx + width] = plane
+    total = np.zeros((height, width), dtype=padded.dtype)
+    for dy, dx in zip(*np.nonzero(kernel)):
+        total += kernel[dy, dx] * padded[dy:dy + height, dx:dx + width]
+    return total
+
+
+def box_sum(plane, radius) -> np.ndarray:
+    """
+    convolve(plane, square(radius)) in constant time per cell, from a
+    summed-area table
+    """
+    height, width = plane.shape
+    table = np.zeros((height + 1, width + 1), dtype=np.result_type(plane, np.int64))
+    np.cumsum(np.cumsum(plane, axis=0), axis=1, out=table[1:, 1:])
+    ys = np.arange(height)
+    xs = np.arange(width)
+    top = np.clip(ys - radius, 0, height)[:, None]
+    bottom = np.clip(ys + radius + 1, 0, height)[:, None]
+    left = np.clip(xs - radius, 0, width)[None, :]
+    right = np.clip(xs + radius + 1, 0, width)[None, :]
+    return table[bottom, right] - table[top, right] - table[bottom, left] + table[top, left]
+
+
+def minable(game_map, player) -> np.ndarray:
+    """
+    cells holding a resource player has the research to mine
+    """
+    researched = np.array([True, player.researched_coal(), player.researched_uranium()])
+    has_resource = (game_map.resource_type >= 0) & (game_map.resource_amount > 0)
+    return has_resource & researched[game_map.resource_type]
+
+
+def _per_type(game_map, player, by_name) -> np.ndarray:
+    """
+    by_name[resource type] on every cell player can mine, 0 elsewhere
+    """
+    per_code = np.array([by_name[name] for name in RESOURCE_TYPE_NAMES])
+    return np.where(minable(game_map, player), per_code[game_map.resource_type], 0)
+
+
+def resource_value(game_map, player, values=RESOURCE_VALUES) -> np.ndarray:
+    """
+    values[resource type] on every cell player can mine
+    """
+    return _per_type(game_map, player, values)
+
+
+def collection_rate(game_map, player) -> np.ndarray:
+    """
+    how much of its resource a worker of player collects from each cell per
+    turn, capped by what is left
+    """
+    rate = _per_type(game_map, player, game_constants.PARAMETERS.collection_rate)
+    return np.minimum(rate, game_map.resource_amount)
+
+
+def fuel_value(game_map, player) -> np.ndarray:
+    """
+    the fuel left in each cell player can mine
+    """
+    rate = _per_type(game_map, player, game_constants.PARAMETERS.fuel_rate)
+    return rate * game_map.resource_amount
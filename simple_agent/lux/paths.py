@@ -0,0 +1,214 @@
+"""
+Shortest paths between cells, cached across turns.
+
+A path is found by walking down the goal's distance field from the start to the
+goal. PathCache keeps the most recently used paths and drops a path when the
+turn delta reports a change on one of its cells: a city tile built or lost, a
+resource depleted or added, or a road changed. A change elsewhere, such as a new
+road beside a path or a city tile lost in the way of a detour, can open a
+quicker way without touching the path, so after any change the first lookup for
+a goal also brings the goal's distance field up to date, repairing it as
+lux.distance.DynamicField does, and compares it with the one its paths were
+walked down. A path none of whose cells changed costs what it did, so it is
+still a quickest way exactly when the time from its start is unchanged; the
+paths from starts that got quicker are dropped. Any cell on a cached path is also
+a start the cache can answer for the same goal, as the rest of a shortest path is
+itself shortest, so a unit following its path keeps hitting the cache as it
+moves.
+"""
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import distance
+from .constants import Constants
+
+UNIT_TYPES = Constants.UNIT_TYPES
+
+# paths kept by a PathCache before the least recently used are dropped
+DEFAULT_SIZE = 256
+
+
+def shortest_path(game_map, start, goal, team, unit_type=UNIT_TYPES.WORKER, field=None) -> Optional[List[int]]:
+    """
+    the flat indices y * width + x of the cells on a quickest way from start to
+    goal, both (x, y), for a unit of team and unit_type, start and goal
+    included; None if goal cannot be reached. Among equally quick steps the
+    first in west, east, north, south order is taken. field is goal's distance
+    field if the caller already has it.
+    """
+    width = game_map.width
+    if field is None:
+        field = game_map.distance_field([goal], team, unit_type)
+    field = field.ravel().tolist()
+    cost = distance.step_costs(game_map, unit_type).ravel().tolist()
+    adjacent = game_map.neighbor_table.indices
+    index = start[1] * width + start[0]
+    end = goal[1] * width + goal[0]
+    path = [index]
+    while index != end:
+        # field[n] is already the time from n, so the best step is the one
+        # with the least time to step onto n and go on from there
+        index = min(adjacent[index], key=lambda n: cost[n] + field[n])
+        if field[index] == distance.UNREACHABLE:
+            return None
+        path.append(index)
+    return path
+
+
+class PathCache:
+    """
+    shortest paths of a GameMap kept across turns, the size most recently used.
+    Use GameMap.paths rather than building one directly; Game keeps it up to
+    date. hits, misses, invalidated and evicted count what the cache did, to
+    tune its size.
+    """
+    def __init__(self, game_map, size=DEFAULT_SIZE):
+        self.map = game_map
+        self.size = size
+        # (start, goal, team, unit_type) -> path, least recently used first
+        self._paths: "OrderedDict[tuple, List[int]]" = OrderedDict()
+        # flat index -> keys of the cached paths through that cell
+        self._through: Dict[int, set] = {}
+        # (goal, team, unit_type) -> flat index -> key of a cached path to goal
+        # passing through it
+        self._to_goal: Dict[tuple, Dict[int, tuple]] = {}
+        # (goal, team, unit_type) -> its distance field, as its paths were
+        # walked down, and the goals whose field may have changed since
+        self._fields: Dict[tuple, distance.DynamicField] = {}
+        self._stale: set = set()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def path(self, start, goal, team, unit_type=UNIT_TYPES.WORKER) -> Optional[List[Tuple[int, int]]]:
+        """
+        the (x, y) cells of a quickest way from start to goal, both (x, y) or
+        Positions, start and goal included; None if goal cannot be reached
+        """
+        start = (start.x, start.y) if hasattr(start, "x") else tuple(start)
+        goal = (goal.x, goal.y) if hasattr(goal, "x") else tuple(goal)
+        width = self.map.width
+        key = (start, goal, team, unit_type)
+        if key[1:] in self._stale:
+            self._check_field(key[1:])
+        path = self._paths.get(key)
+        if path is not None:
+            self._paths.move_to_end(key)
+            self.hits += 1
+            return [(index % width, index // width) for index in path]
+
+        index = start[1] * width + start[0]
+        through = self._to_goal.get((goal, team, unit_type), {}).get(index)
+        if through is not None:
+            self._paths.move_to_end(through)
+            self.hits += 1
+            path = self._paths[through]
+            return [(i % width, i // width) for i in path[path.index(index):]]
+
+        self.misses += 1
+        field = self._fields.get(key[1:])
+        if field is None:
+            field = self._fields[key[1:]] = distance.DynamicField(self.map, *self._field_inputs(key[1:]))
+        path = shortest_path(self.map, start, goal, team, unit_type, field.field)
+        if path is None:
+            if key[1:] not in self._to_goal:
+                del self._fields[key[1:]]
+            self._stale.discard(key[1:])
+            return None
+        self._add(key, path)
+        return [(index % width, index // width) for index in path]
+
+    def first_step(self, start, goal, team, unit_type=UNIT_TYPES.WORKER) -> Optional[Tuple[int, int]]:
+        """
+        the cell to step onto first on the way from start to goal, start itself
+        if it is the goal, or None if goal cannot be reached
+        """
+        path = self.path(start, goal, team, unit_type)
+        if path is None:
+            return None
+        return path[1] if len(path) > 1 else path[0]
+
+    def update(self, delta):
+        """
+        drop every path through a cell delta reports changed, and mark the
+        fields of the other goals to be checked on their next lookup
+        """
+        changed = delta.changed_cells()
+        for x, y in changed:
+            for key in list(self._through.get(y * self.map.width + x, ())):
+                self._remove(key)
+                self.invalidated += 1
+        if changed:
+            self._stale.update(self._fields)
+
+    def clear(self):
+        self._paths.clear()
+        self._through.clear()
+        self._to_goal.clear()
+        self._fields.clear()
+        self._stale.clear()
+
+    def _check_field(self, goal_key):
+        """
+        drop the paths to goal_key's goal from cells its distance field now
+        gives a quicker way from
+        """
+        self._stale.discard(goal_key)
+        dynamic = self._fields.get(goal_key)
+        if dynamic is None:
+            return
+        before = dynamic.field
+        quicker = np.flatnonzero(dynamic.update(*self._field_inputs(goal_key)) != before).tolist()
+        # a path through a cell that got quicker has a start that got quicker
+        # too, so these are exactly the paths that are no longer quickest
+        for index in quicker:
+            if index not in self._to_goal.get(goal_key, ()):
+                continue
+            for key in [key for key in self._through[index] if key[1:] == goal_key]:
+                self._remove(key)
+                self.invalidated += 1
+
+    def _field_inputs(self, goal_key):
+        """
+        the sources, step costs and blocked cells of goal_key's distance field
+        """
+        (x, y), team, unit_type = goal_key
+        sources = np.zeros((self.map.height, self.map.width), dtype=bool)
+        sources[y, x] = True
+        return sources, distance.step_costs(self.map, unit_type), distance.blocked_cells(self.map, team)
+
+    def _add(self, key, path):
+        self._paths[key] = path
+        goal_paths = self._to_goal.setdefault(key[1:], {})
+        for index in path:
+            self._through.setdefault(index, set()).add(key)
+            goal_paths.setdefault(index, key)
+        while len(self._paths) > self.size:
+            self._remove(next(iter(self._paths)))
+            self.evicted += 1
+
+    def _remove(self, key):
+        path = self._paths.pop(key)
+        goal_paths = self._to_goal[key[1:]]
+        for index in path:
+            keys = self._through[index]
+            keys.discard(key)
+            if not keys:
+                del self._through[index]
+            if goal_paths.get(index) == key:
+                del goal_paths[index]
+                # another cached path to the same goal may pass through too
+                for other in self._through.get(index, ()):
+                    if other[1:] == key[1:]:
+                        goal_paths[index] = other
+                        break
+        if not goal_paths:
+            del self._to_goal[key[1:]]
+            del self._fields[key[1:]]
+            self._stale.discard(key[1:])
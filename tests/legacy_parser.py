@@ -0,0 +1,90 @@
+"""
+The original if/elif observation parser, as the reference Game._update must
+agree with, and a plain-data summary of a parsed Game to compare them by.
+"""
+from lux.constants import Constants
+from lux.game import Game
+from lux.game_objects import Unit, City
+
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+
+
+class LegacyGame(Game):
+    """
+    Game with the original if/elif chain as its parser
+    """
+    def _update(self, messages):
+        self.map._reset()
+        self.turn += 1
+        self._reset_player_states()
+
+        for update in messages:
+            if update == "D_DONE":
+                break
+            strs = update.split(" ")
+            input_identifier = strs[0]
+            if input_identifier == INPUT_CONSTANTS.RESEARCH_POINTS:
+                team = int(strs[1])
+                self.players[team].research_points = int(strs[2])
+            elif input_identifier == INPUT_CONSTANTS.RESOURCES:
+                r_type = strs[1]
+                x = int(strs[2])
+                y = int(strs[3])
+                amt = int(float(strs[4]))
+                self.map._setResource(r_type, x, y, amt)
+            elif input_identifier == INPUT_CONSTANTS.UNITS:
+                unittype = int(strs[1])
+                team = int(strs[2])
+                unitid = strs[3]
+                x = int(strs[4])
+                y = int(strs[5])
+                cooldown = float(strs[6])
+                wood = int(strs[7])
+                coal = int(strs[8])
+                uranium = int(strs[9])
+                self.players[team].units.append(Unit(team, unittype, unitid, x, y, cooldown, wood, coal, uranium))
+            elif input_identifier == INPUT_CONSTANTS.CITY:
+                team = int(strs[1])
+                cityid = strs[2]
+                fuel = float(strs[3])
+                lightupkeep = float(strs[4])
+                self.players[team].cities[cityid] = City(team, cityid, fuel, lightupkeep)
+            elif input_identifier == INPUT_CONSTANTS.CITY_TILES:
+                team = int(strs[1])
+                cityid = strs[2]
+                x = int(strs[3])
+                y = int(strs[4])
+                cooldown = float(strs[5])
+                city = self.players[team].cities[cityid]
+                citytile = city._add_city_tile(x, y, cooldown)
+                self.map._setCityTile(x, y, citytile)
+                self.players[team].city_tile_count += 1
+            elif input_identifier == INPUT_CONSTANTS.ROADS:
+                x = int(strs[1])
+                y = int(strs[2])
+                road = float(strs[3])
+                self.map._setRoad(x, y, road)
+        # not part of parsing, but Game._update does it too
+        self.delta = self._delta_tracker.update(self)
+
+
+def summarize(game):
+    """
+    plain-data view of everything the parser fills in, for comparison
+    """
+    players = []
+    for p in game.players:
+        units = [(u.id, u.team, u.type, u.pos.x, u.pos.y, u.cooldown, u.cargo.wood, u.cargo.coal, u.cargo.uranium) for u in p.units]
+        cities = {}
+        for cityid, city in p.cities.items():
+            tiles = [(ct.cityid, ct.team, ct.pos.x, ct.pos.y, ct.cooldown) for ct in city.citytiles]
+            cities[cityid] = (city.cityid, city.team, city.fuel, city.light_upkeep, tiles)
+        players.append((p.team, p.research_points, p.city_tile_count, units, cities))
+    cells = []
+    for y in range(game.map.height):
+        for x in range(game.map.width):
+            cell = game.map.get_cell(x, y)
+            resource = None if cell.resource is None else (cell.resource.type, cell.resource.amount)
+            citytile = None if cell.citytile is None else (cell.citytile.cityid, cell.citytile.pos.x, cell.citytile.pos.y)
+            cells.append((resource, citytile, cell.road))
+    return players, cells
@@ -0,0 +1,45 @@
+"""
+assignment.gather_targets on hand-written turns.
+"""
+from lux import assignment
+from lux.game import Game
+
+HEADER = ["0", "8 1"]
+
+
+def game_with(lines):
+    game = Game()
+    game._initialize(HEADER)
+    game._update(lines + ["D_DONE"])
+    return game
+
+
+def worker(unitid, x):
+    return f"u 0 0 {unitid} {x} 0 0 0 0 0"
+
+
+def gatherers(game, allow_city=True):
+    return [(unit, allow_city) for unit in game.players[0].units]
+
+
+def test_cells_within_max_distance():
+    game = game_with([worker("u_1", 0), worker("u_2", 1)])
+    values = {(0, 0): 20, (2, 0): 30}
+    assert assignment.gather_targets(gatherers(game), game.map, values, {}, 7) == {"u_1": (0, 0), "u_2": (2, 0)}
+    # u_1 alone can reach (0, 0), and nobody (2, 0)
+    assert assignment.gather_targets(gatherers(game), game.map, values, {}, 0) == {"u_1": (0, 0), "u_2": None}
+
+
+def test_cells_other_units_head_for_are_left_to_them():
+    game = game_with([worker("u_1", 0)])
+    values = {(1, 0): 50, (3, 0): 20}
+    assert assignment.gather_targets(gatherers(game), game.map, values, {"u_9": (1, 0)}, 7) == {"u_1": (3, 0)}
+    # a gatherer's own target from an earlier turn does not hold it back
+    assert assignment.gather_targets(gatherers(game), game.map, values, {"u_1": (1, 0)}, 7) == {"u_1": (1, 0)}
+
+
+def test_city_tiles_only_for_units_allowed_in():
+    game = game_with([worker("u_1", 0), "c 0 c_1 100 23", "ct 0 c_1 1 0 0"])
+    values = {(1, 0): 50, (5, 0): 20}
+    assert assignment.gather_targets(gatherers(game), game.map, values, {}, 7) == {"u_1": (1, 0)}
+    assert assignment.gather_targets(gatherers(game, False), game.map, values, {}, 7) == {"u_1": (5, 0)}
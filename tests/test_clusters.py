@@ -0,0 +1,69 @@
+"""
+GameMap.clusters kept up to date from the turn deltas: every turn must group
+the same cells, with the same amounts, as labelling the map from scratch.
+"""
+from lux.clusters import ResourceClusters
+from lux.game import Game
+
+HEADER = ["0", "6 4"]
+
+
+def partition(clusters):
+    return sorted((tuple(c.cells), tuple(sorted(c.amounts.items())), tuple(c.perimeter)) for c in clusters.clusters.values())
+
+
+def play(turns):
+    """
+    yields the game after each turn, its clusters followed from the first turn
+    """
+    game = Game()
+    game._initialize(HEADER)
+    for i, resources in enumerate(turns):
+        game._update([f"r {r_type} {x} {y} {amount}" for r_type, x, y, amount in resources] + ["D_DONE"])
+        if i == 0:
+            followed = game.map.clusters
+        # the same clusters, updated in place rather than labelled again
+        assert game.map.clusters is followed
+        assert partition(game.map.clusters) == partition(ResourceClusters(game.map)), f"turn {i}"
+        yield game
+
+
+def cells(game):
+    return sorted(c.cells for c in game.map.clusters.clusters.values())
+
+
+LINE = [("wood", 0, 0, 100), ("wood", 1, 0, 100), ("coal", 2, 0, 50)]
+
+
+def test_split_when_a_middle_cell_is_depleted():
+    turns = play([LINE, [LINE[0], LINE[2]]])
+    game = next(turns)
+    assert cells(game) == [[(0, 0), (1, 0), (2, 0)]]
+    cluster = game.map.clusters.cluster_at(0, 0)
+    assert (cluster.amounts["wood"], cluster.amounts["coal"]) == (200, 50)
+    game = next(turns)
+    assert cells(game) == [[(0, 0)], [(2, 0)]]
+    assert game.map.clusters.cluster_at(1, 0) is None
+    assert game.map.clusters.cluster_at(2, 0).amounts["coal"] == 50
+
+
+def test_merge_when_a_new_cell_joins_two_clusters():
+    apart = [("wood", 0, 1, 10), ("wood", 2, 1, 20), ("wood", 5, 3, 30)]
+    turns = play([apart, apart + [("wood", 1, 1, 40)]])
+    game = next(turns)
+    assert cells(game) == [[(0, 1)], [(2, 1)], [(5, 3)]]
+    game = next(turns)
+    assert cells(game) == [[(0, 1), (1, 1), (2, 1)], [(5, 3)]]
+    assert game.map.clusters.cluster_at(0, 1) is game.map.clusters.cluster_at(2, 1)
+    assert game.map.clusters.cluster_at(1, 1).amount == 70
+
+
+def test_split_and_merge_in_the_same_turn():
+    square = [("wood", 0, 0, 1), ("wood", 1, 0, 1), ("wood", 0, 1, 1), ("wood", 1, 1, 1), ("wood", 3, 0, 1)]
+    later = [("wood", 0, 0, 1), ("wood", 1, 1, 1), ("wood", 2, 0, 1), ("wood", 3, 0, 1)]
+    turns = play([square, later, []])
+    next(turns)
+    game = next(turns)
+    assert cells(game) == [[(0, 0)], [(1, 1)], [(2, 0), (3, 0)]]
+    game = next(turns)
+    assert cells(game) == []
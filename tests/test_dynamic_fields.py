@@ -0,0 +1,94 @@
+"""
+distance.DynamicField repairs against distance_field computed from scratch.
+"""
+import numpy as np
+
+from lux import distance
+from lux.game_map import GameMap
+
+WIDTH, HEIGHT = 7, 5
+
+
+def fresh(sources, costs, blocked):
+    ys, xs = np.nonzero(sources)
+    return distance.distance_field(zip(xs.tolist(), ys.tolist()), costs, blocked)
+
+
+def state():
+    sources = np.zeros((HEIGHT, WIDTH), dtype=bool)
+    sources[2, 0] = True
+    costs = np.full((HEIGHT, WIDTH), 2, dtype=np.int32)
+    blocked = np.zeros((HEIGHT, WIDTH), dtype=bool)
+    return sources, costs, blocked
+
+
+def field(**limits):
+    sources, costs, blocked = state()
+    return distance.DynamicField(GameMap(WIDTH, HEIGHT), sources, costs, blocked, **limits), sources, costs, blocked
+
+
+def check(dynamic, sources, costs, blocked):
+    np.testing.assert_array_equal(dynamic.update(sources, costs, blocked), fresh(sources, costs, blocked))
+
+
+def test_lowering_changes_are_repaired():
+    dynamic, sources, costs, blocked = field()
+    sources[4, 6] = True
+    check(dynamic, sources, costs, blocked)
+    costs[2, 3] = 1
+    check(dynamic, sources, costs, blocked)
+    assert (dynamic.repairs, dynamic.recomputes) == (2, 1)
+
+
+def test_raising_changes_are_repaired():
+    dynamic, sources, costs, blocked = field(max_changes=WIDTH * HEIGHT, max_cleared=WIDTH * HEIGHT)
+    # a wall with one gap: every cell behind it now goes round through the gap
+    blocked[0:4, 3] = True
+    check(dynamic, sources, costs, blocked)
+    costs[4, 3] = 5
+    check(dynamic, sources, costs, blocked)
+    # and back: the wall and the dear cell are gone again
+    blocked[:] = False
+    costs[4, 3] = 2
+    check(dynamic, sources, costs, blocked)
+    assert (dynamic.repairs, dynamic.recomputes) == (3, 1)
+
+
+def test_removing_the_only_source_leaves_everything_unreachable():
+    dynamic, sources, costs, blocked = field()
+    sources[2, 0] = False
+    result = dynamic.update(sources, costs, blocked)
+    assert (result == distance.UNREACHABLE).all()
+    check(dynamic, sources, costs, blocked)
+
+
+def test_too_many_changes_recompute_in_full():
+    dynamic, sources, costs, blocked = field(max_changes=2)
+    costs[0, :] = 1
+    check(dynamic, sources, costs, blocked)
+    assert (dynamic.repairs, dynamic.recomputes) == (0, 2)
+
+
+def test_too_many_cleared_cells_recompute_in_full():
+    dynamic, sources, costs, blocked = field(max_cleared=3)
+    # every cell's path runs through the source, so moving it clears them all
+    sources[2, 0] = False
+    sources[2, 6] = True
+    check(dynamic, sources, costs, blocked)
+    assert (dynamic.repairs, dynamic.recomputes) == (0, 2)
+
+
+def test_random_changes():
+    rng = np.random.default_rng(0)
+    dynamic, sources, costs, blocked = field(max_cleared=WIDTH * HEIGHT)
+    for _ in range(200):
+        y, x = rng.integers(HEIGHT), rng.integers(WIDTH)
+        kind = rng.integers(3)
+        if kind == 0:
+            sources[y, x] = not sources[y, x]
+        elif kind == 1:
+            costs[y, x] = rng.integers(1, 6)
+        else:
+            blocked[y, x] = not blocked[y, x]
+        check(dynamic, sources, costs, blocked)
+    assert dynamic.repairs > 0
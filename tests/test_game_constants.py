@@ -0,0 +1,39 @@
+"""
+game_constants against the game_constants.json shipped beside it.
+"""
+import json
+from os import path
+
+import pytest
+
+from lux import game_constants
+from lux.game_constants import DEFAULT_PARAMETERS, GAME_CONSTANTS, GameParameters
+
+
+def shipped():
+    with open(path.join(path.dirname(game_constants.__file__), "game_constants.json")) as f:
+        return json.load(f)
+
+
+def test_constants_match_the_json():
+    assert GAME_CONSTANTS == shipped()
+    assert GameParameters.from_json(shipped()["PARAMETERS"]) == DEFAULT_PARAMETERS
+
+
+def test_profile_switch_rewrites_game_constants():
+    parameters = GAME_CONSTANTS["PARAMETERS"]
+    game_constants.register_profile("test", night_length=15)
+    try:
+        assert game_constants.use_profile("test").cycle_length == 45
+        assert GAME_CONSTANTS["PARAMETERS"] is parameters
+        assert parameters["NIGHT_LENGTH"] == 15
+    finally:
+        game_constants.use_profile("default")
+        del game_constants.PROFILES["test"]
+    assert GAME_CONSTANTS == shipped()
+
+
+def test_derived_fields_cannot_be_overridden():
+    with pytest.raises((TypeError, ValueError)):
+        game_constants.register_profile("test", cycle_length=45)
+    assert "test" not in game_constants.PROFILES
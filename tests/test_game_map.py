@@ -0,0 +1,20 @@
+"""
+GameMap's per-cell views onto its state planes.
+"""
+from lux.game import Game
+
+HEADER = ["0", "4 4"]
+
+
+def test_kept_resource_is_a_snapshot():
+    game = Game()
+    game._initialize(HEADER)
+    game._update(["r wood 1 2 400", "D_DONE"])
+    cell = game.map.get_cell(1, 2)
+    kept = cell.resource
+    game._update(["r coal 1 2 350", "D_DONE"])
+    assert (kept.type, kept.amount) == ("wood", 400)
+    assert (cell.resource.type, cell.resource.amount) == ("coal", 350)
+    game._update(["D_DONE"])
+    assert cell.resource is None
+    assert (kept.type, kept.amount) == ("wood", 400)
@@ -0,0 +1,79 @@
+"""
+Game._update against the original if/elif parser it replaced
+(tests.legacy_parser.LegacyGame): both must fill in the same players,
+cities, city tiles, units and map cells.
+"""
+import pytest
+
+from benchmarks.replay_states import replay_observations
+from lux.game import Game
+from tests.legacy_parser import LegacyGame, summarize
+
+HEADER = ["0", "12 12"]
+
+TURN = [
+    "rp 0 42",
+    "rp 1 7",
+    "r wood 0 1 400",
+    "r coal 3 4 350.0",
+    "r uranium 11 11 12",
+    "u 0 0 u_1 2 2 0 20 5 1",
+    "u 1 1 u_2 9 9 1.5 0 0 0",
+    "u 0 1 u_3 2 3 0 100 0 0",
+    "c 0 c_1 120.5 23",
+    "ct 0 c_1 2 2 0",
+    "ct 0 c_1 2 3 1",
+    "c 1 c_2 0 18",
+    "ct 1 c_2 9 9 0.25",
+    "ccd 2 2 6",
+    "ccd 4 4 0.75",
+    "D_DONE",
+]
+
+
+def parse(game_cls, turns):
+    game = game_cls()
+    game._initialize(HEADER)
+    for updates in turns:
+        game._update(updates)
+    return game
+
+
+def test_hand_written_turn():
+    assert summarize(parse(Game, [TURN])) == summarize(parse(LegacyGame, [TURN]))
+
+
+def test_joined_buffer():
+    assert summarize(parse(Game, ["\n".join(TURN)])) == summarize(parse(LegacyGame, [TURN]))
+
+
+def test_city_tiles_before_their_city():
+    # the if/elif parser needed cities first; the table-driven one does not
+    reordered = [line for line in TURN if line.startswith("ct ")] + [line for line in TURN if not line.startswith("ct ")]
+    assert summarize(parse(Game, [reordered])) == summarize(parse(LegacyGame, [TURN]))
+
+
+def test_lines_after_done_are_ignored():
+    assert summarize(parse(Game, [TURN + ["rp 0 99"]])) == summarize(parse(LegacyGame, [TURN]))
+
+
+def test_empty_turn_clears_state():
+    assert summarize(parse(Game, [TURN, ["D_DONE"]])) == summarize(parse(LegacyGame, [TURN, ["D_DONE"]]))
+
+
+@pytest.fixture(scope="module")
+def observations():
+    return list(replay_observations())
+
+
+def test_replay(observations):
+    legacy = LegacyGame()
+    game = Game()
+    legacy._initialize(observations[0])
+    game._initialize(observations[0])
+    for turn, updates in enumerate(observations):
+        if turn == 0:
+            updates = updates[2:]
+        legacy._update(updates)
+        game._update(updates)
+        assert summarize(game) == summarize(legacy), f"turn {turn}"
@@ -0,0 +1,63 @@
+"""
+GameMap.paths kept across turns: a cached path must stay a quickest way when a
+change off the path opens a quicker one.
+"""
+from lux import distance
+from lux.game import Game
+from lux.paths import shortest_path
+
+HEADER = ["0", "5 3"]
+START, GOAL = (0, 1), (4, 1)
+
+
+def play(turns):
+    """
+    yields the game after each turn, with the path from START to GOAL asked for
+    """
+    game = Game()
+    game._initialize(HEADER)
+    for lines in turns:
+        game._update(lines + ["D_DONE"])
+        yield game, game.map.paths.path(START, GOAL, 0)
+
+
+def travel_time(game_map, path):
+    cost = distance.step_costs(game_map)
+    return sum(int(cost[y, x]) for x, y in path[1:])
+
+
+def fresh(game_map):
+    width = game_map.width
+    return [(i % width, i // width) for i in shortest_path(game_map, START, GOAL, 0)]
+
+
+def test_new_road_beside_the_path():
+    road = [f"ccd {x} 0 6" for x in range(5)]
+    turns = play([[], road])
+    game, path = next(turns)
+    assert path == [(0, 1), (1, 1), (2, 1), (3, 1), (4, 1)]
+    assert travel_time(game.map, path) == 8
+    game, path = next(turns)
+    # up onto the road, along it and back down
+    assert path == fresh(game.map)
+    assert travel_time(game.map, path) == 1 + 4 + 2
+    assert game.map.paths.invalidated == 1
+
+
+def test_blocker_removed_beside_the_path():
+    blocker = ["c 1 c_1 100 23", "ct 1 c_1 2 1 0"]
+    turns = play([blocker, []])
+    game, path = next(turns)
+    assert (2, 1) not in path
+    assert travel_time(game.map, path) == 12
+    game, path = next(turns)
+    assert path == [(0, 1), (1, 1), (2, 1), (3, 1), (4, 1)]
+
+
+def test_paths_from_starts_no_quicker_are_kept():
+    # a road on the far side of the goal makes nothing on the way quicker
+    turns = play([[], ["ccd 4 0 6"]])
+    game, path = next(turns)
+    game, again = next(turns)
+    assert again == path
+    assert (game.map.paths.hits, game.map.paths.misses, game.map.paths.invalidated) == (1, 1, 0)
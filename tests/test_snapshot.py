@@ -0,0 +1,61 @@
+"""
+Game.to_bytes / Game.from_bytes round trips.
+"""
+from lux.game import Game
+from lux.snapshot import Snapshot
+from tests.legacy_parser import summarize
+
+HEADER = ["1", "8 8"]
+
+TURN = [
+    "rp 0 3",
+    "rp 1 60",
+    "r wood 0 1 400",
+    "r uranium 7 7 12",
+    "u 0 0 u_1 2 2 0 20 5 1",
+    "u 0 1 scout-b 5 5 1.5 0 0 0",
+    "u 1 0 u_99999999 4 4 0.25 100 0 0",
+    "c 0 c_1 120.5 23",
+    "ct 0 c_1 2 2 0",
+    "c 1 north 7.25 18",
+    "ct 1 north 5 5 0.75",
+    "ccd 2 2 6",
+    "ccd 3 3 0.5",
+    "D_DONE",
+]
+
+
+def parsed():
+    game = Game()
+    game._initialize(HEADER)
+    game._update(TURN)
+    return game
+
+
+def test_round_trip():
+    game = parsed()
+    restored = Game.from_bytes(game.to_bytes())
+    assert (restored.id, restored.turn) == (game.id, game.turn)
+    assert summarize(restored) == summarize(game)
+
+
+def test_ids_of_any_format():
+    restored = Game.from_bytes(parsed().to_bytes())
+    assert {u.id for p in restored.players for u in p.units} == {"u_1", "scout-b", "u_99999999"}
+    assert set(restored.players[1].cities) == {"north"}
+    assert restored.players[1].units[0].id == "scout-b"
+
+
+def test_snapshot_ids_table():
+    snapshot = Snapshot(parsed().to_bytes())
+    assert [snapshot.ids[i] for i in snapshot.units["id"].tolist()] == ["u_1", "u_99999999", "scout-b"]
+    assert [snapshot.ids[i] for i in snapshot.cities["id"].tolist()] == ["c_1", "north"]
+
+
+def test_empty_game():
+    game = Game()
+    game._initialize(HEADER)
+    game._update(["D_DONE"])
+    snapshot = Snapshot(game.to_bytes())
+    assert snapshot.ids == []
+    assert summarize(Game.from_bytes(snapshot)) == summarize(game)
@@ -0,0 +1,81 @@
+"""
+validate.resolve on hand-written turns: which moves the engine would carry out
+and where every unit ends up.
+"""
+from lux import validate
+from lux.game import Game
+
+HEADER = ["0", "6 4"]
+
+
+def game_with(lines):
+    game = Game()
+    game._initialize(HEADER)
+    game._update(lines + ["D_DONE"])
+    return game
+
+
+def unit(unitid, x, y, team=0, cooldown=0):
+    return f"u 0 {team} {unitid} {x} {y} {cooldown} 0 0 0"
+
+
+def rejected(result):
+    return {action[1]: reason for action, reason in result.rejected}
+
+
+def test_moves_onto_the_same_cell_all_stay():
+    game = game_with([unit("u_1", 0, 0), unit("u_2", 2, 0), unit("u_3", 4, 0)])
+    result = validate.resolve(game, ["m u_1 e", "m u_2 w", "m u_3 s"])
+    assert rejected(result) == {"u_1": validate.COLLISION, "u_2": validate.COLLISION}
+    assert result.positions == {"u_1": (0, 0), "u_2": (2, 0), "u_3": (4, 1)}
+    assert result.commands() == ["m u_3 s"]
+
+
+def test_moves_onto_the_same_city_tile_all_go():
+    game = game_with([unit("u_1", 0, 0), unit("u_2", 2, 0), "c 0 c_1 100 23", "ct 0 c_1 1 0 0"])
+    result = validate.resolve(game, ["m u_1 e", "m u_2 w"])
+    assert result.rejected == []
+    assert result.positions == {"u_1": (1, 0), "u_2": (1, 0)}
+
+
+def test_units_swapping_cells_both_stay():
+    game = game_with([unit("u_1", 0, 0), unit("u_2", 1, 0)])
+    result = validate.resolve(game, ["m u_1 e", "m u_2 w"])
+    assert rejected(result) == {"u_1": validate.SWAP, "u_2": validate.SWAP}
+    assert result.positions == {"u_1": (0, 0), "u_2": (1, 0)}
+
+
+def test_a_unit_that_stays_blocks_a_chain_of_moves():
+    # u_3 stays, so u_2 cannot move onto it, so u_1 cannot move onto u_2
+    game = game_with([unit("u_1", 0, 1), unit("u_2", 1, 1), unit("u_3", 2, 1, cooldown=1), unit("u_4", 0, 3)])
+    result = validate.resolve(game, ["m u_1 e", "m u_2 e", "m u_3 e", "m u_4 e"])
+    assert rejected(result) == {"u_1": validate.BLOCKED, "u_2": validate.BLOCKED, "u_3": validate.COOLDOWN}
+    assert result.positions == {"u_1": (0, 1), "u_2": (1, 1), "u_3": (2, 1), "u_4": (1, 3)}
+
+
+def test_a_chain_moving_off_its_cells_all_go():
+    game = game_with([unit("u_1", 0, 1), unit("u_2", 1, 1), unit("u_3", 2, 1)])
+    result = validate.resolve(game, ["m u_1 e", "m u_2 e", "m u_3 e"])
+    assert result.rejected == []
+    assert result.positions == {"u_1": (1, 1), "u_2": (2, 1), "u_3": (3, 1)}
+
+
+def test_a_collision_blocks_the_units_behind_it():
+    game = game_with([unit("u_1", 1, 2), unit("u_2", 3, 2), unit("u_3", 0, 2)])
+    result = validate.resolve(game, ["m u_1 e", "m u_2 w", "m u_3 e"])
+    assert rejected(result) == {"u_1": validate.COLLISION, "u_2": validate.COLLISION, "u_3": validate.BLOCKED}
+
+
+def test_opponent_units_are_taken_to_stay():
+    game = game_with([unit("u_1", 0, 0), unit("u_9", 1, 0, team=1)])
+    result = validate.resolve(game, ["m u_1 e", "m u_9 w"])
+    assert rejected(result) == {"u_1": validate.BLOCKED, "u_9": validate.NOT_OWNED}
+
+
+def test_invalid_moves():
+    game = game_with([unit("u_1", 0, 0), "c 1 c_2 100 23", "ct 1 c_2 0 1 0"])
+    result = validate.resolve(game, ["m u_1 n", "m u_1 s", "m u_5 e"])
+    assert rejected(result) == {"u_1": validate.ALREADY_ACTED, "u_5": validate.NO_SUCH_UNIT}
+    assert result.rejected[0] == (("m", "u_1", "n"), validate.OFF_MAP)
+    result = validate.resolve(game, ["m u_1 s"])
+    assert rejected(result) == {"u_1": validate.OPPONENT_CITYTILE}